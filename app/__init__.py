@@ -4,7 +4,7 @@ from flask_migrate import Migrate
 from flask_login import LoginManager
 from .config import Config
 import os
-import torch
+import time
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -14,6 +14,10 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Stream multipart uploads straight to their final file while hashing them
+    from .services.ingest import StreamingRequest
+    app.request_class = StreamingRequest
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -25,28 +29,93 @@ def create_app(config_class=Config):
     from .routes.auth import auth
     from .api.transcription import api as transcription_api
     from .api.youtube import youtube_api
+    from .api.streaming import stream_api
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth, url_prefix='/auth')
     app.register_blueprint(transcription_api, url_prefix='/api/transcription')
     app.register_blueprint(youtube_api, url_prefix='/api/youtube')
+    app.register_blueprint(stream_api, url_prefix='/api/stream')
+
+    # Register CLI commands
+    from .cli import register_commands
+    register_commands(app)
+
+    # Prometheus metrics at /metrics
+    from .services.metrics import register_metrics
+    register_metrics(app)
 
     # Create necessary directories
     os.makedirs(app.config.get('UPLOAD_FOLDER', 'uploads'), exist_ok=True)
     os.makedirs(app.config.get('STORAGE_PATH', 'storage'), exist_ok=True)
     os.makedirs(app.config.get('MODEL_PATH', 'models'), exist_ok=True)
 
+    started_at = time.time()
+
+    def check_database():
+        from sqlalchemy import text
+        db.session.execute(text('SELECT 1'))
+
+    def model_state():
+        """Loaded models of the model host, or of this process when there is none."""
+        from .services.model_host import ModelHostError, get_client
+        from .services.model_registry import get_registry
+
+        try:
+            client = get_client()
+            if client is None:
+                loaded = get_registry().stats()['loaded']
+                return {'source': 'process', 'model_loaded': bool(loaded), 'loaded': loaded}
+            health = client.health()
+        except ModelHostError as e:
+            return {'source': 'model_host', 'model_loaded': False, 'error': str(e)}
+        return {'source': 'model_host', 'model_loaded': health['model_loaded'],
+                'loaded': health['models']['loaded']}
+
+    # Liveness: the process answers requests; never touches the database or torch
+    @app.route('/health/live')
+    def liveness():
+        return jsonify({'status': 'alive', 'pid': os.getpid(), 'uptime': time.time() - started_at}), 200
+
+    # Readiness: dependencies reachable, and a model loaded if READY_REQUIRES_MODEL
+    @app.route('/health/ready')
+    def readiness():
+        status = {'status': 'ready'}
+        try:
+            check_database()
+            status['database'] = 'connected'
+        except Exception as e:
+            status.update(status='unready', database='unreachable', error=str(e))
+        models = model_state()
+        status['models'] = models
+        if 'error' in models or (app.config['READY_REQUIRES_MODEL'] and not models['model_loaded']):
+            status['status'] = 'unready'
+        return jsonify(status), 200 if status['status'] == 'ready' else 503
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
         try:
+            import torch
+
             # Check database connection
-            db.session.execute('SELECT 1')
-            return jsonify({
+            check_database()
+            status = {
                 'status': 'healthy',
                 'database': 'connected',
                 'gpu': 'available' if torch.cuda.is_available() else 'unavailable'
-            }), 200
+            }
+
+            # Report the shared model host when inference is delegated to it
+            from .services.model_host import ModelHostError, get_client
+            client = get_client()
+            if client is not None:
+                try:
+                    status['model_host'] = client.health()
+                except ModelHostError as e:
+                    status['status'] = 'degraded'
+                    status['model_host'] = {'status': 'unreachable', 'error': str(e)}
+            return jsonify(status), 200
         except Exception as e:
             return jsonify({
                 'status': 'unhealthy',
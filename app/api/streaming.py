@@ -0,0 +1,139 @@
+from flask import Blueprint, request, jsonify, current_app, url_for
+import os
+import time
+import uuid
+from datetime import datetime
+from .transcription import TRANSCRIBE_OPTIONS, inference_saturated, requested_model
+from app.models.transcription import Transcription
+from app.services import events
+from app.services.governor import Saturated, admit_inline
+from app.services.ingest import CHUNK_SIZE
+from app.services.jobs import heartbeat
+from app.services.model_host import ModelHostError
+from app.services.model_registry import ModelNotAvailable
+from app.services.streaming import StreamError, call
+from .. import db
+
+stream_api = Blueprint('stream_api', __name__)
+stream_api.register_error_handler(Saturated, inference_saturated)
+
+@stream_api.errorhandler(StreamError)
+def stream_error(e):
+    return jsonify({'error': str(e)}), e.status_code
+
+@stream_api.errorhandler(ModelHostError)
+def model_host_error(e):
+    current_app.logger.error(f"Model host error in live session: {str(e)}")
+    return jsonify({'error': str(e)}), 503
+
+def stream_worker_id(session_id: str) -> str:
+    return f"stream:{session_id}"[:64]
+
+def live_transcription(session_id: str) -> Transcription:
+    transcription = db.session.get(Transcription, session_id)
+    if transcription is None or transcription.worker_id != stream_worker_id(session_id):
+        raise StreamError('Live session not found', 404)
+    if transcription.status != 'processing':
+        raise StreamError('Live session is already closed', 409)
+    return transcription
+
+@stream_api.route('/sessions', methods=['POST'])
+def open_session():
+    """Open a live transcription session.
+
+    JSON body: ``model``, ``use_gpu``, ``language`` and ``format`` (``pcm_s16le``
+    or ``pcm_f32le`` at 16 kHz mono, or ``opus`` in an Ogg/WebM stream).
+    """
+    try:
+        model_name, use_gpu = requested_model()
+    except ModelNotAvailable as e:
+        return jsonify({'error': str(e)}), 400
+    admit_inline()
+
+    options = request.get_json(silent=True) or {}
+    session_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    transcription = Transcription(
+        id=session_id,
+        file_name=f"live-{now.strftime('%Y%m%d-%H%M%S')}.wav",
+        file_path=os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.wav"),
+        model_name=model_name,
+        use_gpu=use_gpu,
+        status='processing',
+        attempts=1,
+        worker_id=stream_worker_id(session_id),
+        claimed_at=now,
+        heartbeat_at=now
+    )
+    transcription.save()
+
+    try:
+        state = call(
+            'open',
+            session_id=session_id,
+            model_name=model_name,
+            use_gpu=use_gpu,
+            language=options.get('language', TRANSCRIBE_OPTIONS['language']),
+            audio_format=options.get('format', 'pcm_s16le'),
+            recording_path=transcription.file_path
+        )
+    except (StreamError, ModelHostError) as e:
+        db.session.delete(transcription)
+        db.session.commit()
+        events.EventLog.for_transcription(session_id).remove()
+        raise e
+
+    return jsonify(dict(
+        state,
+        audio_url=url_for('stream_api.push_audio', session_id=session_id),
+        close_url=url_for('stream_api.close_session', session_id=session_id),
+        events_url=url_for('transcription_api.transcription_events', id=session_id)
+    )), 201
+
+@stream_api.route('/sessions/<session_id>/audio', methods=['POST'])
+def push_audio(session_id):
+    """Push audio to a live session; chunked request bodies are decoded as they arrive."""
+    live_transcription(session_id)
+    interval = max(current_app.config['JOB_LEASE_SECONDS'] / 3, 1)
+    state = None
+    beat_at = 0.0
+    for chunk in iter(lambda: request.stream.read(current_app.config['STREAM_CHUNK_BYTES']), b''):
+        state = call('push', session_id=session_id, data=chunk)
+        # One chunked request can last longer than the lease
+        if time.monotonic() - beat_at >= interval:
+            heartbeat(session_id, stream_worker_id(session_id))
+            beat_at = time.monotonic()
+    if state is None:
+        return jsonify({'error': 'No audio provided'}), 400
+    return jsonify(state)
+
+@stream_api.route('/sessions/<session_id>/close', methods=['POST'])
+def close_session(session_id):
+    """Finish a live session and save it as a completed transcription."""
+    transcription = live_transcription(session_id)
+    result = call('close', session_id=session_id)
+
+    transcription.update_result(
+        text=result['text'],
+        device=result['device'],
+        processing_time=(datetime.utcnow() - transcription.claimed_at).total_seconds(),
+        segments=result['segments'],
+        language=result['language']
+    )
+    events.emit(session_id, **events.result_event(transcription))
+    try:
+        os.remove(transcription.file_path)
+    except OSError as e:
+        current_app.logger.warning(f"Error cleaning up live recording: {str(e)}")
+
+    return jsonify({
+        'id': transcription.id,
+        'filename': transcription.file_name,
+        'text': transcription.text,
+        'segments': transcription.segments,
+        'status': transcription.status,
+        'duration': result['duration'],
+        'model': transcription.model_name,
+        'language': transcription.language,
+        'created_at': transcription.created_at.isoformat() if transcription.created_at else None
+    })
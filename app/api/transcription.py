@@ -1,29 +1,96 @@
-from flask import Blueprint, request, jsonify, current_app, render_template
-from werkzeug.utils import secure_filename
+from flask import (Blueprint, Response, request, jsonify, current_app, render_template, send_file,
+                   stream_with_context, url_for)
+from werkzeug.exceptions import RequestEntityTooLarge
+from flask_login import current_user
+from sqlalchemy.orm import load_only
 import os
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Mapping, Optional
+import uuid
 from app.models.transcription import Transcription
-import whisper
-import torch
+from app.services import audio_store, metrics
+from app.services.ingest import IngestedFile, UploadRejected, commit_upload, discard, ingest_stream
+from app.services.bulk_ingest import BulkIngest, archive_suffix
+from app.services.downloads import batch_progress
+from app.services.jobs import enqueue, enqueue_many
+from app.services.model_host import ModelHostError, get_client, is_model_host
+from app.services.batching import get_scheduler, transcribe_batched
+from app.services.chunking import SAMPLE_RATE, use_transcriber
+from app.services.governor import Saturated, admit_queued, inference_slot, inference_slots
+from app.services.events import (EventLog, format_sse, replay_events, reporter_for, result_event,
+                                 stream_events, stream_limit, whisper_progress)
+from app.services.model_registry import (CPU_ONLY_PRECISIONS, PRECISION_BYTES, ModelNotAvailable, checkpoint_path,
+                                         get_registry, resolve_device)
+from app.services import repository
+from app.services.scheduler import PRIORITY_DELAYS
+from app.services.search import SearchUnavailable, search_transcriptions
+from app.services.exports import FORMATS, ExportError, export_path
+from app.services.result_cache import audio_digest, file_digest, get_cache, make_key
 import time
-import docx
-from docx.shared import Pt
-from io import BytesIO
-from pathlib import Path
 import tempfile
+from pathlib import Path
 from .. import db
 from datetime import datetime
 
+# torch, whisper and python-docx take seconds to import; they are imported where used
+if TYPE_CHECKING:
+    import whisper
+
 api = Blueprint('transcription_api', __name__)
 
+@api.errorhandler(UploadRejected)
+def upload_rejected(e):
+    return jsonify({'error': str(e)}), e.status_code
+
+@api.errorhandler(ExportError)
+def export_error(e):
+    return jsonify({'error': str(e)}), e.status_code
+
+@api.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({'error': 'File exceeds the upload size limit'}), 413
+
+@api.errorhandler(Saturated)
+def inference_saturated(e):
+    return jsonify({'error': str(e), 'retry_after': e.retry_after}), 429, {'Retry-After': str(e.retry_after)}
+
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'mp4', 'm4a', 'mpeg', 'webm'}
 
-# Initialize Whisper model
-MODEL = None
-DEVICE = None
+# Decoding options passed to Whisper; part of every result cache key
+TRANSCRIBE_OPTIONS = {'language': 'en', 'task': 'transcribe'}
+
+def result_options(precision: Optional[str] = None) -> Dict[str, Any]:
+    """Result cache key options; reduced-precision CPU results are kept apart from full-precision ones."""
+    precision = precision or current_app.config['CPU_PRECISION']
+    if precision in CPU_ONLY_PRECISIONS:
+        return dict(TRANSCRIBE_OPTIONS, precision=precision)
+    return TRANSCRIBE_OPTIONS
+
+# Listing fields and the model attributes they are read from
+LIST_FIELDS = {
+    'id': 'id',
+    'filename': 'file_name',
+    'status': 'status',
+    'preview': 'preview',
+    'text': 'text',
+    'error': 'error_message',
+    'model': 'model_name',
+    'language': 'language',
+    'device': 'device',
+    'priority': 'priority',
+    'duration': 'audio_seconds',
+    'processing_time': 'processing_time',
+    'user_id': 'user_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at'
+}
+DEFAULT_LIST_FIELDS = ('id', 'filename', 'status', 'preview', 'created_at')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 def get_device_info() -> tuple[str, bool]:
     """Get device information and check CUDA availability."""
+    import torch
+
     if torch.cuda.is_available():
         device = "cuda"
         gpu_name = torch.cuda.get_device_name(0)
@@ -34,46 +101,129 @@ def get_device_info() -> tuple[str, bool]:
         current_app.logger.warning("CUDA not available, using CPU")
         return device, False
 
-def load_model() -> tuple[whisper.Whisper, str]:
-    """Load the Whisper model if not already loaded."""
-    global MODEL, DEVICE
-    if MODEL is None:
-        current_app.logger.info("Loading Whisper model...")
-        device, gpu_available = get_device_info()
-        DEVICE = device
-        MODEL = whisper.load_model("large-v3", device=device)
-        current_app.logger.info(f"Whisper model loaded successfully on {device}")
-    return MODEL, DEVICE
+def load_model(model_name: Optional[str] = None, use_gpu: bool = True) -> tuple['whisper.Whisper', str]:
+    """Load a Whisper model through the model registry."""
+    name = model_name or current_app.config['WHISPER_MODEL']
+    device = resolve_device(use_gpu)
+    loaded = get_registry().get(name, device)
+    return loaded.model, device
 
 def allowed_file(filename: str) -> bool:
     """Check if the file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def transcribe_audio(audio_path: str) -> Dict[str, Any]:
-    """Transcribe audio file to text using Whisper."""
+def transcribe_audio(audio_path: str, model_name: Optional[str] = None, use_gpu: bool = True,
+                     file_hash: Optional[str] = None, transcription_id: Optional[str] = None,
+                     precision: Optional[str] = None) -> Dict[str, Any]:
+    """Transcribe audio file to text using Whisper.
+
+    Inference is delegated to the model host when one is configured, so the
+    calling process never loads weights of its own. With a transcription id,
+    progress and segments are written to that transcription's event log.
+    """
+    client = get_client()
+    if client is None:
+        return transcribe_local(audio_path, model_name, use_gpu, file_hash, transcription_id, precision=precision)
+    
+    try:
+        return client.transcribe(audio_path, model_name=model_name, use_gpu=use_gpu, file_hash=file_hash,
+                                 transcription_id=transcription_id, precision=precision)
+    except ModelHostError as e:
+        current_app.logger.error(f"Model host error for {audio_path}: {str(e)}")
+        return {
+            "error": f"Error transcribing audio file: {str(e)}",
+            "text": "",
+            "processing_time": 0,
+            "device": None,
+            "model": model_name,
+            "segments": [],
+            "language": "en"
+        }
+
+def transcribe_local(audio_path: str, model_name: Optional[str] = None, use_gpu: bool = True,
+                     file_hash: Optional[str] = None, transcription_id: Optional[str] = None,
+                     reporter=None, precision: Optional[str] = None) -> Dict[str, Any]:
+    """Transcribe audio file with a model loaded in this process.
+
+    With a file hash, a result cached for the same bytes is returned before
+    anything is decoded. Otherwise the file is decoded once; the decoded
+    waveform is both hashed for the result cache and handed to Whisper, so a
+    cache hit skips inference. With a file hash the waveform comes from the
+    decoded-audio store, so only the first pass over an upload runs ffmpeg. An explicit ``reporter`` takes the
+    place of the transcription's event log. ``precision`` overrides the
+    server's CPU precision and is ignored on GPU.
+    """
+    model_name = model_name or current_app.config['WHISPER_MODEL']
+    device = resolve_device(use_gpu)
+    reporter = reporter or reporter_for(transcription_id)
+
+    def from_cache(cached):
+        current_app.logger.info(f"Result cache hit for {audio_path}")
+        if reporter is not None:
+            reporter.segments(cached['segments'])
+            reporter.progress(1, 1)
+        return dict(cached, processing_time=time.time() - start_time, cached=True)
+
     try:
-        model, device = load_model()
-        current_app.logger.info(f"Starting transcription of {audio_path}")
-        
         start_time = time.time()
-        result = model.transcribe(
-            audio_path,
-            language="en",
-            task="transcribe",
-            verbose=False
-        )
-        end_time = time.time()
+        precision = get_registry().key(model_name, device, precision).precision
+        cache = get_cache()
+        if cache is not None:
+            options = result_options(precision)
+            alias = make_key(f"file:{file_hash or file_digest(audio_path)}", model_name, options)
+            # The same bytes were transcribed before; skip decoding them at all
+            cached = cache.get(alias) if file_hash else None
+            if cached is not None:
+                return from_cache(cached)
+
+        audio = audio_store.load_audio(audio_path, file_hash)
+        if cache is not None:
+            key = make_key(f"audio:{audio_digest(audio)}", model_name, options)
+            cached = cache.get(key)
+            if cached is not None:
+                cache.put(key, cached, aliases=[alias])
+                return from_cache(cached)
+        
+        duration = len(audio) / SAMPLE_RATE
+        if is_long_audio(duration, device):
+            current_app.logger.info(f"Starting chunked transcription of {audio_path} "
+                                    f"({duration:.0f} seconds) with {model_name}")
+            result = transcribe_long_audio(audio, model_name, reporter, precision)
+            end_time = time.time()
+        elif current_app.config['BATCH_DECODING_ENABLED']:
+            current_app.logger.info(f"Starting batched transcription of {audio_path} with {model_name}")
+            with inference_slot(device):
+                result = transcribe_batched_audio(audio, model_name, device, reporter, precision)
+            end_time = time.time()
+        else:
+            # The slot is taken once the model is ours, so waiting on the model never idles a slot
+            with get_registry().use(model_name, device, precision) as loaded, inference_slot(device), \
+                    whisper_progress(reporter):
+                current_app.logger.info(f"Starting transcription of {audio_path} with {model_name} ({precision})")
+                
+                result = loaded.model.transcribe(
+                    audio,
+                    verbose=False,
+                    fp16=loaded.key.precision == 'fp16',
+                    **TRANSCRIBE_OPTIONS
+                )
+                end_time = time.time()
         
         processing_time = end_time - start_time
         current_app.logger.info(f"Transcription completed in {processing_time:.2f} seconds")
+        metrics.observe_inference(model_name, device, processing_time, duration)
         
-        return {
+        output = {
             "text": result["text"],
             "processing_time": processing_time,
             "device": device,
+            "model": model_name,
             "segments": result.get("segments", []),
             "language": result.get("language", "en")
         }
+        if cache is not None:
+            cache.put(key, output, aliases=[alias])
+        return output
         
     except Exception as e:
         current_app.logger.error(f"Error transcribing audio file {audio_path}: {str(e)}")
@@ -82,89 +232,287 @@ def transcribe_audio(audio_path: str) -> Dict[str, Any]:
             "text": "",
             "processing_time": 0,
             "device": device,
+            "model": model_name,
             "segments": [],
             "language": "en"
         }
 
-def get_whisper_model(use_gpu=True):
-    """Get Whisper model with appropriate device configuration"""
-    try:
-        if use_gpu and torch.cuda.is_available():
-            device = "cuda"
-            current_app.logger.info("Using GPU for transcription")
-        else:
-            device = "cpu"
-            current_app.logger.info("Using CPU for transcription")
-        
-        model = whisper.load_model("large-v3", device=device)
-        return model
-    except Exception as e:
-        current_app.logger.error(f"Error loading Whisper model: {e}")
+def is_long_audio(duration: float, device: str) -> bool:
+    """Whether a recording should be split and transcribed across the CPU pool.
+
+    Only the model host runs pools, so web and queue worker processes never
+    hold extra model copies of their own.
+    """
+    return (device == 'cpu' and current_app.config['LONG_AUDIO_ENABLED'] and is_model_host() and
+            duration >= current_app.config['LONG_AUDIO_THRESHOLD_SECONDS'])
+
+def transcribe_long_audio(audio, model_name: str, reporter=None, precision: str = 'fp32') -> Dict[str, Any]:
+    """Transcribe silence-aligned windows of a long recording in parallel processes.
+
+    Windows finish out of order and overlapping duplicates are only dropped
+    once all of them are merged, so segments are reported at the end. The
+    pool holds one inference slot per process while it works.
+    """
+    checkpoint = checkpoint_path(current_app.config['MODEL_PATH'], model_name)
+    if not os.path.exists(checkpoint):
+        raise ModelNotAvailable(f"Model '{model_name}' is not installed in {current_app.config['MODEL_PATH']}")
+    with use_transcriber(
+        get_registry(),
+        model_name,
+        checkpoint,
+        current_app.config['LONG_AUDIO_PROCESSES'],
+        current_app.config['LONG_AUDIO_THREADS_PER_PROCESS'],
+        precision
+    ) as transcriber, inference_slots('cpu', transcriber.processes):
+        result = transcriber.transcribe(
+            audio,
+            TRANSCRIBE_OPTIONS,
+            current_app.config['LONG_AUDIO_WINDOW_SECONDS'],
+            current_app.config['LONG_AUDIO_OVERLAP_SECONDS'],
+            on_window=reporter.progress if reporter is not None else None
+        )
+    if reporter is not None:
+        reporter.segments(result['segments'])
+    return result
+
+def transcribe_batched_audio(audio, model_name: str, device: str, reporter=None,
+                             precision: Optional[str] = None) -> Dict[str, Any]:
+    """Decode the recording's 30-second windows in batches shared with concurrent jobs."""
+    registry = get_registry()
+    scheduler = get_scheduler(
+        registry,
+        registry.key(model_name, device, precision),
+        current_app.config['BATCH_MAX_SIZE'],
+        current_app.config['BATCH_MAX_WAIT_MS'] / 1000,
+        logger=current_app.logger
+    )
+    def on_window(segments, done, total):
+        reporter.segments(segments)
+        reporter.progress(done, total)
+
+    return transcribe_batched(scheduler, audio, on_window=on_window if reporter is not None else None,
+                              **TRANSCRIBE_OPTIONS)
+
+def cached_upload_result(file_hash: str, model_name: str, precision: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Look up a finished result for uploaded bytes without decoding them."""
+    cache = get_cache()
+    if cache is None:
         return None
+    return cache.get(make_key(f"file:{file_hash}", model_name, result_options(precision)))
+
+def complete_from_cache(transcription: Transcription, result: Dict[str, Any], started: float):
+    """Finish a transcription from a cached result and return it to the client."""
+    transcription.update_result(
+        text=result['text'],
+        device=result['device'],
+        processing_time=time.time() - started,
+        segments=result['segments'],
+        language=result['language']
+    )
+    log = EventLog.for_transcription(transcription.id)
+    log.reset()
+    reporter = reporter_for(transcription.id)
+    reporter.segments(transcription.segments)
+    reporter.progress(1, 1)
+    log.emit(**result_event(transcription))
+    audio_store.release(transcription.content_hash, transcription.id)
+    try:
+        os.remove(transcription.file_path)
+    except OSError as e:
+        current_app.logger.warning(f"Error cleaning up uploaded file: {str(e)}")
+    return jsonify({
+        'id': transcription.id,
+        'status': transcription.status,
+        'filename': transcription.file_name,
+        'text': transcription.text,
+        'segments': transcription.segments,
+        'language': transcription.language,
+        'model': transcription.model_name,
+        'cached': True,
+        'created_at': transcription.created_at.isoformat() if transcription.created_at else None
+    }), 200
+
+def request_values() -> Mapping[str, Any]:
+    return request.form or request.get_json(silent=True) or request.args
+
+def requested_model(values: Optional[Mapping[str, Any]] = None) -> tuple[str, bool]:
+    """Read the model name and GPU preference from form fields or a JSON body."""
+    values = request_values() if values is None else values
+    model_name = values.get('model') or current_app.config['WHISPER_MODEL']
+    use_gpu = str(values.get('use_gpu', 'true')).lower() == 'true'
+    if model_name not in current_app.config['ALLOWED_MODELS']:
+        raise ModelNotAvailable(
+            f"Unknown model '{model_name}'. Choose one of: {', '.join(current_app.config['ALLOWED_MODELS'])}"
+        )
+    if not get_registry().is_installed(model_name):
+        raise ModelNotAvailable(f"Model '{model_name}' is not installed on this server")
+    return model_name, use_gpu
+
+def requested_precision(values: Optional[Mapping[str, Any]] = None) -> Optional[str]:
+    """Read an optional CPU precision (``fp32``, ``bf16`` or ``int8``) from the request."""
+    values = request_values() if values is None else values
+    precision = values.get('precision') or None
+    if precision is not None and precision not in PRECISION_BYTES:
+        raise ModelNotAvailable(f"Unknown precision '{precision}'. Choose one of: {', '.join(PRECISION_BYTES)}")
+    return precision
+
+def requested_priority(values: Optional[Mapping[str, Any]] = None) -> Optional[str]:
+    """Read an optional scheduling class (``interactive``, ``normal`` or ``bulk``) from the request."""
+    values = request_values() if values is None else values
+    priority = values.get('priority') or None
+    if priority is not None and priority not in PRIORITY_DELAYS:
+        raise ValueError(f"Unknown priority '{priority}'. Choose one of: {', '.join(PRIORITY_DELAYS)}")
+    return priority
+
+def request_user_id() -> Optional[str]:
+    """The signed-in user, whose jobs share one fair-share budget."""
+    return current_user.id if current_user.is_authenticated else None
+
+def receive_upload() -> IngestedFile:
+    """Stream the uploaded audio to disk from a multipart form or a raw request body.
+
+    Raw bodies name the file with ``?filename=`` or an ``X-Filename`` header.
+    """
+    if request.mimetype == 'multipart/form-data':
+        if 'file' not in request.files:
+            raise UploadRejected('No file provided')
+        file = request.files['file']
+        if file.filename == '':
+            raise UploadRejected('No file selected')
+        return commit_upload(file)
+    
+    filename = request.args.get('filename') or request.headers.get('X-Filename')
+    if not filename:
+        raise UploadRejected('No file provided')
+    return ingest_stream(request.stream, filename)
+
+def job_response(transcription: Transcription, message: str = 'Transcription queued'):
+    """202 response pointing the client at the job's status URL."""
+    return jsonify({
+        'id': transcription.id,
+        'status': transcription.status,
+        'filename': transcription.file_name,
+        'message': message,
+        'status_url': url_for('transcription_api.get_transcription', id=transcription.id),
+        'created_at': transcription.created_at.isoformat() if transcription.created_at else None
+    }), 202, {'Location': url_for('transcription_api.get_transcription', id=transcription.id)}
 
 @api.route('/transcribe', methods=['POST'])
 def transcribe():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+    started = time.time()
+    ingested = receive_upload()
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    
-    # Get user preference for GPU usage
-    use_gpu = request.form.get('use_gpu', 'true').lower() == 'true'
+    try:
+        model_name, use_gpu = requested_model()
+        precision = requested_precision()
+        priority = requested_priority()
+    except (ModelNotAvailable, ValueError) as e:
+        discard(ingested)
+        return jsonify({'error': str(e)}), 400
     
     try:
-        # Save the uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
-            file.save(temp_file.name)
-            temp_path = temp_file.name
-        
-        # Get the model with appropriate device configuration
-        model, device = load_model()
-        if model is None:
-            return jsonify({'error': 'Failed to load transcription model'}), 500
-        
-        # Perform transcription
-        result = model.transcribe(temp_path)
-        
-        # Create transcription record
         transcription = Transcription(
-            file_name=file.filename,
-            file_path=temp_path,
-            text=result['text'],
-            status='completed',
-            processing_time=time.time() - time.time(),
-            device=device,
-            language=result.get('language', 'en')
+            file_name=ingested.filename,
+            file_path=ingested.path,
+            content_hash=ingested.sha256,
+            model_name=model_name,
+            use_gpu=use_gpu,
+            precision=precision,
+            priority=priority,
+            user_id=request_user_id()
         )
-        db.session.add(transcription)
-        db.session.commit()
-        
-        # Clean up temporary file
-        os.unlink(temp_path)
+        cached = cached_upload_result(transcription.content_hash, model_name, precision)
+        if cached is not None:
+            return complete_from_cache(transcription, cached, started)
         
-        return jsonify({
-            'id': transcription.id,
-            'text': result['text'],
-            'filename': file.filename,
-            'created_at': transcription.created_at.isoformat()
-        })
+        admit_queued()
+        enqueue(transcription)
+        return job_response(transcription)
         
+    except Saturated as e:
+        discard(ingested)
+        return inference_saturated(e)
     except Exception as e:
         current_app.logger.error(f"Transcription error: {e}")
+        discard(ingested)
         return jsonify({'error': str(e)}), 500
 
+def listing_filters() -> Dict[str, Any]:
+    """Repository filters from the ``status``, ``user_id``, ``created_after`` and ``created_before`` query args."""
+    status = request.args.get('status')
+    if status == 'all':
+        status = None
+    if status is not None and status not in Transcription.STATUSES:
+        raise ValueError(f"Unknown status '{status}'")
+    filters: Dict[str, Any] = {'status': status, 'user_id': request.args.get('user_id')}
+    for arg in ('created_after', 'created_before'):
+        value = request.args.get(arg)
+        try:
+            filters[arg] = datetime.fromisoformat(value) if value else None
+        except ValueError:
+            raise ValueError(f"Invalid {arg}: expected an ISO 8601 timestamp")
+    return filters
+
+def listing_fields() -> list[str]:
+    """Fields requested with ``fields=a,b,c``; the full text only when asked for."""
+    requested = request.args.get('fields')
+    if not requested:
+        return list(DEFAULT_LIST_FIELDS)
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(LIST_FIELDS)}")
+    return fields
+
+def list_value(transcription: Transcription, field: str) -> Any:
+    value = getattr(transcription, LIST_FIELDS[field])
+    return value.isoformat() if isinstance(value, datetime) else value
+
 @api.route('/transcriptions', methods=['GET'])
 def get_transcriptions():
-    transcriptions = Transcription.query.order_by(Transcription.created_at.desc()).all()
-    return jsonify([{
-        'id': t.id,
-        'filename': t.file_name,
-        'text': t.text,
-        'status': t.status,
-        'created_at': t.created_at.isoformat() if t.created_at else None
-    } for t in transcriptions])
+    """List transcriptions, newest first, one keyset page at a time.
+
+    The next page's cursor is returned in the ``X-Next-Cursor`` header and a
+    ``Link: rel="next"`` URL; responses carry an ETag for conditional requests.
+    """
+    limit = min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    try:
+        fields = listing_fields()
+        transcriptions, next_cursor = repository.page_transcriptions(
+            **listing_filters(),
+            cursor=request.args.get('cursor'),
+            limit=max(limit, 1),
+            columns=[LIST_FIELDS[field] for field in fields]
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = jsonify([{field: list_value(t, field) for field in fields} for t in transcriptions])
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("transcription_api.get_transcriptions", **args)}>; rel="next"'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+@api.route('/search', methods=['GET'])
+def search():
+    """Rank finished transcriptions by how well they match ``q``.
+
+    Each result lists its best-matching segments with a highlighted snippet and
+    the segment's start and end in seconds.
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'No search query provided'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        results = search_transcriptions(query, user_id=request.args.get('user_id'), limit=limit)
+    except SearchUnavailable as e:
+        return jsonify({'error': str(e)}), 501
+    return jsonify({'query': query, 'results': results})
 
 @api.route('/transcriptions/<id>', methods=['GET'])
 def get_transcription(id):
@@ -174,95 +522,221 @@ def get_transcription(id):
         'filename': transcription.file_name,
         'text': transcription.text,
         'status': transcription.status,
+        'error': transcription.error_message,
+        'processing_time': transcription.processing_time,
+        'device': transcription.device,
+        'model': transcription.model_name,
+        'language': transcription.language,
         'created_at': transcription.created_at.isoformat() if transcription.created_at else None
     })
 
+@api.route('/transcriptions/<id>/events', methods=['GET'])
+def transcription_events(id):
+    """Stream progress, decoded segments and completion as Server-Sent Events."""
+    transcription = Transcription.query.get_or_404(id)
+    log = EventLog.for_transcription(id)
+    limit = stream_limit()
+    if not limit.acquire():
+        return jsonify({'error': 'Too many open event streams, retry later'}), 503, {
+            'Retry-After': str(int(current_app.config['EVENTS_KEEPALIVE_SECONDS']))
+        }
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_event_id = 0
+    
+    def finished():
+        db.session.expire_all()
+        row = db.session.get(Transcription, id)
+        event = result_event(row) if row is not None and row.status in ('completed', 'failed') else None
+        db.session.rollback()
+        return event
+    
+    if transcription.status in ('completed', 'failed') and not os.path.exists(log.path):
+        # Finished before this log existed; replay the stored result
+        events = replay_events(transcription)
+        stream = (format_sse(event['event'], event['data'], event_id)
+                  for event_id, event in enumerate(events, start=1) if event_id > last_event_id)
+    else:
+        stream = stream_events(log, last_event_id, current_app.config['EVENTS_POLL_INTERVAL'],
+                               current_app.config['EVENTS_KEEPALIVE_SECONDS'], finished)
+    
+    response = Response(stream_with_context(stream), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(limit.release)
+    return response
+
 @api.route('/transcriptions', methods=['POST'])
 def create_transcription():
     """Create a new transcription task."""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
+    started = time.time()
+    ingested = receive_upload()
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    
-    if not file or not allowed_file(file.filename):
+    if not allowed_file(ingested.filename):
+        discard(ingested)
         return jsonify({'error': 'Invalid file type'}), 400
     
     try:
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Create transcription record
+        model_name, use_gpu = requested_model()
+        precision = requested_precision()
+        priority = requested_priority()
+    except (ModelNotAvailable, ValueError) as e:
+        discard(ingested)
+        return jsonify({'error': str(e)}), 400
+    
+    try:
         transcription = Transcription(
-            storage_path=current_app.config['STORAGE_PATH'],
-            file_name=filename,
-            file_path=filepath
+            file_name=ingested.filename,
+            file_path=ingested.path,
+            content_hash=ingested.sha256,
+            model_name=model_name,
+            use_gpu=use_gpu,
+            precision=precision,
+            priority=priority,
+            user_id=request_user_id()
         )
-        transcription.save_to_json()
+        cached = cached_upload_result(transcription.content_hash, model_name, precision)
+        if cached is not None:
+            return complete_from_cache(transcription, cached, started)
         
-        return jsonify({
-            'id': transcription.id,
-            'status': 'pending',
-            'message': 'File uploaded successfully. Starting transcription...'
-        })
+        admit_queued()
+        enqueue(transcription)
+        return job_response(transcription, 'File uploaded successfully. Transcription queued.')
     
+    except Saturated as e:
+        discard(ingested)
+        return inference_saturated(e)
     except Exception as e:
+        discard(ingested)
         return jsonify({'error': f'Error uploading file: {str(e)}'}), 500
 
+def receive_bulk_upload() -> BulkIngest:
+    """Stream every file of a multipart body, or every member of an archive body, to disk.
+
+    Archive bodies name the archive with ``?filename=`` or an ``X-Filename``
+    header, or are recognised by their content type.
+    """
+    config = current_app.config
+    if request.content_length and request.content_length > config['BULK_UPLOAD_MAX_BYTES']:
+        raise UploadRejected(f"Bulk upload exceeds the {config['BULK_UPLOAD_MAX_BYTES'] // 2**20} MB limit", 413)
+    bulk = BulkIngest(config['BULK_UPLOAD_MAX_FILES'], config['BULK_UPLOAD_MAX_BYTES'])
+    try:
+        if request.mimetype == 'multipart/form-data':
+            boundary = request.mimetype_params.get('boundary')
+            if not boundary:
+                raise UploadRejected('Multipart body without a boundary')
+            bulk.add_multipart(request.stream, boundary.encode('latin-1'))
+        else:
+            filename = request.args.get('filename') or request.headers.get('X-Filename')
+            suffix = archive_suffix(filename, request.mimetype)
+            if suffix is None:
+                raise UploadRejected('Send files as multipart/form-data or a zip or tar archive', 415)
+            bulk.add_archive(request.stream, filename or f'upload{suffix}', suffix)
+    except Exception:
+        # Rejected, disconnected or failed part-way: nothing received is queued
+        bulk.discard()
+        raise
+    return bulk
+
+@api.route('/transcriptions/bulk', methods=['POST'])
+def bulk_upload():
+    """Queue every recording of a multipart upload or archive as one batch.
+
+    Options (``model``, ``use_gpu``, ``precision``, ``priority``) come from the
+    query string or form fields and apply to every file. The rows are written in
+    one batched insert; workers finish files whose bytes already have a cached
+    result without decoding them.
+    """
+    admit_queued()
+    bulk = receive_bulk_upload()
+    values = {**request.args.to_dict(), **bulk.fields}
+    try:
+        model_name, use_gpu = requested_model(values)
+        precision = requested_precision(values)
+        priority = requested_priority(values) or 'bulk'
+    except (ModelNotAvailable, ValueError) as e:
+        bulk.discard()
+        return jsonify({'error': str(e)}), 400
+    if not bulk.files:
+        return jsonify({'error': 'No audio files received', 'rejected': bulk.rejected}), 400
+
+    try:
+        batch_id = str(uuid.uuid4())
+        user_id = request_user_id()
+        ids = enqueue_many([Transcription(
+            file_name=ingested.filename,
+            file_path=ingested.path,
+            content_hash=ingested.sha256,
+            model_name=model_name,
+            use_gpu=use_gpu,
+            precision=precision,
+            priority=priority,
+            user_id=user_id,
+            batch_id=batch_id
+        ) for ingested in bulk.files])
+    except Exception as e:
+        current_app.logger.error(f"Bulk upload error: {e}")
+        db.session.rollback()
+        bulk.discard()
+        return jsonify({'error': f'Error queueing files: {str(e)}'}), 500
+
+    current_app.logger.info(f"Queued bulk batch {batch_id} with {len(ids)} files, rejected {len(bulk.rejected)}")
+    status_url = url_for('transcription_api.get_batch', batch_id=batch_id)
+    return jsonify({
+        'batch_id': batch_id,
+        'queued': len(ids),
+        'items': [{'id': transcription_id, 'filename': ingested.filename}
+                  for transcription_id, ingested in zip(ids, bulk.files)],
+        'rejected': bulk.rejected,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+@api.route('/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id: str):
+    """Aggregate progress and per-item status of a bulk upload or a YouTube batch."""
+    progress = batch_progress(batch_id)
+    if progress is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(progress)
+
 @api.route('/transcriptions/<transcription_id>/process', methods=['POST'])
 def process_transcription(transcription_id: str):
-    """Process a pending transcription."""
-    transcription = Transcription.find_by_id(current_app.config['STORAGE_PATH'], transcription_id)
+    """Queue a pending transcription, or retry a failed one."""
+    transcription = repository.get_transcription(transcription_id)
     if not transcription:
         return jsonify({'error': 'Transcription not found'}), 404
     
-    if transcription.status != 'pending':
+    if transcription.status == 'processing':
+        return job_response(transcription, 'Transcription already queued')
+    
+    if transcription.status not in ('pending', 'failed'):
         return jsonify({'error': 'Transcription is not pending'}), 400
     
+    if not os.path.exists(transcription.file_path):
+        return jsonify({'error': 'Source audio is no longer available'}), 410
+    
     try:
-        result = transcribe_audio(transcription.file_path)
+        started = time.time()
+        if transcription.content_hash is None:
+            transcription.content_hash = file_digest(transcription.file_path)
+        cached = cached_upload_result(transcription.content_hash,
+                                      transcription.model_name or current_app.config['WHISPER_MODEL'],
+                                      transcription.precision)
+        if cached is not None:
+            return complete_from_cache(transcription, cached, started)
         
-        if 'error' in result:
-            transcription.mark_error(result['error'])
-        else:
-            transcription.update_result(
-                text=result['text'],
-                device=result['device'],
-                processing_time=result['processing_time'],
-                segments=result['segments'],
-                language=result['language']
-            )
-        
-        # Clean up temporary file
-        try:
-            os.remove(transcription.file_path)
-        except Exception as e:
-            current_app.logger.warning(f"Error cleaning up temporary file: {str(e)}")
+        if transcription.status == 'pending':
+            db.session.commit()
+            return job_response(transcription, 'Transcription already queued')
         
-        return jsonify(transcription.to_dict())
+        enqueue(transcription)
+        return job_response(transcription, 'Transcription requeued')
     
     except Exception as e:
-        transcription.mark_error(str(e))
-        return jsonify({'error': f'Error processing transcription: {str(e)}'}), 500
-
-@api.route('/transcriptions', methods=['GET'])
-def list_transcriptions():
-    """List all transcriptions with optional status filter."""
-    status = request.args.get('status')
-    
-    if status == 'pending':
-        transcriptions = Transcription.get_pending(current_app.config['STORAGE_PATH'])
-    elif status == 'completed':
-        transcriptions = Transcription.get_completed(current_app.config['STORAGE_PATH'])
-    elif status == 'failed':
-        transcriptions = Transcription.get_failed(current_app.config['STORAGE_PATH'])
-    else:
-        transcriptions = Transcription.load_from_json(current_app.config['STORAGE_PATH'])
-    
-    return jsonify([t.to_dict() for t in transcriptions])
+        db.session.rollback()
+        return jsonify({'error': f'Error queueing transcription: {str(e)}'}), 500
 
 @api.route('/transcriptions/<id>/view', methods=['GET'])
 def view_transcription(id):
@@ -270,40 +744,99 @@ def view_transcription(id):
     transcription = Transcription.query.get_or_404(id)
     return render_template('transcript.html', transcription_id=id)
 
+@api.route('/transcriptions/<id>/segments', methods=['GET'])
+def get_segments(id):
+    """Segments overlapping the ``from``/``to`` window in seconds, e.g. for a player's captions.
+
+    ``tokens=true`` adds each segment's token ids.
+    """
+    Transcription.query.options(load_only(Transcription.id)).get_or_404(id)
+    start = request.args.get('from', type=float)
+    end = request.args.get('to', type=float)
+    if start is not None and end is not None and end < start:
+        return jsonify({'error': "'to' must not be before 'from'"}), 400
+    include_tokens = request.args.get('tokens', 'false').lower() == 'true'
+    segments = repository.segments_between(id, start, end)
+    return jsonify({
+        'id': id,
+        'from': start,
+        'to': end,
+        'segments': [segment.to_dict(include_tokens=include_tokens) for segment in segments]
+    })
+
+@api.route('/transcriptions/<id>/export/<fmt>', methods=['GET'])
+def export_transcription(id, fmt):
+    """Download a transcription as docx, srt, vtt, txt or json, rendered once per revision."""
+    transcription = Transcription.query.options(
+        load_only(Transcription.id, Transcription.file_name, Transcription.status, Transcription.revision)
+    ).get_or_404(id)
+    return send_export(transcription, fmt)
+
+def send_export(transcription: Transcription, fmt: str):
+    path = export_path(transcription, fmt)
+    stem = Path(transcription.file_name).stem or f'transcript_{transcription.id}'
+    return send_file(path, mimetype=FORMATS[fmt].mimetype, as_attachment=True,
+                     download_name=f'{stem}.{fmt}', conditional=True, max_age=0)
+
 @api.route('/transcriptions/<id>/download', methods=['POST'])
 def download_transcription(id):
-    """Download the edited transcription as a Word document."""
+    """Download the transcription as a Word document, or as the ``format`` given in the body.
+
+    Text edited in the browser can be sent as ``content``; it is rendered once
+    for this response instead of being served from the export cache.
+    """
     transcription = Transcription.query.get_or_404(id)
+    options = request.get_json(silent=True) or {}
+    content = options.get('content')
+    if content is None or content == transcription.text:
+        return send_export(transcription, options.get('format', 'docx'))
     
     try:
-        content = request.json.get('content', transcription.text)
-        
-        # Create a new Word document
+        import docx
+        from docx.shared import Pt
+
+        # Spill the edited document to an anonymous temporary file and stream it from there
         doc = docx.Document()
-        
-        # Add the content
         paragraph = doc.add_paragraph()
         run = paragraph.add_run(content)
         run.font.size = Pt(12)
+        doc_file = tempfile.TemporaryFile()
+        doc.save(doc_file)
+        doc_file.seek(0)
         
-        # Save the document to a BytesIO object
-        doc_stream = BytesIO()
-        doc.save(doc_stream)
-        doc_stream.seek(0)
-        
-        return doc_stream.getvalue(), 200, {
-            'Content-Type': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'Content-Disposition': f'attachment; filename=transcript_{id}.docx'
-        }
+        return send_file(doc_file, mimetype=FORMATS['docx'].mimetype, as_attachment=True,
+                         download_name=f'transcript_{id}.docx')
     
     except Exception as e:
         current_app.logger.error(f"Error creating Word document: {str(e)}")
         return jsonify({'error': f'Error creating Word document: {str(e)}'}), 500
 
+@api.route('/cache', methods=['GET'])
+def cache_stats():
+    """Result cache size and this process's hit/miss counters."""
+    cache = get_cache()
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(cache.stats(), enabled=True))
+
+@api.route('/models', methods=['GET'])
+def list_models():
+    """List selectable models and which ones are installed on this server."""
+    registry = get_registry()
+    return jsonify({
+        'default': current_app.config['WHISPER_MODEL'],
+        'models': [{
+            'name': name,
+            'installed': registry.is_installed(name)
+        } for name in current_app.config['ALLOWED_MODELS']]
+    })
+
 @api.route('/gpu-status', methods=['GET'])
 def gpu_status():
     """Check if GPU is available for transcription"""
     try:
+        import torch
+
         gpu_available = torch.cuda.is_available()
         return jsonify({
             'gpu_available': gpu_available,
@@ -1,87 +1,115 @@
-from flask import Blueprint, request, jsonify, current_app
-import yt_dlp
-import os
-import tempfile
+from flask import Blueprint, request, jsonify, current_app, url_for
 from pathlib import Path
-from .transcription import transcribe_audio
+from .transcription import (inference_saturated, job_response, request_user_id, requested_model,
+                            requested_priority, result_options)
 from app.models.transcription import Transcription
-from datetime import datetime
+from app.services import events
+from app.services.governor import Saturated, admit_queued
+from app.services.downloads import (DOWNLOAD_STATUS, MAX_URL_LENGTH, BulkIngestError, batch_progress,
+                                    create_batch, expand_urls)
+from app.services.model_registry import ModelNotAvailable
+from app.services.result_cache import get_cache, make_key, youtube_video_id
 
 youtube_api = Blueprint('youtube_api', __name__)
+youtube_api.register_error_handler(Saturated, inference_saturated)
 
-def download_youtube_audio(url: str) -> str:
-    """Download audio from YouTube video."""
+def queue_batch(urls, model_name: str, use_gpu: bool):
+    """Expand playlist, channel and video URLs and queue every video for download."""
+    if not isinstance(urls, list) or not all(isinstance(u, str) and u.strip() for u in urls):
+        return jsonify({'error': 'urls must be a list of URLs'}), 400
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-            output_path = temp_file.name
+        entries = expand_urls([u.strip() for u in urls], current_app.config['YOUTUBE_MAX_BATCH_ITEMS'])
+    except BulkIngestError as e:
+        return jsonify({'error': str(e)}), 400
+    if not entries:
+        return jsonify({'error': 'No videos found'}), 400
+    admit_queued()
 
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': output_path,
-            'quiet': True,
-            'no_warnings': True
-        }
+    cache = get_cache()
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            title = info.get('title', 'Unknown Title')
-            return output_path, title
+    def cached(entry):
+        video_id = youtube_video_id(entry.url)
+        if cache is None or video_id is None:
+            return None
+        return cache.get(make_key(f"youtube:{video_id}", model_name, result_options()))
 
-    except Exception as e:
-        current_app.logger.error(f"Error downloading YouTube video: {str(e)}")
-        if os.path.exists(output_path):
-            os.unlink(output_path)
-        raise Exception(f"Failed to download YouTube video: {str(e)}")
+    batch_id = create_batch(entries, model_name, use_gpu, user_id=request_user_id(), cached=cached)
+    current_app.logger.info(f"Queued batch {batch_id} with {len(entries)} videos")
+    progress = batch_progress(batch_id)
+    progress['status_url'] = url_for('transcription_api.get_batch', batch_id=batch_id)
+    return jsonify(progress), 202
 
 @youtube_api.route('/youtube/transcribe', methods=['POST'])
 def transcribe_youtube():
-    """Transcribe audio from a YouTube video."""
+    """Queue a YouTube video for download and transcription.
+
+    Answers ``202`` with the job's status URL, or ``200`` with the result when
+    the video was already transcribed with the same model.
+    """
     if not request.is_json:
         return jsonify({'error': 'Request must be JSON'}), 400
 
     url = request.json.get('url')
-    if not url:
+    urls = request.json.get('urls')
+    if not url and not urls:
         return jsonify({'error': 'No URL provided'}), 400
 
     try:
-        # Download the YouTube video's audio
-        audio_path, video_title = download_youtube_audio(url)
-
-        # Transcribe the audio
-        result = transcribe_audio(audio_path)
+        model_name, use_gpu = requested_model()
+    except ModelNotAvailable as e:
+        return jsonify({'error': str(e)}), 400
 
-        if 'error' in result:
-            raise Exception(result['error'])
+    # Playlists, channels and URL lists are queued as a batch instead of transcribed inline
+    if urls or youtube_video_id(url) is None:
+        return queue_batch(urls or [url], model_name, use_gpu)
 
-        # Create transcription record
-        transcription = Transcription(
-            file_name=f"{video_title}.mp3",
-            file_path=audio_path,
-            text=result['text'],
-            status='completed',
-            processing_time=result['processing_time'],
-            device=result['device'],
-            language=result['language']
-        )
-        transcription.save()
-
-        # Clean up the temporary file
-        try:
-            os.unlink(audio_path)
-        except Exception as e:
-            current_app.logger.warning(f"Error cleaning up temporary file: {str(e)}")
+    url = url.strip()
+    if len(url) > MAX_URL_LENGTH:
+        return jsonify({'error': f'URL is longer than {MAX_URL_LENGTH} characters'}), 400
+    try:
+        priority = requested_priority()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        return jsonify({
-            'id': transcription.id,
-            'title': video_title,
-            'text': result['text'],
-            'processing_time': result['processing_time']
-        })
+    # The same video transcribed with the same model is served from the cache
+    cache = get_cache()
+    if cache is not None:
+        cached = cache.get(make_key(f"youtube:{youtube_video_id(url)}", model_name, result_options()))
+        if cached is not None:
+            title = cached.get('title') or url
+            transcription = Transcription(
+                file_name=title[:255],
+                file_path=url,
+                model_name=model_name,
+                user_id=request_user_id()
+            )
+            transcription.update_result(
+                text=cached['text'],
+                device=cached['device'],
+                processing_time=0,
+                segments=cached['segments'],
+                language=cached['language']
+            )
+            return jsonify({
+                'id': transcription.id,
+                'title': title,
+                'text': cached['text'],
+                'segments': cached['segments'],
+                'processing_time': 0,
+                'cached': True
+            })
 
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+    # The downloader fetches the audio and queues it for the inference workers
+    admit_queued()
+    transcription = Transcription(
+        file_name=url,
+        file_path=url,
+        model_name=model_name,
+        use_gpu=use_gpu,
+        priority=priority,
+        user_id=request_user_id(),
+        status=DOWNLOAD_STATUS
+    )
+    transcription.save()
+    events.emit(transcription.id, 'status', {'status': DOWNLOAD_STATUS})
+    return job_response(transcription)
@@ -0,0 +1,172 @@
+import multiprocessing
+import signal
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+def _worker_process(index: int, poll_interval: float) -> None:
+    from app import create_app
+    from app.services.jobs import make_worker_id, run_worker
+
+    app = create_app()
+    with app.app_context():
+        run_worker(make_worker_id(index), poll_interval)
+
+@click.command('worker')
+@click.option('--processes', '-p', type=int, default=None,
+              help='Number of inference worker processes (defaults to WORKER_PROCESSES).')
+@click.option('--poll-interval', type=float, default=None,
+              help='Seconds to wait between polls when the queue is empty.')
+@click.option('--once', is_flag=True, help='Process at most one job and exit.')
+@with_appcontext
+def worker_command(processes, poll_interval, once):
+    """Run inference workers that drain the transcription queue."""
+    from app.services.jobs import make_worker_id, run_worker
+    from app.services.metrics import mark_process_dead
+
+    processes = processes or current_app.config['WORKER_PROCESSES']
+    poll_interval = poll_interval or current_app.config['WORKER_POLL_INTERVAL']
+
+    if processes <= 1 or once:
+        run_worker(make_worker_id(), poll_interval, once=once)
+        return
+
+    ctx = multiprocessing.get_context('spawn')
+    workers = [ctx.Process(target=_worker_process, args=(i, poll_interval), name=f'worker-{i}')
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    click.echo(f'Started {processes} inference workers')
+
+    def _forward(signum, frame):
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _forward)
+    for process in workers:
+        process.join()
+        mark_process_dead(process.pid)
+
+@click.command('downloader')
+@click.option('--concurrency', '-c', type=int, default=None,
+              help='Parallel downloads (defaults to YOUTUBE_DOWNLOAD_CONCURRENCY).')
+@click.option('--poll-interval', type=float, default=None,
+              help='Seconds to wait between polls when nothing is waiting to be downloaded.')
+@click.option('--drain', is_flag=True, help='Exit once nothing is left to download.')
+@with_appcontext
+def downloader_command(concurrency, poll_interval, drain):
+    """Download queued playlist and bulk-URL videos and hand them to the inference queue."""
+    from app.services.downloads import run_downloader
+    from app.services.jobs import make_worker_id
+
+    run_downloader(
+        make_worker_id(),
+        concurrency or current_app.config['YOUTUBE_DOWNLOAD_CONCURRENCY'],
+        poll_interval or current_app.config['WORKER_POLL_INTERVAL'],
+        drain=drain
+    )
+
+@click.command('model-host')
+@click.option('--address', default=None,
+              help='Socket path or host:port to listen on (defaults to MODEL_HOST_ADDRESS).')
+@click.option('--no-preload', is_flag=True, help='Load the model on the first request instead of at startup.')
+@with_appcontext
+def model_host_command(address, no_preload):
+    """Run the process that owns the Whisper model and serves inference requests."""
+    from app.services.model_host import ModelHostError, serve
+
+    if not (address or current_app.config.get('MODEL_HOST_ADDRESS')):
+        raise click.UsageError('Set MODEL_HOST_ADDRESS or pass --address')
+    try:
+        serve(address, preload=not no_preload)
+    except ModelHostError as e:
+        raise click.UsageError(str(e))
+
+@click.group('models')
+def models_group():
+    """Manage Whisper checkpoints in MODEL_PATH."""
+
+@models_group.command('download')
+@click.argument('names', nargs=-1)
+@with_appcontext
+def download_models_command(names):
+    """Download checkpoints (defaults to WHISPER_MODEL) so requests never have to."""
+    from app.services.model_registry import AVAILABLE_MODELS, download_models
+
+    names = names or (current_app.config['WHISPER_MODEL'],)
+    unknown = [name for name in names if name not in AVAILABLE_MODELS]
+    if unknown:
+        raise click.BadParameter(f"Unknown model(s): {', '.join(unknown)}", param_hint='NAMES')
+    for path in download_models(current_app.config['MODEL_PATH'], list(names)):
+        click.echo(f'Downloaded {path}')
+
+@models_group.command('list')
+@with_appcontext
+def list_models_command():
+    """Show which models are installed in MODEL_PATH."""
+    from app.services.model_registry import AVAILABLE_MODELS, get_registry
+
+    registry = get_registry()
+    for name in AVAILABLE_MODELS:
+        state = 'installed' if registry.is_installed(name) else 'missing'
+        click.echo(f'{name:<10} {state}')
+
+@models_group.command('quantize')
+@click.argument('names', nargs=-1)
+@with_appcontext
+def quantize_models_command(names):
+    """Build the int8 CPU variants of installed checkpoints ahead of the first request."""
+    from app.services.model_registry import checkpoint_path
+    from app.services.quantization import load_int8, quantized_path
+
+    model_path = current_app.config['MODEL_PATH']
+    for name in names or (current_app.config['WHISPER_MODEL'],):
+        load_int8(checkpoint_path(model_path, name), model_path, name)
+        click.echo(f'Wrote {quantized_path(model_path, name)}')
+
+@models_group.command('compare-precision')
+@click.argument('name', required=False)
+@click.option('--audio-dir', type=click.Path(exists=True, file_okay=False), default=None,
+              help='Evaluation recordings, with optional <name>.txt references (defaults to MODEL_PATH/eval).')
+@click.option('--precision', '-p', 'precisions', multiple=True, type=click.Choice(['fp32', 'bf16', 'int8']),
+              default=('bf16', 'int8'), show_default=True, help='CPU precisions to compare with fp32.')
+@click.option('--language', default='en', show_default=True)
+@with_appcontext
+def compare_precision_command(name, audio_dir, precisions, language):
+    """Report the speedup and word error rate of reduced CPU precisions against fp32."""
+    import json
+    import os
+    from app.services.quantization import compare_precisions
+
+    name = name or current_app.config['WHISPER_MODEL']
+    audio_dir = audio_dir or os.path.join(current_app.config['MODEL_PATH'], 'eval')
+    if not os.path.isdir(audio_dir):
+        raise click.UsageError(f'No evaluation audio in {audio_dir}; pass --audio-dir')
+    try:
+        report = compare_precisions(name, audio_dir, list(precisions), language)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    click.echo(json.dumps(report, indent=2))
+
+@click.command('import-json')
+@click.option('--path', default=None, type=click.Path(dir_okay=False),
+              help='Legacy store to import (defaults to STORAGE_PATH/transcriptions.json).')
+@with_appcontext
+def import_json_command(path):
+    """Copy transcriptions from the old JSON file store into the database."""
+    import os
+    from app.services.repository import import_json_store
+
+    path = path or os.path.join(current_app.config['STORAGE_PATH'], 'transcriptions.json')
+    if not os.path.exists(path):
+        raise click.FileError(path, hint='no legacy store found')
+    imported, skipped = import_json_store(path)
+    click.echo(f'Imported {imported} transcriptions, skipped {skipped} already in the database')
+
+def register_commands(app) -> None:
+    app.cli.add_command(worker_command)
+    app.cli.add_command(downloader_command)
+    app.cli.add_command(import_json_command)
+    app.cli.add_command(model_host_command)
+    app.cli.add_command(models_group)
@@ -7,11 +7,105 @@ class Config:
     # Upload settings
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'm4a'}
+    STORAGE_PATH = os.environ.get('STORAGE_PATH') or 'storage'
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_MB', 1024)) * 1024 * 1024
+    # Headroom for the multipart envelope and form fields around the file
+    MAX_CONTENT_LENGTH = UPLOAD_MAX_BYTES + 1024 * 1024
+    # Bulk uploads: many files or one archive per request
+    BULK_UPLOAD_MAX_FILES = int(os.environ.get('BULK_UPLOAD_MAX_FILES', 10000))
+    BULK_UPLOAD_MAX_BYTES = int(os.environ.get('BULK_UPLOAD_MAX_MB', 2048)) * 1024 * 1024
+    MODEL_PATH = os.environ.get('MODEL_PATH') or 'models'
     
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Job queue settings
+    WORKER_PROCESSES = int(os.environ.get('WORKER_PROCESSES', 1))
+    WORKER_POLL_INTERVAL = float(os.environ.get('WORKER_POLL_INTERVAL', 2))
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+
+    # Health checks: report unready until a model is loaded (e.g. with preloading)
+    READY_REQUIRES_MODEL = os.environ.get('READY_REQUIRES_MODEL', 'false').lower() == 'true'
+
+    # Model settings
+    WHISPER_MODEL = os.environ.get('WHISPER_MODEL') or 'large-v3'
+    ALLOWED_MODELS = ('tiny', 'base', 'small', 'medium', 'large-v3')
+    MODEL_MEMORY_BUDGET_MB = int(os.environ.get('MODEL_MEMORY_BUDGET_MB', 12288))
+    # Default precision on CPU: fp32, bf16 (CPUs with native bf16) or int8 (dynamically quantized)
+    CPU_PRECISION = os.environ.get('CPU_PRECISION') or 'fp32'
+
+    # Long-audio mode: parallel chunked transcription on CPU
+    LONG_AUDIO_ENABLED = os.environ.get('LONG_AUDIO_ENABLED', 'true').lower() == 'true'
+    LONG_AUDIO_THRESHOLD_SECONDS = float(os.environ.get('LONG_AUDIO_THRESHOLD_SECONDS', 600))
+    LONG_AUDIO_WINDOW_SECONDS = float(os.environ.get('LONG_AUDIO_WINDOW_SECONDS', 120))
+    LONG_AUDIO_OVERLAP_SECONDS = float(os.environ.get('LONG_AUDIO_OVERLAP_SECONDS', 2))
+    LONG_AUDIO_PROCESSES = int(os.environ.get('LONG_AUDIO_PROCESSES', 0))  # 0 = cores // 4
+    LONG_AUDIO_THREADS_PER_PROCESS = int(os.environ.get('LONG_AUDIO_THREADS_PER_PROCESS', 0))  # 0 = cores // processes
+    LONG_AUDIO_POOL_IDLE_SECONDS = float(os.environ.get('LONG_AUDIO_POOL_IDLE_SECONDS', 600))  # 0 = never
+
+    # CPU inference slots shared by the processes of one host (0 = four cores per slot)
+    INFERENCE_GOVERNOR_ENABLED = os.environ.get('INFERENCE_GOVERNOR_ENABLED', 'true').lower() == 'true'
+    INFERENCE_SLOTS = int(os.environ.get('INFERENCE_SLOTS', 0))
+    INFERENCE_THREADS_PER_SLOT = int(os.environ.get('INFERENCE_THREADS_PER_SLOT', 0))  # 0 = cores // slots
+    INFERENCE_INTEROP_THREADS = int(os.environ.get('INFERENCE_INTEROP_THREADS', 1))
+    INFERENCE_SLOTS_PATH = os.environ.get('INFERENCE_SLOTS_PATH')  # defaults to STORAGE_PATH/slots
+    # Refuse new jobs with 429 when the estimated queue wait is longer (0 = never)
+    INFERENCE_MAX_QUEUE_SECONDS = float(os.environ.get('INFERENCE_MAX_QUEUE_SECONDS', 1800))
+
+    # Queue scheduling: priority classes, shortest-first and per-user fair share
+    SCHEDULER_DEFAULT_PRIORITY = os.environ.get('SCHEDULER_DEFAULT_PRIORITY') or 'normal'
+    SCHEDULER_DURATION_FACTOR = float(os.environ.get('SCHEDULER_DURATION_FACTOR', 0.1))  # delay per audio second
+    SCHEDULER_SHARE_FACTOR = float(os.environ.get('SCHEDULER_SHARE_FACTOR', 0.5))  # delay per recent audio second
+    SCHEDULER_SHARE_WINDOW_SECONDS = float(os.environ.get('SCHEDULER_SHARE_WINDOW_SECONDS', 3600))
+    SCHEDULER_MAX_DELAY_SECONDS = float(os.environ.get('SCHEDULER_MAX_DELAY_SECONDS', 3600))
+    SCHEDULER_USER_WEIGHTS = os.environ.get('SCHEDULER_USER_WEIGHTS')  # e.g. "<user-id>=2,<user-id>=0.5"
+    SCHEDULER_CANDIDATES = int(os.environ.get('SCHEDULER_CANDIDATES', 200))  # earliest pending jobs ranked per claim
+
+    # Cross-request batched decoding of 30-second windows
+    BATCH_DECODING_ENABLED = os.environ.get('BATCH_DECODING_ENABLED', 'false').lower() == 'true'
+    BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 8))
+    BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 50))
+
+    # Playlist and bulk URL ingestion
+    YOUTUBE_DOWNLOAD_CONCURRENCY = int(os.environ.get('YOUTUBE_DOWNLOAD_CONCURRENCY', 4))
+    YOUTUBE_MAX_BATCH_ITEMS = int(os.environ.get('YOUTUBE_MAX_BATCH_ITEMS', 1000))
+
+    # Server-Sent Events for job progress
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5))
+    EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('EVENTS_KEEPALIVE_SECONDS', 15))
+    EVENTS_MAX_STREAMS = int(os.environ.get('EVENTS_MAX_STREAMS', 8))
+    EVENTS_RETENTION_SECONDS = float(os.environ.get('EVENTS_RETENTION_SECONDS', 600))
+
+    # Live streaming sessions
+    STREAM_STEP_SECONDS = float(os.environ.get('STREAM_STEP_SECONDS', 1.0))
+    STREAM_BUFFER_SECONDS = float(os.environ.get('STREAM_BUFFER_SECONDS', 15))
+    STREAM_IDLE_SECONDS = float(os.environ.get('STREAM_IDLE_SECONDS', 60))
+    STREAM_MAX_SESSIONS = int(os.environ.get('STREAM_MAX_SESSIONS', 16))
+    STREAM_CHUNK_BYTES = int(os.environ.get('STREAM_CHUNK_BYTES', 32 * 1024))
+    # Web worker processes (as passed to gunicorn); sessions in the web tier need exactly one
+    WORKERS = int(os.environ.get('WORKERS', 4))
+
+    # Result cache settings
+    RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH')
+    RESULT_CACHE_MAX_MB = int(os.environ.get('RESULT_CACHE_MAX_MB', 1024))
+    RESULT_CACHE_RESCAN_SECONDS = float(os.environ.get('RESULT_CACHE_RESCAN_SECONDS', 300))
+
+    # Rendered exports (defaults to STORAGE_PATH/exports)
+    EXPORT_CACHE_PATH = os.environ.get('EXPORT_CACHE_PATH')
+
+    # Decoded-audio artifacts (defaults to STORAGE_PATH/decoded)
+    DECODED_AUDIO_ENABLED = os.environ.get('DECODED_AUDIO_ENABLED', 'true').lower() == 'true'
+    DECODED_AUDIO_PATH = os.environ.get('DECODED_AUDIO_PATH')
+
+    # Model host settings (unset runs inference in-process)
+    MODEL_HOST_ADDRESS = os.environ.get('MODEL_HOST_ADDRESS')
+    MODEL_HOST_AUTHKEY = os.environ.get('MODEL_HOST_AUTHKEY')
+    MODEL_HOST_TIMEOUT = float(os.environ.get('MODEL_HOST_TIMEOUT', 3600))
+    MODEL_HOST_MAX_INFLIGHT = int(os.environ.get('MODEL_HOST_MAX_INFLIGHT', 8))
     
     # Create upload folder if it doesn't exist
     if not os.path.exists(UPLOAD_FOLDER):
@@ -0,0 +1,5 @@
+from .user import User
+from .transcription import Transcription
+from .segment import Segment
+
+__all__ = ['User', 'Transcription', 'Segment']
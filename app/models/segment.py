@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app import db
+
+# Every Whisper vocabulary, timestamp tokens included, fits in 16 bits
+TOKEN_DTYPE = np.dtype('<u2')
+
+def pack_tokens(tokens: Optional[List[int]]) -> Optional[bytes]:
+    if not tokens:
+        return None
+    return np.asarray(tokens, dtype=TOKEN_DTYPE).tobytes()
+
+def unpack_tokens(data: Optional[bytes]) -> List[int]:
+    if not data:
+        return []
+    return np.frombuffer(data, dtype=TOKEN_DTYPE).tolist()
+
+def segment_values(transcription_id: str, seq: int, segment: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values of a segment row from a Whisper-style segment dict."""
+    return {
+        'transcription_id': transcription_id,
+        'seq': seq,
+        'start': segment.get('start'),
+        'end': segment.get('end'),
+        'text': segment.get('text') or '',
+        'avg_logprob': segment.get('avg_logprob'),
+        'no_speech_prob': segment.get('no_speech_prob'),
+        'tokens': pack_tokens(segment.get('tokens'))
+    }
+
+class Segment(db.Model):
+    __tablename__ = 'segments'
+    __table_args__ = (
+        db.Index('ix_segments_transcription_id_start', 'transcription_id', 'start'),
+    )
+
+    transcription_id = db.Column(db.String(36), db.ForeignKey('transcriptions.id', ondelete='CASCADE'),
+                                 primary_key=True)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start = db.Column(db.Float)
+    end = db.Column(db.Float)
+    text = db.Column(db.Text, nullable=False)
+    avg_logprob = db.Column(db.Float)
+    no_speech_prob = db.Column(db.Float)
+    tokens = db.Column(db.LargeBinary)
+
+    def to_dict(self, include_tokens: bool = False) -> Dict[str, Any]:
+        data = {
+            'id': self.seq,
+            'start': self.start,
+            'end': self.end,
+            'text': self.text,
+            'avg_logprob': self.avg_logprob,
+            'no_speech_prob': self.no_speech_prob
+        }
+        if include_tokens:
+            data['tokens'] = unpack_tokens(self.tokens)
+        return data
+
+    def __repr__(self):
+        return f'<Segment {self.transcription_id}#{self.seq}>'
@@ -0,0 +1,129 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import validates
+from app import db
+from app.models.segment import Segment, segment_values
+from app.services.search import index_transcription
+
+PREVIEW_LENGTH = 200
+
+def make_preview(text: Optional[str]) -> Optional[str]:
+    """Short single-line excerpt stored alongside the full text for listings."""
+    if text is None:
+        return None
+    return ' '.join(text.split())[:PREVIEW_LENGTH]
+
+class Transcription(db.Model):
+    __tablename__ = 'transcriptions'
+    __table_args__ = (
+        db.Index('ix_transcriptions_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_transcriptions_status_created_at', 'status', 'created_at'),
+        db.Index('ix_transcriptions_created_at_id', 'created_at', 'id'),
+        db.Index('ix_transcriptions_batch_id', 'batch_id'),
+        db.Index('ix_transcriptions_status_schedule_at', 'status', 'schedule_at'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    file_name = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(255), nullable=False)
+    content_hash = db.Column(db.String(64))
+    text = db.Column(db.Text)
+    preview = db.Column(db.String(PREVIEW_LENGTH))
+    status = db.Column(db.String(20), default='pending')
+    error_message = db.Column(db.Text)
+    processing_time = db.Column(db.Float)
+    device = db.Column(db.String(20))
+    language = db.Column(db.String(10))
+    model_name = db.Column(db.String(32))
+    use_gpu = db.Column(db.Boolean, default=True, nullable=False)
+    # Requested CPU precision (fp32, bf16 or int8); unset uses CPU_PRECISION
+    precision = db.Column(db.String(8))
+    # Scheduling: priority class, probed duration and virtual start time (see app.services.scheduler)
+    priority = db.Column(db.String(16))
+    audio_seconds = db.Column(db.Float)
+    schedule_at = db.Column(db.DateTime)
+    # When the job was last queued; updated_at also changes on unrelated writes
+    queued_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
+    # Set on every item submitted together as a playlist or URL list
+    batch_id = db.Column(db.String(36))
+    # Incremented whenever a result is stored; keys cached exports
+    revision = db.Column(db.Integer, default=0, nullable=False)
+
+    # Job queue bookkeeping
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    worker_id = db.Column(db.String(64))
+    claimed_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+
+    # One row per segment; loaded only when a caller reads them
+    segment_rows = db.relationship('Segment', order_by=Segment.seq, cascade='all, delete-orphan',
+                                   passive_deletes=True)
+
+    STATUSES = ('downloading', 'pending', 'processing', 'completed', 'failed')
+
+    @validates('text')
+    def _update_preview(self, key: str, text: Optional[str]) -> Optional[str]:
+        self.preview = make_preview(text)
+        return text
+
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        return [segment.to_dict() for segment in self.segment_rows]
+
+    def save(self) -> None:
+        db.session.add(self)
+        db.session.commit()
+
+    def update_result(self, text: str, device: str, processing_time: float,
+                      segments: Optional[List[Dict[str, Any]]] = None, language: str = 'en') -> None:
+        """Store a finished transcription and mark it completed."""
+        self.text = text
+        self.device = device
+        self.processing_time = processing_time
+        self.segment_rows = [Segment(**segment_values(self.id, seq, segment))
+                             for seq, segment in enumerate(segments or [])]
+        self.language = language
+        self.status = 'completed'
+        self.error_message = None
+        self.revision = (self.revision or 0) + 1
+        # Keep the full-text index in step with the result, in the same transaction;
+        # the flush assigns the id and writes the row the index refers to
+        db.session.add(self)
+        db.session.flush()
+        index_transcription(self.id, self.text, segments)
+        db.session.commit()
+
+    def mark_error(self, message: str) -> None:
+        """Mark the transcription as failed."""
+        self.status = 'failed'
+        self.error_message = message
+        self.save()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'file_name': self.file_name,
+            'file_path': self.file_path,
+            'text': self.text,
+            'segments': self.segments,
+            'status': self.status,
+            'error_message': self.error_message,
+            'processing_time': self.processing_time,
+            'device': self.device,
+            'model': self.model_name,
+            'precision': self.precision,
+            'priority': self.priority,
+            'duration': self.audio_seconds,
+            'language': self.language,
+            'user_id': self.user_id,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<Transcription {self.id} {self.status}>'
@@ -1,9 +1,8 @@
-from flask import request, jsonify, render_template, redirect, url_for, flash
-from werkzeug.utils import secure_filename
-import os
+from flask import request, jsonify, render_template
 from app.routes import bp
-from app.config import Config
 from app.models.transcription import Transcription
+from app.services.ingest import UploadRejected, commit_upload
+from app.services.jobs import enqueue
 from app.models.user import User
 from flask_login import login_required, current_user
 from app import db
@@ -26,42 +25,37 @@ def youtube():
 @bp.route('/history')
 @login_required
 def history():
-    try:
-        transcriptions = Transcription.query.filter_by(user_id=current_user.id).all()
-        return render_template('history.html', transcriptions=transcriptions)
-    except Exception as e:
-        flash(f'Error loading history: {str(e)}', 'error')
-        return redirect(url_for('main.index'))
+    # The page fetches the user's transcriptions a page at a time from the API
+    return render_template('history.html')
 
 # API Routes
 @bp.route('/api/upload', methods=['POST'])
 @login_required
 def upload_file():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    
-    if file:
-        try:
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-            file.save(filepath)
-            
-            # Create transcription record
-            transcription = Transcription(
-                user_id=current_user.id,
-                filename=filename,
-                status='pending'
-            )
-            db.session.add(transcription)
-            db.session.commit()
-            
-            return jsonify({
-                'message': 'File uploaded successfully',
-                'transcription_id': transcription.id
-            }), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+        
+        ingested = commit_upload(file)
+        
+        # Create transcription record
+        transcription = enqueue(Transcription(
+            user_id=current_user.id,
+            priority='interactive',
+            file_name=ingested.filename,
+            file_path=ingested.path,
+            content_hash=ingested.sha256
+        ))
+        
+        return jsonify({
+            'message': 'File uploaded successfully',
+            'transcription_id': transcription.id
+        }), 200
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
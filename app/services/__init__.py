@@ -0,0 +1 @@
+"""Background services shared by the web tier and the inference workers."""
@@ -0,0 +1,132 @@
+"""Decoded-audio artifacts shared by every pass over the same upload.
+
+``whisper.load_audio`` runs an ffmpeg subprocess over the whole file on every
+call, so a retry, a second model or a re-run over the same upload would decode
+it again. Instead the first pass writes the 16 kHz mono float32 waveform to
+``DECODED_AUDIO_PATH/<content hash>.npy`` and every pass opens that file with
+``numpy.load(mmap_mode='c')``: windows are slices of the mapping, pages are
+read on demand and shared with every process mapping the same artifact.
+
+Artifacts are reference counted by the transcriptions that may still need
+them. A reference is an empty file named after the transcription in
+``<content hash>.refs/``; releasing the last one removes that directory and
+the artifact. ``os.rmdir`` only succeeds on an empty directory, which keeps a
+concurrent acquire and release consistent without a lock.
+"""
+import os
+import tempfile
+import threading
+from typing import Optional
+import numpy as np
+from flask import current_app
+from app.services import metrics
+
+ACQUIRE_RETRIES = 3
+
+class DecodedAudioStore:
+    """Content-addressed ``.npy`` waveforms with per-holder references."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f'{content_hash}.npy')
+
+    def _refs(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f'{content_hash}.refs')
+
+    def acquire(self, content_hash: str, holder: str) -> None:
+        """Record that ``holder`` needs the artifact until it releases it."""
+        refs = self._refs(content_hash)
+        for _ in range(ACQUIRE_RETRIES):
+            os.makedirs(refs, exist_ok=True)
+            try:
+                open(os.path.join(refs, holder), 'a').close()
+                return
+            except FileNotFoundError:
+                # The last holder released between makedirs and open; try again
+                continue
+        raise OSError(f"Could not reference decoded audio {content_hash}")
+
+    def release(self, content_hash: str, holder: str) -> bool:
+        """Drop a reference; returns True when it was the last and the artifact was removed."""
+        refs = self._refs(content_hash)
+        try:
+            os.remove(os.path.join(refs, holder))
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(refs)
+        except OSError:
+            return False
+        try:
+            os.remove(self.path(content_hash))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def references(self, content_hash: str) -> int:
+        try:
+            return len(os.listdir(self._refs(content_hash)))
+        except FileNotFoundError:
+            return 0
+
+    def load(self, audio_path: str, content_hash: str) -> np.ndarray:
+        """The waveform of an upload, decoding it with ffmpeg only if no artifact exists."""
+        path = self.path(content_hash)
+        hit = os.path.exists(path)
+        metrics.cache_lookup('decoded_audio', hit)
+        if not hit:
+            import whisper
+
+            audio = whisper.load_audio(audio_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, audio)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+            current_app.logger.info(f"Decoded {audio_path} to {path}")
+        # Copy-on-write so torch gets a writable array without copying the file up front
+        return np.load(path, mmap_mode='c')
+
+_store: Optional[DecodedAudioStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> Optional[DecodedAudioStore]:
+    """The decoded-audio store for this process, or None when it is disabled."""
+    global _store
+    if not current_app.config['DECODED_AUDIO_ENABLED']:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = DecodedAudioStore(
+                current_app.config.get('DECODED_AUDIO_PATH') or
+                os.path.join(current_app.config['STORAGE_PATH'], 'decoded')
+            )
+        return _store
+
+def load_audio(audio_path: str, content_hash: Optional[str] = None) -> np.ndarray:
+    """Decoded waveform of a file, through the store when there is a content hash to key it by."""
+    store = get_store()
+    if store is None or not content_hash:
+        import whisper
+
+        return whisper.load_audio(audio_path)
+    return store.load(audio_path, content_hash)
+
+def retain(content_hash: Optional[str], holder: str) -> None:
+    """Keep the artifact of an upload alive for a transcription that will be decoded."""
+    store = get_store()
+    if store is not None and content_hash:
+        store.acquire(content_hash, holder)
+
+def release(content_hash: Optional[str], holder: str) -> None:
+    """Drop a transcription's reference, removing the artifact once nothing needs it."""
+    store = get_store()
+    if store is not None and content_hash and store.release(content_hash, holder):
+        current_app.logger.info(f"Removed decoded audio {content_hash}")
@@ -0,0 +1,250 @@
+"""Cross-request batched decoding of 30-second windows.
+
+``model.transcribe`` decodes one window of one file at a time. When several
+jobs run against the same model (typically in the model host), the
+:class:`BatchScheduler` in front of that model collects the pending 30-second
+mel windows from all of them, pads them into one batch, runs the encoder and
+greedy decoder once for the whole batch and routes each window's tokens back
+to the job that submitted it.
+
+A batch is dispatched when it reaches ``BATCH_MAX_SIZE`` windows or when the
+oldest waiting window has waited ``BATCH_MAX_WAIT_MS``. Windows are cut at
+quiet points and decoded independently, so unlike ``model.transcribe`` the
+previous window's text is not used as a prompt. Windows whose greedy result
+looks degenerate are re-decoded alone with Whisper's temperature fallback.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from app.services.chunking import silence_boundaries
+from app.services.model_registry import ModelKey, ModelRegistry
+
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+SECONDS_PER_TIMESTAMP = 0.02
+
+FALLBACK_TEMPERATURES = (0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+class WindowRequest(NamedTuple):
+    mel: Any
+    options: Tuple[Optional[str], str]
+    future: Future
+
+def is_silent(result) -> bool:
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+def needs_fallback(result) -> bool:
+    """Whether a greedy result looks degenerate; silent windows are left alone, as in Whisper."""
+    if is_silent(result):
+        return False
+    return (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or
+            result.avg_logprob < LOGPROB_THRESHOLD)
+
+class BatchScheduler:
+    """Gathers windows from concurrent jobs and decodes them in batches."""
+
+    def __init__(self, registry: ModelRegistry, key: ModelKey, max_batch: int, max_wait: float, logger=None):
+        self.registry = registry
+        self.key = key
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.logger = logger
+        self.queue: 'Queue[WindowRequest]' = Queue()
+        self.held: List[WindowRequest] = []
+        self.batches = 0
+        self.windows = 0
+        self.thread = threading.Thread(target=self._run, name=f'batch-{key.name}-{key.device}', daemon=True)
+        self.thread.start()
+
+    def model(self):
+        return self.registry.get(*self.key).model
+
+    def submit(self, mel, language: Optional[str], task: str) -> Future:
+        future: Future = Future()
+        self.queue.put(WindowRequest(mel, (language, task), future))
+        return future
+
+    def _collect(self) -> List[WindowRequest]:
+        batch = self.held or [self.queue.get()]
+        self.held = []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except Empty:
+                break
+        # Windows with different decoding options wait for the next batch
+        options = batch[0].options
+        self.held = [item for item in batch if item.options != options]
+        return [item for item in batch if item.options == options]
+
+    def _decode(self, model, mels, options, temperature: float):
+        import torch
+        import whisper
+
+        language, task = options
+        decode_options = whisper.DecodingOptions(
+            language=language,
+            task=task,
+            temperature=temperature,
+            fp16=self.key.precision == 'fp16',
+            without_timestamps=False
+        )
+        return whisper.decode(model, torch.stack(mels).to(model.device), decode_options)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                with self.registry.use(*self.key) as loaded:
+                    results = self._decode(loaded.model, [item.mel for item in batch], batch[0].options, 0.0)
+                    for item, result in zip(batch, results):
+                        for temperature in FALLBACK_TEMPERATURES:
+                            if not needs_fallback(result):
+                                break
+                            result = self._decode(loaded.model, [item.mel], item.options, temperature)[0]
+                        item.future.set_result(result)
+                self.batches += 1
+                self.windows += len(batch)
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.error(f"Batched decode failed: {str(e)}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'model': self.key.name,
+            'device': self.key.device,
+            'batches': self.batches,
+            'windows': self.windows,
+            'mean_batch_size': self.windows / self.batches if self.batches else 0.0,
+            'waiting': self.queue.qsize() + len(self.held)
+        }
+
+def window_spans(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """Silence-aligned spans of at most 30 seconds covering the whole recording."""
+    boundaries = silence_boundaries(audio, 26, 2)
+    spans = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        # The final span can run past 30 seconds; split it into equal parts
+        parts = -(-(end - start) // WINDOW_SAMPLES)
+        cuts = np.linspace(start, end, parts + 1).astype(int)
+        spans.extend(zip(cuts[:-1].tolist(), cuts[1:].tolist()))
+    return spans
+
+def tokens_to_segments(tokenizer, result, offset: float, duration: float) -> List[Dict[str, Any]]:
+    """Split a window's timestamped tokens into segments on the global timeline."""
+    timestamp_begin = tokenizer.timestamp_begin
+    segments = []
+    start = None
+    text_tokens: List[int] = []
+
+    def emit(begin: float, end: float) -> None:
+        text = tokenizer.decode(text_tokens)
+        if text.strip():
+            segments.append({
+                'start': round(offset + begin, 3),
+                'end': round(offset + min(end, duration), 3),
+                'text': text,
+                'tokens': list(text_tokens),
+                'temperature': result.temperature,
+                'avg_logprob': result.avg_logprob,
+                'compression_ratio': result.compression_ratio,
+                'no_speech_prob': result.no_speech_prob
+            })
+
+    for token in result.tokens:
+        if token >= timestamp_begin:
+            timestamp = (token - timestamp_begin) * SECONDS_PER_TIMESTAMP
+            if start is not None and text_tokens:
+                emit(start, timestamp)
+                text_tokens = []
+                start = None
+            else:
+                start = timestamp
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        emit(start or 0.0, duration)
+    return segments
+
+class _WindowDecoder:
+    """Submits windows of one recording and turns their results into timeline segments."""
+
+    def __init__(self, scheduler: BatchScheduler, language: Optional[str], task: str):
+        from whisper.tokenizer import get_tokenizer
+
+        self.scheduler = scheduler
+        self.language = language
+        self.task = task
+        self.model = scheduler.model()
+        self.tokenizer = get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages,
+                                       language=language, task=task)
+        self.segments: List[Dict[str, Any]] = []
+
+    def submit(self, audio: np.ndarray) -> Future:
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels)
+        return self.scheduler.submit(mel, self.language, self.task)
+
+    def collect(self, future: Future, start: int, end: int) -> List[Dict[str, Any]]:
+        result = future.result()
+        window_segments = []
+        if not is_silent(result):
+            window_segments = tokens_to_segments(self.tokenizer, result, start / SAMPLE_RATE,
+                                                 (end - start) / SAMPLE_RATE)
+        for segment in window_segments:
+            segment['id'] = len(self.segments)
+            self.segments.append(segment)
+        return window_segments
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'text': ''.join(segment['text'] for segment in self.segments),
+            'segments': self.segments,
+            'language': self.language or 'en'
+        }
+
+def transcribe_batched(scheduler: BatchScheduler, audio: np.ndarray, language: Optional[str] = 'en',
+                       task: str = 'transcribe',
+                       on_window: Optional[Callable[[List[Dict[str, Any]], int, int], None]] = None) -> Dict[str, Any]:
+    """Transcribe a recording by submitting all of its windows to a batch scheduler.
+
+    ``on_window`` is called in timeline order with each window's segments and
+    the number of windows done out of the total.
+    """
+    decoder = _WindowDecoder(scheduler, language, task)
+    spans = window_spans(audio)
+    futures = [decoder.submit(audio[start:end]) for start, end in spans]
+    for done, ((start, end), future) in enumerate(zip(spans, futures), start=1):
+        window_segments = decoder.collect(future, start, end)
+        if on_window is not None:
+            on_window(window_segments, done, len(spans))
+    return decoder.result()
+
+_schedulers: Dict[ModelKey, BatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(registry: ModelRegistry, key: ModelKey, max_batch: int, max_wait: float,
+                  logger=None) -> BatchScheduler:
+    """The batch scheduler for a model key in this process."""
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = BatchScheduler(registry, key, max_batch, max_wait, logger)
+        return _schedulers[key]
+
+def scheduler_stats() -> List[Dict[str, Any]]:
+    with _schedulers_lock:
+        return [scheduler.stats() for scheduler in _schedulers.values()]
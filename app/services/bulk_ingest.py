@@ -0,0 +1,203 @@
+"""Bulk ingestion of many recordings from one request.
+
+A multipart body is decoded incrementally with Werkzeug's sans-IO decoder
+instead of the regular form parser. Every file part is streamed into a
+:class:`~app.services.ingest.HashingFileWriter` (same hashing, type sniffing
+and per-file size limit as single uploads), which is closed as soon as the part
+ends, so a request carrying thousands of files keeps at most one upload file
+open.
+
+Archives (zip, tar and compressed tar), sent either as the whole request body
+or as a file part, are extracted member by member into writers in the same
+way. Tar archives are read as a stream. A zip file's index is at its end, so a
+zip is spooled to a temporary file in ``UPLOAD_FOLDER`` first and deleted once
+its members are extracted.
+
+Files that are rejected (not audio, empty or too large) are reported and skipped
+without failing the rest of the request. The bytes written for all files,
+extracted archive members included, are capped as a whole, so a small
+archive that expands to far more data than was sent is refused as it is
+extracted.
+"""
+import os
+import posixpath
+import tarfile
+import tempfile
+import zipfile
+from typing import IO, Dict, Iterator, List, Optional
+from flask import current_app
+from werkzeug.sansio.multipart import Epilogue, Field, File, MultipartDecoder, NeedData
+from app.services.ingest import CHUNK_SIZE, IngestedFile, UploadRejected, discard, new_writer
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVE_MIME_TYPES = {
+    'application/zip': '.zip',
+    'application/x-zip-compressed': '.zip',
+    'application/x-tar': '.tar',
+    'application/gzip': '.tar.gz',
+    'application/x-gzip': '.tar.gz',
+    'application/x-bzip2': '.tar.bz2',
+    'application/x-xz': '.tar.xz',
+}
+
+# Form fields are option values, never content
+MAX_FIELD_BYTES = 4096
+
+def archive_suffix(filename: Optional[str], mime_type: Optional[str] = None) -> Optional[str]:
+    """The archive type of a file by name, then by content type; None for anything else."""
+    name = (filename or '').lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return suffix
+    return ARCHIVE_MIME_TYPES.get(mime_type or '')
+
+def is_hidden(path: str) -> bool:
+    """Archive entries such as ``.DS_Store`` and ``__MACOSX/`` resource forks."""
+    return any(part.startswith('.') or part == '__MACOSX' for part in path.split('/') if part)
+
+class ChunkReader:
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.chunks = chunks
+        self.buffer = b''
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+def iter_parts(stream: IO[bytes], boundary: bytes) -> Iterator[tuple]:
+    """Yield ``(event, chunks)`` for every part of a multipart body.
+
+    ``chunks`` iterates over the part's data and must be consumed (or
+    abandoned) before the next part is requested.
+    """
+    decoder = MultipartDecoder(boundary)
+
+    def events():
+        finished = False
+        while True:
+            try:
+                event = decoder.next_event()
+            except ValueError:
+                # Raised by the decoder once the body has ended in the middle of a part
+                raise UploadRejected('Incomplete multipart body')
+            if isinstance(event, NeedData):
+                if finished:
+                    raise UploadRejected('Incomplete multipart body')
+                chunk = stream.read(CHUNK_SIZE)
+                finished = not chunk
+                decoder.receive_data(chunk or None)
+                continue
+            if isinstance(event, Epilogue):
+                return
+            yield event
+
+    def data(source):
+        for event in source:
+            yield event.data
+            if not event.more_data:
+                return
+
+    source = events()
+    for event in source:
+        # Anything else is data left over from a part the consumer abandoned
+        if isinstance(event, (Field, File)):
+            yield event, data(source)
+
+class BulkIngest:
+    """Files, rejections and form fields received by one bulk request."""
+
+    def __init__(self, max_files: int, max_bytes: int):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        # Bytes written for every file so far, including files that were rejected
+        self.received = 0
+        self.files: List[IngestedFile] = []
+        self.rejected: List[Dict[str, str]] = []
+        self.fields: Dict[str, str] = {}
+
+    def _check_count(self) -> None:
+        if len(self.files) >= self.max_files:
+            raise UploadRejected(f'A bulk upload can hold at most {self.max_files} files', 413)
+
+    def add_file(self, stream: IO[bytes], filename: str) -> None:
+        """Stream one recording into the upload folder, recording it as rejected if refused."""
+        self._check_count()
+        writer = new_writer(filename)
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                self.received += len(chunk)
+                if self.received > self.max_bytes:
+                    raise UploadRejected(f'Bulk upload exceeds the {self.max_bytes // 2**20} MB limit '
+                                         'once extracted', 413)
+                writer.write(chunk)
+            self.files.append(writer.commit())
+        except UploadRejected as e:
+            if self.received > self.max_bytes:
+                raise
+            self.rejected.append({'filename': filename, 'error': str(e)})
+        finally:
+            writer.close()
+
+    def add_archive(self, stream: IO[bytes], filename: str, suffix: str) -> None:
+        """Extract every regular file of a zip or tar archive as a recording."""
+        if suffix == '.zip':
+            self._add_zip(stream, filename)
+            return
+        try:
+            with tarfile.open(fileobj=stream, mode='r|*') as archive:
+                for member in archive:
+                    if member.isfile() and not is_hidden(member.name):
+                        self.add_file(archive.extractfile(member), posixpath.basename(member.name))
+        except tarfile.TarError as e:
+            self.rejected.append({'filename': filename, 'error': f'Unreadable archive: {str(e)}'})
+
+    def _add_zip(self, stream: IO[bytes], filename: str) -> None:
+        spool = tempfile.NamedTemporaryFile(dir=current_app.config['UPLOAD_FOLDER'], suffix='.zip', delete=False)
+        try:
+            with spool:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    spool.write(chunk)
+            with zipfile.ZipFile(spool.name) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and not is_hidden(info.filename):
+                        with archive.open(info) as member:
+                            self.add_file(member, posixpath.basename(info.filename))
+        except zipfile.BadZipFile as e:
+            self.rejected.append({'filename': filename, 'error': f'Unreadable archive: {str(e)}'})
+        finally:
+            os.remove(spool.name)
+
+    def add_multipart(self, stream: IO[bytes], boundary: bytes) -> None:
+        """Ingest every file part of a multipart body and keep its form fields."""
+        for event, chunks in iter_parts(stream, boundary):
+            if isinstance(event, Field):
+                value = b''
+                for chunk in chunks:
+                    value += chunk
+                    if len(value) > MAX_FIELD_BYTES:
+                        raise UploadRejected(f"Form field '{event.name}' is too long")
+                self.fields[event.name] = value.decode('utf-8', 'replace')
+                continue
+            if not event.filename:
+                continue
+            reader = ChunkReader(chunks)
+            suffix = archive_suffix(event.filename, event.headers.get('Content-Type'))
+            if suffix is not None:
+                self.add_archive(reader, event.filename, suffix)
+            else:
+                self.add_file(reader, event.filename)
+
+    def discard(self) -> None:
+        for ingested in self.files:
+            discard(ingested)
+        self.files = []
@@ -0,0 +1,172 @@
+"""Parallel transcription of long recordings on CPU.
+
+A single Whisper decode is sequential, so on CPU-only nodes a long recording
+only uses the cores PyTorch's intra-op threads happen to keep busy. For long
+audio the decoded waveform is instead split into windows whose boundaries are
+moved to the quietest point near each cut, each window is padded with a little
+overlap for context, and the windows are transcribed in parallel by a
+``ProcessPoolExecutor`` whose processes each get a fixed thread quota.
+
+Every window owns the "core" span between its two boundaries. When the
+results are merged onto the global timeline a segment is kept only if its
+midpoint falls inside the core of the window that produced it, which removes
+the duplicates decoded twice in the overlaps.
+
+Pools are only started in the model host, and are held through the model
+registry so their model copies count against its memory budget.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+
+class Window(NamedTuple):
+    index: int
+    start: int  # first sample handed to Whisper
+    end: int
+    core_start: int  # samples this window is responsible for
+    core_end: int
+
+def frame_energy(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames."""
+    usable = len(audio) // frame * frame
+    frames = audio[:usable].reshape(-1, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+def silence_boundaries(audio: np.ndarray, window_seconds: float, search_seconds: float,
+                       sample_rate: int = SAMPLE_RATE) -> List[int]:
+    """Cut points roughly every ``window_seconds``, moved to the quietest nearby frame."""
+    frame = int(FRAME_SECONDS * sample_rate)
+    energy = frame_energy(audio, frame)
+    step = int(window_seconds * sample_rate)
+    search = int(search_seconds * sample_rate) // frame
+
+    boundaries = [0]
+    target = step
+    while target < len(audio) - step // 4:
+        center = target // frame
+        lo = max(center - search, boundaries[-1] // frame + 1)
+        hi = min(center + search, len(energy) - 1)
+        if hi > lo:
+            cut = (lo + int(np.argmin(energy[lo:hi]))) * frame + frame // 2
+        else:
+            cut = target
+        boundaries.append(cut)
+        target = cut + step
+    boundaries.append(len(audio))
+    return boundaries
+
+def plan_windows(audio: np.ndarray, window_seconds: float, overlap_seconds: float,
+                 sample_rate: int = SAMPLE_RATE) -> List[Window]:
+    boundaries = silence_boundaries(audio, window_seconds, window_seconds / 10, sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    return [
+        Window(i, max(core_start - overlap, 0), min(core_end + overlap, len(audio)), core_start, core_end)
+        for i, (core_start, core_end) in enumerate(zip(boundaries, boundaries[1:]))
+    ]
+
+def merge_segments(windows: List[Window], results: List[List[Dict[str, Any]]],
+                   sample_rate: int = SAMPLE_RATE) -> List[Dict[str, Any]]:
+    """Place window-relative segments on the global timeline and drop overlap duplicates."""
+    merged = []
+    for window, segments in zip(windows, results):
+        offset = window.start / sample_rate
+        core_start = window.core_start / sample_rate
+        core_end = window.core_end / sample_rate
+        for segment in segments:
+            start = segment['start'] + offset
+            end = segment['end'] + offset
+            if not core_start <= (start + end) / 2 < core_end:
+                continue
+            if merged and segment['text'].strip() == merged[-1]['text'].strip() and start < merged[-1]['end']:
+                continue
+            merged.append(dict(segment, start=round(start, 3), end=round(end, 3)))
+    for i, segment in enumerate(merged):
+        segment['id'] = i
+    return merged
+
+# Per-process state for pool workers
+_worker_model = None
+
+def _init_worker(checkpoint: str, threads: int, precision: str = 'fp32') -> None:
+    import torch
+    from app.services.quantization import load_checkpoint
+
+    global _worker_model
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _worker_model = load_checkpoint(checkpoint, 'cpu', precision)
+
+def _transcribe_window(window: Window, audio, options: Dict[str, Any]) -> Tuple[int, List[Dict[str, Any]], str]:
+    if isinstance(audio, str):
+        # A decoded-audio artifact: map it here instead of receiving the samples pickled
+        audio = np.load(audio, mmap_mode='c')[window.start:window.end]
+    result = _worker_model.transcribe(audio, verbose=None, fp16=False, **options)
+    segments = [{key: value for key, value in segment.items() if key != 'seek'}
+                for segment in result.get('segments', [])]
+    return window.index, segments, result.get('language', options.get('language') or 'en')
+
+class ChunkedTranscriber:
+    """Process pool with one CPU copy of a model per process, reused across jobs."""
+
+    def __init__(self, checkpoint: str, processes: int, threads_per_process: int, precision: str = 'fp32'):
+        self.checkpoint = checkpoint
+        self.precision = precision
+        self.processes = processes
+        self.threads_per_process = threads_per_process
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(checkpoint, threads_per_process, precision)
+        )
+
+    def transcribe(self, audio: np.ndarray, options: Dict[str, Any], window_seconds: float,
+                   overlap_seconds: float,
+                   on_window: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        windows = plan_windows(audio, window_seconds, overlap_seconds)
+        mapped = getattr(audio, 'filename', None)
+        futures = [self.executor.submit(_transcribe_window, w, mapped or audio[w.start:w.end], options)
+                   for w in windows]
+
+        results: List[List[Dict[str, Any]]] = [[] for _ in windows]
+        languages = []
+        for done, future in enumerate(futures, start=1):
+            index, segments, language = future.result()
+            results[index] = segments
+            languages.append(language)
+            if on_window is not None:
+                on_window(done, len(windows))
+
+        segments = merge_segments(windows, results)
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': max(set(languages), key=languages.count) if languages else 'en',
+            'windows': len(windows)
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+def pool_shape(processes: int = 0, threads: int = 0) -> Tuple[int, int]:
+    """Split the available cores into worker processes with a thread quota each."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    processes = processes or max(1, cores // 4)
+    threads = threads or max(1, cores // processes)
+    return processes, threads
+
+@contextmanager
+def use_transcriber(registry, name: str, checkpoint: str, processes: int = 0, threads: int = 0,
+                    precision: str = 'fp32') -> Iterator[ChunkedTranscriber]:
+    """Hold the shared pool of a model and precision; models stay loaded in the workers between jobs."""
+    processes, threads = pool_shape(processes, threads)
+    with registry.use_pool(name, precision, processes,
+                           lambda: ChunkedTranscriber(checkpoint, processes, threads, precision)) as entry:
+        yield entry.pool
@@ -0,0 +1,285 @@
+"""Bulk YouTube ingestion: playlist expansion and a bounded download pool.
+
+Playlists, channels and URL lists are expanded with yt-dlp's flat extraction
+(one request per playlist, no per-video lookups) and every video becomes its
+own ``Transcription`` with status ``downloading`` and a shared ``batch_id``.
+
+The downloader (``flask downloader``) claims those rows with the same
+conditional UPDATE as the inference queue and fetches the original audio
+stream with a thread pool of ``YOUTUBE_DOWNLOAD_CONCURRENCY`` threads. A
+finished download is handed to the inference queue as a pending job, so the
+number of downloads in flight never depends on, or takes from, inference
+capacity.
+"""
+import os
+import signal
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from flask import current_app
+from sqlalchemy import func, update
+from app import db
+from app.models.transcription import Transcription
+from app.services import events
+from app.services.jobs import enqueue
+from app.services.result_cache import file_digest, get_cache, make_key, youtube_video_id
+
+DOWNLOAD_STATUS = 'downloading'
+MAX_PLAYLIST_DEPTH = 2
+# Queued videos keep their URL in file_path until they are downloaded
+MAX_URL_LENGTH = Transcription.file_path.type.length
+
+class BulkIngestError(Exception):
+    """Raised when submitted URLs cannot be expanded into videos."""
+
+class VideoEntry(NamedTuple):
+    url: str
+    title: str
+    video_id: Optional[str]
+
+def _entry_url(entry: Dict[str, Any]) -> Optional[str]:
+    url = entry.get('webpage_url') or entry.get('url')
+    if url and not url.startswith('http') and entry.get('ie_key') == 'Youtube':
+        url = f'https://www.youtube.com/watch?v={url}'
+    return url
+
+def _flatten(ydl, info: Dict[str, Any], depth: int, limit: int, found: List[VideoEntry]) -> None:
+    if info.get('_type') not in ('playlist', 'multi_video'):
+        url = _entry_url(info)
+        if url and len(url) <= MAX_URL_LENGTH:
+            found.append(VideoEntry(url, info.get('title') or url, info.get('id')))
+        return
+    for entry in info.get('entries') or []:
+        if len(found) >= limit:
+            return
+        if entry is None:
+            # Unavailable videos are listed as None; keep going past them
+            continue
+        if entry.get('_type') in ('playlist', 'multi_video'):
+            _flatten(ydl, entry, depth, limit, found)
+        elif entry.get('_type') == 'url' and entry.get('ie_key') not in (None, 'Youtube'):
+            # Channel tabs and nested playlists are further flat lookups
+            if depth < MAX_PLAYLIST_DEPTH:
+                _flatten(ydl, ydl.extract_info(entry['url'], download=False), depth + 1, limit, found)
+        else:
+            _flatten(ydl, dict(entry, _type='video'), depth, limit, found)
+
+def expand_urls(urls: List[str], limit: int) -> List[VideoEntry]:
+    """Individual videos behind a list of video, playlist and channel URLs, without duplicates."""
+    import yt_dlp
+
+    options = {'extract_flat': 'in_playlist', 'quiet': True, 'no_warnings': True, 'skip_download': True}
+    found: List[VideoEntry] = []
+    with yt_dlp.YoutubeDL(options) as ydl:
+        for url in urls:
+            if len(found) >= limit:
+                break
+            try:
+                _flatten(ydl, ydl.extract_info(url, download=False), 0, limit, found)
+            except Exception as e:
+                raise BulkIngestError(f"Failed to resolve {url}: {str(e)}")
+
+    unique: Dict[str, VideoEntry] = {}
+    for entry in found:
+        unique.setdefault(entry.video_id or entry.url, entry)
+    return list(unique.values())
+
+def create_batch(entries: List[VideoEntry], model_name: str, use_gpu: bool, user_id: Optional[str] = None,
+                 cached=None) -> str:
+    """Queue one transcription per video, owned by ``user_id``, under a new batch id.
+
+    ``cached`` is called with an entry and returns a stored result or None;
+    videos already in the result cache are completed without downloading.
+    """
+    batch_id = str(uuid.uuid4())
+    for entry in entries:
+        transcription = Transcription(
+            file_name=entry.title[:255],
+            file_path=entry.url,
+            model_name=model_name,
+            use_gpu=use_gpu,
+            user_id=user_id,
+            batch_id=batch_id,
+            priority='bulk',
+            status=DOWNLOAD_STATUS
+        )
+        result = cached(entry) if cached is not None else None
+        if result is not None:
+            transcription.update_result(
+                text=result['text'],
+                device=result['device'],
+                processing_time=0,
+                segments=result['segments'],
+                language=result['language']
+            )
+        else:
+            db.session.add(transcription)
+    db.session.commit()
+    for transcription in Transcription.query.filter_by(batch_id=batch_id, status=DOWNLOAD_STATUS):
+        events.emit(transcription.id, 'status', {'status': DOWNLOAD_STATUS})
+    return batch_id
+
+def batch_progress(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Per-status counts and items of a batch, or None for an unknown batch id."""
+    counts = dict(db.session.query(Transcription.status, func.count(Transcription.id))
+                  .filter(Transcription.batch_id == batch_id)
+                  .group_by(Transcription.status).all())
+    total = sum(counts.values())
+    if not total:
+        return None
+    items = (db.session.query(Transcription.id, Transcription.file_name, Transcription.status,
+                              Transcription.error_message)
+             .filter(Transcription.batch_id == batch_id)
+             .order_by(Transcription.created_at, Transcription.id))
+    done = counts.get('completed', 0) + counts.get('failed', 0)
+    return {
+        'batch_id': batch_id,
+        'total': total,
+        'counts': {status: counts.get(status, 0) for status in Transcription.STATUSES},
+        'percent': round(100 * done / total, 1),
+        'finished': done == total,
+        'items': [{
+            'id': item.id,
+            'title': item.file_name,
+            'status': item.status,
+            'error': item.error_message
+        } for item in items]
+    }
+
+def claim_downloads(worker_id: str, count: int) -> List[str]:
+    """Atomically claim up to ``count`` videos waiting to be downloaded."""
+    candidates = [row.id for row in db.session.query(Transcription.id)
+                  .filter(Transcription.status == DOWNLOAD_STATUS, Transcription.worker_id.is_(None))
+                  .order_by(Transcription.created_at)
+                  .limit(count * 2)]
+    claimed = []
+    for transcription_id in candidates:
+        if len(claimed) >= count:
+            break
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(Transcription)
+            .where(Transcription.id == transcription_id, Transcription.status == DOWNLOAD_STATUS,
+                   Transcription.worker_id.is_(None))
+            .values(worker_id=worker_id, claimed_at=now, heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            claimed.append(transcription_id)
+    return claimed
+
+def refresh_claims(transcription_ids: List[str], worker_id: str) -> None:
+    if not transcription_ids:
+        return
+    db.session.execute(
+        update(Transcription)
+        .where(Transcription.id.in_(transcription_ids), Transcription.worker_id == worker_id,
+               Transcription.status == DOWNLOAD_STATUS)
+        .values(heartbeat_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def release_stale_downloads(lease_seconds: int) -> int:
+    """Let other downloaders retry videos whose downloader stopped responding."""
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    released = db.session.execute(
+        update(Transcription)
+        .where(Transcription.status == DOWNLOAD_STATUS, Transcription.worker_id.isnot(None),
+               Transcription.heartbeat_at < cutoff)
+        .values(worker_id=None, claimed_at=None, heartbeat_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return released
+
+def download_audio(url: str, directory: str) -> Tuple[str, Optional[str]]:
+    """Download a video's best audio stream as is, without transcoding it; returns its path and title."""
+    import yt_dlp
+
+    name = uuid.uuid4().hex
+    options = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(directory, f'{name}.%(ext)s'),
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True
+    }
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info), info.get('title')
+
+def alias_video(transcription: Transcription, url: str) -> None:
+    """Point the video's result cache key at the downloaded file's, so the video is served from the cache."""
+    from app.api.transcription import result_options
+
+    cache = get_cache()
+    video_id = youtube_video_id(url)
+    if cache is None or video_id is None:
+        return
+    options = result_options(transcription.precision)
+    cache.alias(make_key(f"youtube:{video_id}", transcription.model_name, options),
+                make_key(f"file:{transcription.content_hash}", transcription.model_name, options))
+
+def download_one(app, transcription_id: str) -> None:
+    """Download one claimed video and queue it for inference."""
+    with app.app_context():
+        transcription = db.session.get(Transcription, transcription_id)
+        url = transcription.file_path
+        try:
+            path, title = download_audio(url, app.config['UPLOAD_FOLDER'])
+        except Exception as e:
+            app.logger.error(f"Error downloading {url}: {str(e)}")
+            db.session.rollback()
+            transcription.mark_error(f"Failed to download {url}: {str(e)}")
+            events.emit(transcription.id, **events.result_event(transcription))
+            return
+        transcription.file_path = path
+        transcription.content_hash = file_digest(path)
+        if title and transcription.file_name == url:
+            transcription.file_name = title[:255]
+        enqueue(transcription)
+        alias_video(transcription, url)
+        app.logger.info(f"Downloaded {url} for transcription {transcription.id}")
+
+def run_downloader(worker_id: str, concurrency: int, poll_interval: float, drain: bool = False) -> None:
+    """Download claimed videos on a bounded thread pool until stopped with SIGINT/SIGTERM.
+
+    With ``drain`` the downloader exits once nothing is left to download.
+    """
+    app = current_app._get_current_object()
+    lease = app.config['JOB_LEASE_SECONDS']
+    stopping = threading.Event()
+    inflight: Dict[str, Any] = {}
+    last_refresh = datetime.utcnow()
+
+    def _stop(signum, frame):
+        app.logger.info(f"Downloader {worker_id} stopping after the current downloads")
+        stopping.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+    app.logger.info(f"Downloader {worker_id} started with {concurrency} slots")
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='download') as pool:
+        while not stopping.is_set():
+            for transcription_id, future in list(inflight.items()):
+                if future.done():
+                    del inflight[transcription_id]
+            if (datetime.utcnow() - last_refresh).total_seconds() >= lease / 3:
+                refresh_claims(list(inflight), worker_id)
+                last_refresh = datetime.utcnow()
+            release_stale_downloads(lease)
+
+            free = concurrency - len(inflight)
+            claimed = claim_downloads(worker_id, free) if free else []
+            for transcription_id in claimed:
+                inflight[transcription_id] = pool.submit(download_one, app, transcription_id)
+            if drain and not inflight:
+                break
+            stopping.wait(poll_interval if not claimed else 0.1)
+    app.logger.info(f"Downloader {worker_id} stopped")
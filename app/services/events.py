@@ -0,0 +1,339 @@
+"""Progress and partial-segment events for running transcriptions.
+
+Whichever process runs a job (a queue worker or the model host) appends one
+JSON line per event to ``STORAGE_PATH/events/<transcription id>.jsonl``:
+
+* ``status`` when the job is queued or starts processing,
+* ``progress`` with the percentage of audio decoded so far,
+* ``segment`` for every segment as soon as it has been decoded,
+* ``complete`` or ``error`` once the result has been written to the database.
+
+The log is append-only, so the web tier can serve it as Server-Sent Events by
+tailing the file, and the line number doubles as the SSE event id that clients
+send back in ``Last-Event-ID`` to resume after a reconnect. Queue workers
+remove the logs of finished or deleted transcriptions once they have not been
+written to for ``EVENTS_RETENTION_SECONDS``.
+"""
+import functools
+import importlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from flask import current_app
+
+TERMINAL_EVENTS = ('complete', 'error')
+
+class EventLog:
+    """Append-only JSON-lines event log of one transcription."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_transcription(cls, transcription_id: str) -> 'EventLog':
+        return cls(os.path.join(current_app.config['STORAGE_PATH'], 'events', f'{transcription_id}.jsonl'))
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        line = json.dumps({'event': event, 'data': data}, separators=(',', ':')) + '\n'
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def remove(self) -> None:
+        with self.lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def reset(self) -> None:
+        """Start a fresh log, e.g. when a job is queued again."""
+        self.remove()
+
+    def read(self, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Complete lines written after a byte offset, and the offset to continue from."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read()
+        except OSError:
+            return [], offset
+        # A line still being written has no newline yet; pick it up next time
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        events = [json.loads(line) for line in complete.splitlines() if line.strip()]
+        return events, offset + len(complete)
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    message = f"event: {event}\ndata: {json.dumps(data)}\n"
+    if event_id is not None:
+        message = f"id: {event_id}\n{message}"
+    return message + '\n'
+
+def stream_events(log: EventLog, last_event_id: int, poll_interval: float, keepalive: float,
+                  finished: Callable[[], Optional[Dict[str, Any]]]) -> Iterator[str]:
+    """Tail an event log as SSE messages until the job completes or fails.
+
+    ``finished`` is checked whenever the stream has been idle for ``keepalive``
+    seconds and returns a terminal event for jobs that ended without writing
+    one, such as jobs failed by the stale-lease sweep.
+    """
+    offset = 0
+    event_id = 0
+    last_sent = time.monotonic()
+    while True:
+        events, offset = log.read(offset)
+        for event in events:
+            event_id += 1
+            if event_id <= last_event_id:
+                continue
+            yield format_sse(event['event'], event['data'], event_id)
+            last_sent = time.monotonic()
+            if event['event'] in TERMINAL_EVENTS:
+                return
+
+        if time.monotonic() - last_sent >= keepalive:
+            terminal = finished()
+            if terminal is not None:
+                yield format_sse(terminal['event'], terminal['data'], event_id + 1)
+                return
+            yield ': keepalive\n\n'
+            last_sent = time.monotonic()
+        time.sleep(poll_interval)
+
+class ProgressReporter:
+    """Turns pipeline callbacks into ``progress`` and ``segment`` events."""
+
+    def __init__(self, log: EventLog):
+        self.log = log
+        self.percent = -1
+        self.segments_sent = 0
+
+    def progress(self, done: float, total: float) -> None:
+        percent = int(100 * done / total) if total else 100
+        if percent > self.percent:
+            self.percent = percent
+            self.log.emit('progress', {'percent': min(percent, 100)})
+
+    def segments(self, segments: List[Dict[str, Any]]) -> None:
+        for segment in segments:
+            if not segment.get('text', '').strip():
+                continue
+            self.log.emit('segment', {
+                'id': self.segments_sent,
+                'start': segment['start'],
+                'end': segment['end'],
+                'text': segment['text']
+            })
+            self.segments_sent += 1
+
+# Whisper's transcribe() reports progress only through a tqdm bar, and has no
+# callback for segments. Two hooks are installed once, and both only act on
+# threads that registered a ProgressReporter:
+#
+# * the tqdm module it uses is replaced with a proxy that hands those threads
+#   a reporting bar (and everyone else a normal one);
+# * ``Whisper.decode`` is wrapped so the bar sees every window's decode result.
+#
+# transcribe() decodes a window (again, with the same mel, at each fallback
+# temperature) and then advances the bar past it, so the last result decoded
+# before an update is the window it kept. A window skipped as silence is
+# never followed by an update; the bar notices when the next window arrives.
+_local = threading.local()
+_install_lock = threading.Lock()
+
+class _ReportingBar:
+    def __init__(self, reporter: ProgressReporter, total: int):
+        self.reporter = reporter
+        self.total = total
+        self.done = 0
+        # (mel, model, result, options) of the window being decoded
+        self.window: Optional[Tuple[Any, Any, Any, Any]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _window_frames(self) -> int:
+        from whisper.audio import N_FRAMES
+
+        return max(min(N_FRAMES, self.total - self.done), 0)
+
+    def _tokenizer(self, model, result, options):
+        from whisper.tokenizer import get_tokenizer
+
+        return get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                             language=result.language or getattr(options, 'language', None),
+                             task=getattr(options, 'task', None) or 'transcribe')
+
+    def _window_segments(self) -> List[Dict[str, Any]]:
+        from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+        from app.services.batching import tokens_to_segments
+
+        mel, model, result, options = self.window
+        return tokens_to_segments(self._tokenizer(model, result, options), result,
+                                  self.done * HOP_LENGTH / SAMPLE_RATE,
+                                  self._window_frames() * HOP_LENGTH / SAMPLE_RATE)
+
+    def decoded(self, mel, model, result, options) -> None:
+        if self.window is not None and self.window[0] is not mel:
+            # The previous window was skipped as silence
+            self.done += self._window_frames()
+        self.window = (mel, model, result, options)
+
+    def update(self, n: int = 1) -> None:
+        if self.window is not None:
+            self.reporter.segments(self._window_segments())
+            self.window = None
+        self.done += n
+        self.reporter.progress(self.done, self.total)
+
+def _reporting_decode(decode):
+    @functools.wraps(decode)
+    def wrapper(model, mel, *args, **kwargs):
+        result = decode(model, mel, *args, **kwargs)
+        bar = getattr(_local, 'bar', None)
+        # transcribe() decodes one window at a time; batched decodes return a list
+        if bar is not None and not isinstance(result, list):
+            bar.decoded(mel, model, result, args[0] if args else kwargs.get('options'))
+        return result
+
+    wrapper.reports_progress = True
+    return wrapper
+
+class _TqdmProxy:
+    def __init__(self, module):
+        self.module = module
+
+    def tqdm(self, *args, **kwargs):
+        reporter = getattr(_local, 'reporter', None)
+        if reporter is None:
+            return self.module.tqdm(*args, **kwargs)
+        _local.bar = _ReportingBar(reporter, kwargs.get('total') or 0)
+        return _local.bar
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+class whisper_progress:
+    """Context manager routing whisper.transcribe progress on this thread to a reporter."""
+
+    def __init__(self, reporter: Optional[ProgressReporter]):
+        self.reporter = reporter
+
+    def __enter__(self):
+        if self.reporter is not None:
+            transcribe_module = importlib.import_module('whisper.transcribe')
+            model_module = importlib.import_module('whisper.model')
+            with _install_lock:
+                if not isinstance(transcribe_module.tqdm, _TqdmProxy):
+                    transcribe_module.tqdm = _TqdmProxy(transcribe_module.tqdm)
+                if not getattr(model_module.Whisper.decode, 'reports_progress', False):
+                    model_module.Whisper.decode = _reporting_decode(model_module.Whisper.decode)
+            _local.reporter = self.reporter
+        return self.reporter
+
+    def __exit__(self, *exc):
+        _local.reporter = None
+        _local.bar = None
+        return False
+
+def reporter_for(transcription_id: Optional[str]) -> Optional[ProgressReporter]:
+    """A reporter writing to a transcription's event log, or None without an id."""
+    if not transcription_id:
+        return None
+    return ProgressReporter(EventLog.for_transcription(transcription_id))
+
+def emit(transcription_id: str, event: str, data: Dict[str, Any]) -> None:
+    """Append an event to a transcription's log, logging rather than raising on failure."""
+    try:
+        EventLog.for_transcription(transcription_id).emit(event, data)
+    except OSError as e:
+        current_app.logger.warning(f"Could not write event for {transcription_id}: {str(e)}")
+
+def prune_logs(retention: float) -> int:
+    """Remove logs of finished or deleted transcriptions not written to for ``retention`` seconds."""
+    from app import db
+    from app.models.transcription import Transcription
+
+    directory = os.path.join(current_app.config['STORAGE_PATH'], 'events')
+    cutoff = time.time() - retention
+    old: Dict[str, str] = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith('.jsonl') and entry.stat().st_mtime < cutoff:
+                        old[entry.name[:-len('.jsonl')]] = entry.path
+                except OSError:
+                    continue
+    except OSError:
+        return 0
+
+    ids = list(old)
+    for start in range(0, len(ids), 500):
+        running = (db.session.query(Transcription.id)
+                   .filter(Transcription.id.in_(ids[start:start + 500]),
+                           Transcription.status.notin_(('completed', 'failed'))))
+        for (transcription_id,) in running:
+            old.pop(transcription_id, None)
+    db.session.rollback()
+    removed = 0
+    for path in old.values():
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+class StreamLimit:
+    """Caps the event streams one web process keeps open at the same time."""
+
+    def __init__(self, limit: int):
+        self.semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self) -> bool:
+        return self.semaphore.acquire(blocking=False)
+
+    def release(self) -> None:
+        self.semaphore.release()
+
+_stream_limit: Optional[StreamLimit] = None
+_stream_limit_lock = threading.Lock()
+
+def stream_limit() -> StreamLimit:
+    global _stream_limit
+    with _stream_limit_lock:
+        if _stream_limit is None:
+            _stream_limit = StreamLimit(current_app.config['EVENTS_MAX_STREAMS'])
+        return _stream_limit
+
+def replay_events(transcription) -> List[Dict[str, Any]]:
+    """Events equivalent to the log of a transcription that finished without one."""
+    segments = [segment for segment in transcription.segments or [] if segment.get('text', '').strip()]
+    return [{'event': 'segment', 'data': {
+        'id': i,
+        'start': segment['start'],
+        'end': segment['end'],
+        'text': segment['text']
+    }} for i, segment in enumerate(segments)] + [result_event(transcription)]
+
+def result_event(transcription) -> Dict[str, Any]:
+    """Terminal event describing a finished or failed transcription row."""
+    if transcription.status == 'failed':
+        return {'event': 'error', 'data': {'id': transcription.id, 'error': transcription.error_message}}
+    return {'event': 'complete', 'data': {
+        'id': transcription.id,
+        'status': transcription.status,
+        'text': transcription.text,
+        'processing_time': transcription.processing_time,
+        'device': transcription.device,
+        'model': transcription.model_name,
+        'language': transcription.language
+    }}
@@ -0,0 +1,166 @@
+"""Rendered downloads of finished transcriptions.
+
+A transcription can be exported as DOCX (one timestamped paragraph per
+segment), SRT, WebVTT, plain text or JSON. Renders are written once to
+``EXPORT_CACHE_PATH/<id>/<revision>-v<EXPORT_VERSION>.<format>`` and served from
+there, so a repeated download is a file read. ``Transcription.revision`` grows
+whenever a result is stored, which leaves older renders unreachable; they are
+removed the next time that transcription is rendered.
+"""
+import json
+import os
+import tempfile
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, TextIO
+from flask import current_app
+from sqlalchemy.orm import load_only
+from app import db
+from app.services import metrics
+from app.models.segment import Segment
+from app.models.transcription import Transcription
+
+# Bump when a renderer's output changes so cached files are rendered again
+EXPORT_VERSION = 1
+SEGMENT_BATCH_SIZE = 500
+
+class ExportFormat(NamedTuple):
+    mimetype: str
+    timed: bool
+
+FORMATS: Dict[str, ExportFormat] = {
+    'docx': ExportFormat('application/vnd.openxmlformats-officedocument.wordprocessingml.document', False),
+    'srt': ExportFormat('application/x-subrip', True),
+    'vtt': ExportFormat('text/vtt', True),
+    'txt': ExportFormat('text/plain', False),
+    'json': ExportFormat('application/json', False)
+}
+
+class ExportError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def timestamp(seconds: Optional[float], separator: str = '.') -> str:
+    """``HH:MM:SS.mmm`` (SRT uses a comma before the milliseconds)."""
+    millis = int(round((seconds or 0) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f'{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}'
+
+def iter_segments(transcription: Transcription) -> Iterator[Segment]:
+    """Stored segments in order, fetched in batches and without their tokens."""
+    return (Segment.query
+            .filter(Segment.transcription_id == transcription.id)
+            .options(load_only(Segment.seq, Segment.start, Segment.end, Segment.text))
+            .order_by(Segment.seq)
+            .yield_per(SEGMENT_BATCH_SIZE))
+
+def write_srt(transcription: Transcription, f: TextIO) -> None:
+    for number, segment in enumerate(iter_segments(transcription), start=1):
+        f.write(f'{number}\n{timestamp(segment.start, ",")} --> {timestamp(segment.end, ",")}\n'
+                f'{segment.text.strip()}\n\n')
+
+def write_vtt(transcription: Transcription, f: TextIO) -> None:
+    f.write('WEBVTT\n\n')
+    for segment in iter_segments(transcription):
+        f.write(f'{timestamp(segment.start)} --> {timestamp(segment.end)}\n{segment.text.strip()}\n\n')
+
+def write_txt(transcription: Transcription, f: TextIO) -> None:
+    f.write((transcription.text or '').strip() + '\n')
+
+def write_json(transcription: Transcription, f: TextIO) -> None:
+    header = {
+        'id': transcription.id,
+        'filename': transcription.file_name,
+        'language': transcription.language,
+        'model': transcription.model_name,
+        'text': transcription.text
+    }
+    # Write segment by segment so long transcripts are never held as one document
+    f.write(json.dumps(header)[:-1] + ', "segments": [')
+    for i, segment in enumerate(iter_segments(transcription)):
+        f.write((', ' if i else '') + json.dumps({
+            'id': segment.seq,
+            'start': segment.start,
+            'end': segment.end,
+            'text': segment.text
+        }))
+    f.write(']}\n')
+
+def write_docx(transcription: Transcription, path: str) -> None:
+    import docx
+    from docx.shared import Pt, RGBColor
+
+    document = docx.Document()
+    document.add_heading(transcription.file_name, level=1)
+    timed = False
+    for segment in iter_segments(transcription):
+        timed = True
+        paragraph = document.add_paragraph()
+        stamp = paragraph.add_run(f'[{timestamp(segment.start)[:8]}] ')
+        stamp.font.size = Pt(10)
+        stamp.font.color.rgb = RGBColor(0x66, 0x66, 0x66)
+        paragraph.add_run(segment.text.strip()).font.size = Pt(12)
+    if not timed:
+        document.add_paragraph().add_run(transcription.text or '').font.size = Pt(12)
+    document.save(path)
+
+TEXT_WRITERS: Dict[str, Callable[[Transcription, TextIO], None]] = {
+    'srt': write_srt,
+    'vtt': write_vtt,
+    'txt': write_txt,
+    'json': write_json
+}
+
+def export_root() -> str:
+    return current_app.config.get('EXPORT_CACHE_PATH') or \
+        os.path.join(current_app.config['STORAGE_PATH'], 'exports')
+
+def export_name(transcription: Transcription, fmt: str) -> str:
+    return f'{transcription.revision}-v{EXPORT_VERSION}.{fmt}'
+
+def render(transcription: Transcription, fmt: str, path: str) -> None:
+    """Render an export to a file; text formats are written as they are generated."""
+    if fmt == 'docx':
+        write_docx(transcription, path)
+        return
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        TEXT_WRITERS[fmt](transcription, f)
+
+def export_path(transcription: Transcription, fmt: str) -> str:
+    """Path of the cached export of a transcription, rendering it on a miss."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+    if transcription.status != 'completed':
+        raise ExportError('Transcription is not completed', 409)
+
+    directory = os.path.join(export_root(), transcription.id)
+    path = os.path.join(directory, export_name(transcription, fmt))
+    hit = os.path.exists(path)
+    metrics.cache_lookup('export', hit)
+    if hit:
+        return path
+    if FORMATS[fmt].timed and not db.session.query(
+            Segment.query.filter(Segment.transcription_id == transcription.id).exists()).scalar():
+        raise ExportError('Transcription has no timed segments', 409)
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        render(transcription, fmt, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    current_app.logger.info(f"Rendered {fmt} export of {transcription.id} (revision {transcription.revision})")
+
+    # Renders of earlier revisions can no longer be requested
+    prefix = f'{transcription.revision}-v{EXPORT_VERSION}.'
+    for entry in os.scandir(directory):
+        if not entry.name.startswith(prefix) and not entry.name.endswith('.tmp'):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    return path
@@ -0,0 +1,308 @@
+"""CPU thread governor and admission control for inference.
+
+The host's cores are split into ``INFERENCE_SLOTS`` slots of
+``INFERENCE_THREADS_PER_SLOT`` torch threads each (by default four cores per
+slot, like the long-audio pool). A CPU transcription holds a slot while it
+decodes and runs with that many intra-op threads, so concurrent decodes in
+different processes never ask for more threads than there are cores. Queue
+workers only claim a job when a slot is free; requests that would decode
+inline are refused with 429 instead of waiting, and so are new jobs once the
+estimated queue wait exceeds ``INFERENCE_MAX_QUEUE_SECONDS``.
+
+Slots are ``flock`` locks on files in ``INFERENCE_SLOTS_PATH`` (default
+``STORAGE_PATH/slots``), shared by every process of one host: gunicorn
+workers, queue workers and the model host. The kernel drops a lock when its
+process exits, so a crashed worker never leaks a slot. Each slot file also
+records when it was taken and how long its previous holder kept it; wait
+estimates for ``Retry-After`` are derived from those.
+
+Checking which slots are busy only reads those records, so it never competes
+with processes taking a slot. Holders touch their slot files every few
+seconds, and a record left behind by a crashed holder stops counting once it
+has not been touched for ``stale_seconds``. The long-audio pool holds one slot
+per worker process.
+"""
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from flask import current_app
+
+class Saturated(Exception):
+    """Raised when no inference slot is free; ``retry_after`` is in seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Slot(NamedTuple):
+    index: int
+    file: Any
+    acquired_at: float
+    last_seconds: Optional[float] = None  # how long the previous holder kept it
+
+class InferenceGovernor:
+    """Host-wide inference slots backed by file locks."""
+
+    def __init__(self, path: str, slots: int, threads_per_slot: int, interop_threads: int = 1,
+                 default_seconds: float = 60, poll_interval: float = 0.1, stale_seconds: float = 30):
+        self.path = path
+        self.slots = slots
+        self.threads_per_slot = threads_per_slot
+        self.interop_threads = interop_threads
+        self.default_seconds = default_seconds
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self._threads_lock = threading.Lock()
+        self._interop_set = False
+        self._held: Dict[int, Slot] = {}
+        self._held_lock = threading.Lock()
+        self._toucher: Optional[threading.Thread] = None
+        os.makedirs(path, exist_ok=True)
+
+    def _slot_path(self, index: int) -> str:
+        return os.path.join(self.path, f'slot-{index}')
+
+    def _read(self, index: int) -> Dict[str, Any]:
+        try:
+            with open(self._slot_path(index)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Never used, or being rewritten by its holder right now
+            return {}
+
+    @staticmethod
+    def _write(file, state: Dict[str, Any]) -> None:
+        file.seek(0)
+        file.truncate()
+        file.write(json.dumps(state))
+        file.flush()
+
+    def try_acquire(self) -> Optional[Slot]:
+        """Take a free slot without waiting."""
+        for index in range(self.slots):
+            file = open(self._slot_path(index), 'a+')
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                file.close()
+                continue
+            now = time.time()
+            previous = self._read(index).get('last_seconds')
+            self._write(file, {'pid': os.getpid(), 'started': now, 'last_seconds': previous})
+            slot = Slot(index, file, now, previous)
+            self._track(slot)
+            return slot
+        return None
+
+    def try_acquire_many(self, count: int) -> Optional[List[Slot]]:
+        """Take ``count`` free slots without waiting, or none at all."""
+        held: List[Slot] = []
+        for _ in range(min(count, self.slots)):
+            slot = self.try_acquire()
+            if slot is None:
+                for taken in held:
+                    self.release(taken, record=False)
+                return None
+            held.append(slot)
+        return held
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[Slot]:
+        """Take a slot, waiting up to ``timeout`` seconds (forever with None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def release(self, slot: Slot, record: bool = True) -> None:
+        """Free a slot; ``record`` off keeps the previous hold time out of wait estimates."""
+        with self._held_lock:
+            self._held.pop(slot.index, None)
+        last_seconds = time.time() - slot.acquired_at if record else slot.last_seconds
+        try:
+            self._write(slot.file, {'pid': None, 'started': None, 'last_seconds': last_seconds})
+        except OSError:
+            pass
+        finally:
+            fcntl.flock(slot.file, fcntl.LOCK_UN)
+            slot.file.close()
+
+    def _track(self, slot: Slot) -> None:
+        with self._held_lock:
+            self._held[slot.index] = slot
+            if self._toucher is None:
+                self._toucher = threading.Thread(target=self._touch_held, daemon=True)
+                self._toucher.start()
+
+    def _touch_held(self) -> None:
+        while True:
+            time.sleep(self.stale_seconds / 3)
+            with self._held_lock:
+                held = list(self._held)
+            for index in held:
+                try:
+                    os.utime(self._slot_path(index))
+                except OSError:
+                    pass
+
+    def configure_threads(self) -> None:
+        """Limit torch in this process to one slot's worth of threads."""
+        import torch
+
+        torch.set_num_threads(self.threads_per_slot)
+        with self._threads_lock:
+            if not self._interop_set:
+                self._interop_set = True
+                try:
+                    torch.set_num_interop_threads(self.interop_threads)
+                except RuntimeError:
+                    # Only possible before torch has run any parallel work in this process
+                    pass
+
+    @contextmanager
+    def slot(self, wait: bool = True) -> Iterator[Slot]:
+        """Hold a slot for one decode; raises ``Saturated`` when ``wait`` is off and none is free."""
+        held = self.acquire() if wait else self.try_acquire()
+        if held is None:
+            raise Saturated('All inference slots are busy', self.retry_after())
+        self.configure_threads()
+        try:
+            yield held
+        finally:
+            self.release(held)
+
+    @contextmanager
+    def hold(self, count: int) -> Iterator[List[Slot]]:
+        """Hold up to ``count`` slots at once for work that runs its own threads, e.g. a process pool."""
+        while True:
+            held = self.try_acquire_many(count)
+            if held is not None:
+                break
+            time.sleep(self.poll_interval)
+        try:
+            yield held
+        finally:
+            for slot in held:
+                self.release(slot)
+
+    def busy(self) -> List[int]:
+        """Indexes of the slots recorded as held by a live holder."""
+        held = []
+        cutoff = time.time() - self.stale_seconds
+        for index in range(self.slots):
+            try:
+                touched = os.path.getmtime(self._slot_path(index))
+            except OSError:
+                continue
+            if self._read(index).get('pid') is not None and touched >= cutoff:
+                held.append(index)
+        return held
+
+    def average_seconds(self) -> float:
+        """Mean time the slots' last holders kept them."""
+        durations = [s['last_seconds'] for s in map(self._read, range(self.slots)) if s.get('last_seconds')]
+        return sum(durations) / len(durations) if durations else self.default_seconds
+
+    def estimated_wait(self, queued: int = 0) -> float:
+        """Seconds until a job with ``queued`` jobs ahead of it would get a slot."""
+        average = self.average_seconds()
+        now = time.time()
+        # When each slot is expected to free up; free slots are available now
+        free_at = []
+        busy = set(self.busy())
+        for index in range(self.slots):
+            if index not in busy:
+                free_at.append(0.0)
+                continue
+            started = self._read(index).get('started')
+            # A holder whose start time cannot be read is assumed to be halfway through
+            free_at.append(max(started + average - now, 0) if started else average / 2)
+        free_at.sort()
+        rounds, position = divmod(queued, self.slots)
+        return free_at[position] + rounds * average
+
+    def retry_after(self, queued: int = 0) -> int:
+        return max(1, math.ceil(self.estimated_wait(queued)))
+
+    def stats(self) -> Dict[str, Any]:
+        busy = self.busy()
+        return {
+            'slots': self.slots,
+            'threads_per_slot': self.threads_per_slot,
+            'busy': len(busy),
+            'average_seconds': round(self.average_seconds(), 2)
+        }
+
+_governor: Optional[InferenceGovernor] = None
+_governor_lock = threading.Lock()
+
+def get_governor() -> Optional[InferenceGovernor]:
+    """The governor for this process from the app config, or None when disabled."""
+    from app.services.chunking import pool_shape
+
+    global _governor
+    if not current_app.config['INFERENCE_GOVERNOR_ENABLED']:
+        return None
+    with _governor_lock:
+        if _governor is None:
+            slots, threads = pool_shape(current_app.config['INFERENCE_SLOTS'],
+                                        current_app.config['INFERENCE_THREADS_PER_SLOT'])
+            _governor = InferenceGovernor(
+                current_app.config['INFERENCE_SLOTS_PATH'] or
+                os.path.join(current_app.config['STORAGE_PATH'], 'slots'),
+                slots,
+                threads,
+                interop_threads=current_app.config['INFERENCE_INTEROP_THREADS']
+            )
+        return _governor
+
+@contextmanager
+def inference_slot(device: str, wait: bool = True) -> Iterator[Optional[Slot]]:
+    """Hold a slot around a CPU decode; GPU decodes and a disabled governor pass straight through."""
+    governor = get_governor() if device == 'cpu' else None
+    if governor is None:
+        yield None
+        return
+    with governor.slot(wait) as slot:
+        yield slot
+
+@contextmanager
+def inference_slots(device: str, count: int) -> Iterator[List[Slot]]:
+    """Hold ``count`` slots (at most all of them) around a CPU process pool's work."""
+    governor = get_governor() if device == 'cpu' else None
+    if governor is None:
+        yield []
+        return
+    with governor.hold(count) as held:
+        yield held
+
+def admit_inline() -> None:
+    """Refuse a request that would decode inline while every slot is busy."""
+    from app.services import metrics
+
+    governor = get_governor()
+    if governor is not None and len(governor.busy()) >= governor.slots:
+        metrics.ADMISSION_REJECTIONS.labels('saturated').inc()
+        raise Saturated('All inference slots are busy', governor.retry_after())
+
+def admit_queued() -> None:
+    """Refuse a new job whose estimated queue wait exceeds ``INFERENCE_MAX_QUEUE_SECONDS`` (0 never refuses)."""
+    from app.services import metrics
+    from app.services.repository import count_by_status
+
+    governor = get_governor()
+    limit = current_app.config['INFERENCE_MAX_QUEUE_SECONDS']
+    if governor is None or not limit:
+        return
+    queued = count_by_status()['pending']
+    if governor.estimated_wait(queued) > limit:
+        metrics.ADMISSION_REJECTIONS.labels('queue').inc()
+        raise Saturated('The transcription queue is full', governor.retry_after(queued))
@@ -0,0 +1,194 @@
+"""Streaming ingestion of uploaded audio.
+
+Uploads are written straight to their final, uniquely named file in
+``UPLOAD_FOLDER`` in fixed-size chunks while the SHA-256 and byte count are
+computed on the fly. The first bytes are checked with ``python-magic`` and the
+size limit is enforced as data arrives, so oversized or non-audio uploads are
+rejected before the rest of the body is read and nothing needs to be read a
+second time just to hash it.
+
+Multipart uploads go through :class:`StreamingRequest`, which makes Werkzeug's
+form parser write file parts into a :class:`HashingFileWriter` instead of its
+own spooled temporary file. Raw request bodies are handled by
+:func:`ingest_stream`, and bulk uploads by :mod:`app.services.bulk_ingest`.
+"""
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import IO, NamedTuple, Optional
+from flask import Request, current_app
+from werkzeug.utils import secure_filename
+from app.services import metrics
+
+CHUNK_SIZE = 64 * 1024
+MAGIC_SNIFF_BYTES = 2048
+
+ALLOWED_MIME_PREFIXES = ('audio/', 'video/')
+ALLOWED_MIME_TYPES = {'application/ogg'}
+
+class UploadRejected(Exception):
+    """Raised when an upload is refused while it is being received."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+class IngestedFile(NamedTuple):
+    path: str
+    filename: str
+    sha256: str
+    size: int
+    mime_type: Optional[str]
+
+def unique_upload_path(upload_folder: str, filename: Optional[str]) -> str:
+    suffix = Path(secure_filename(filename or '')).suffix.lower()
+    return os.path.join(upload_folder, f"{uuid.uuid4().hex}{suffix}")
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    import magic
+
+    try:
+        return magic.from_buffer(head, mime=True)
+    except Exception as e:
+        current_app.logger.warning(f"Could not detect upload type: {str(e)}")
+        return None
+
+def check_mime_type(mime_type: Optional[str]) -> None:
+    if mime_type is None:
+        return
+    if mime_type.startswith(ALLOWED_MIME_PREFIXES) or mime_type in ALLOWED_MIME_TYPES:
+        return
+    raise UploadRejected(f'Unsupported file content: {mime_type}', 415)
+
+class HashingFileWriter:
+    """Writable upload target that hashes, counts and validates as it writes.
+
+    The file is removed on close unless :meth:`commit` was called, so uploads
+    abandoned by a failed request do not accumulate in the upload folder.
+    """
+
+    def __init__(self, path: str, filename: Optional[str], max_bytes: int):
+        self.path = path
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.mime_type = None
+        self.committed = False
+        self._head = b''
+        self._sniffed = False
+        self._file: IO[bytes] = open(path, 'w+b')
+
+    def _sniff(self) -> None:
+        self._sniffed = True
+        self.mime_type = sniff_mime_type(self._head)
+        self._head = b''
+        check_mime_type(self.mime_type)
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadRejected(f'File exceeds the {self.max_bytes // 2**20} MB upload limit', 413)
+        if not self._sniffed:
+            self._head += data[:MAGIC_SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= MAGIC_SNIFF_BYTES:
+                self._sniff()
+        self.digest.update(data)
+        return self._file.write(data)
+
+    def finish(self) -> IngestedFile:
+        """Validate short files, flush to disk and describe the stored upload."""
+        if not self._sniffed:
+            self._sniff()
+        if self.size == 0:
+            raise UploadRejected('Uploaded file is empty')
+        self._file.flush()
+        return IngestedFile(self.path, secure_filename(self.filename or '') or os.path.basename(self.path),
+                            self.digest.hexdigest(), self.size, self.mime_type)
+
+    def commit(self) -> IngestedFile:
+        ingested = self.finish()
+        self.committed = True
+        metrics.UPLOAD_BYTES.observe(ingested.size)
+        return ingested
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if not self.committed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def __getattr__(self, name):
+        # read/readline/seek/tell are used by Werkzeug once a part is complete
+        return getattr(self._file, name)
+
+def new_writer(filename: Optional[str]) -> HashingFileWriter:
+    return HashingFileWriter(
+        unique_upload_path(current_app.config['UPLOAD_FOLDER'], filename),
+        filename,
+        current_app.config['UPLOAD_MAX_BYTES']
+    )
+
+class StreamingRequest(Request):
+    """Request class whose multipart file parts stream into HashingFileWriters."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        writer = new_writer(filename)
+        self.__dict__.setdefault('_upload_writers', []).append(writer)
+        return writer
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        # Bulk uploads carry many files, each still held to UPLOAD_MAX_MB
+        if self.endpoint == 'transcription_api.bulk_upload':
+            return current_app.config['BULK_UPLOAD_MAX_BYTES']
+        return super().max_content_length
+
+    def close(self) -> None:
+        super().close()
+        # Parts abandoned by a rejected or interrupted parse never reach request.files
+        for writer in self.__dict__.get('_upload_writers', ()):
+            writer.close()
+
+def commit_upload(file) -> IngestedFile:
+    """Keep a multipart upload received through StreamingRequest."""
+    stream = file.stream
+    if not isinstance(stream, HashingFileWriter):
+        # Uploads parsed outside StreamingRequest still end up hashed and unique
+        writer = new_writer(file.filename)
+        try:
+            stream.seek(0)
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                writer.write(chunk)
+            ingested = writer.commit()
+        finally:
+            writer.close()
+        return ingested
+    stream.filename = file.filename
+    return stream.commit()
+
+def ingest_stream(stream: IO[bytes], filename: Optional[str]) -> IngestedFile:
+    """Write a raw request body to a unique upload file in fixed chunks."""
+    writer = new_writer(filename)
+    try:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            writer.write(chunk)
+        ingested = writer.commit()
+    finally:
+        writer.close()
+    return ingested
+
+def discard(ingested: IngestedFile) -> None:
+    try:
+        os.remove(ingested.path)
+    except OSError:
+        pass
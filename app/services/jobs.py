@@ -0,0 +1,250 @@
+"""Database-backed transcription job queue.
+
+Pending rows in the ``transcriptions`` table are the queue. Inference workers
+claim a row with a conditional UPDATE (``status = 'pending'``), so any number
+of worker processes can poll the same database without double-processing a
+job. A running job refreshes ``heartbeat_at``; rows whose heartbeat is older
+than the lease are handed back to the queue or failed after too many attempts.
+"""
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional
+from flask import current_app
+from sqlalchemy import select, update
+from app import db
+from app.models.transcription import Transcription
+from app.services import audio_store, events, metrics, scheduler
+from app.services.governor import get_governor
+
+# Seconds between sweeps for event logs of finished jobs
+PRUNE_INTERVAL = 60
+
+def make_worker_id(index: int = 0) -> str:
+    """Build a worker identifier that is unique across hosts and processes."""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"[:64]
+
+def enqueue(transcription: Transcription) -> Transcription:
+    """Persist a transcription as a pending job."""
+    scheduler.schedule(transcription)
+    transcription.status = 'pending'
+    transcription.attempts = 0
+    transcription.error_message = None
+    transcription.worker_id = None
+    transcription.claimed_at = None
+    transcription.heartbeat_at = None
+    transcription.save()
+    # Every queued pass over the same upload shares one decoded artifact
+    audio_store.retain(transcription.content_hash, transcription.id)
+    events.EventLog.for_transcription(transcription.id).reset()
+    events.emit(transcription.id, 'status', {'status': 'pending'})
+    return transcription
+
+def enqueue_many(transcriptions: List[Transcription]) -> List[str]:
+    """Persist new transcriptions as pending jobs in one batched insert and commit; returns their ids."""
+    scheduler.schedule_many(transcriptions)
+    for transcription in transcriptions:
+        # Known up front so nothing has to be reloaded row by row after the commit
+        transcription.id = transcription.id or str(uuid.uuid4())
+        transcription.status = 'pending'
+        transcription.attempts = 0
+    held = [(transcription.id, transcription.content_hash) for transcription in transcriptions]
+    db.session.add_all(transcriptions)
+    db.session.commit()
+    for transcription_id, content_hash in held:
+        audio_store.retain(content_hash, transcription_id)
+    return [transcription_id for transcription_id, _ in held]
+
+def queue_depth() -> int:
+    """Number of jobs waiting to be claimed."""
+    return Transcription.query.filter_by(status='pending').count()
+
+def claim_next(worker_id: str, batch: int = 5) -> Optional[Transcription]:
+    """Atomically claim the next pending job in scheduler order, or return None if the queue is empty."""
+    for job in scheduler.next_jobs()[:batch]:
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(Transcription)
+            .where(Transcription.id == job.id, Transcription.status == 'pending')
+            .values(status='processing', worker_id=worker_id, claimed_at=now,
+                    heartbeat_at=now, attempts=Transcription.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            if job.queued_at is not None:
+                metrics.QUEUE_WAIT_SECONDS.labels(job.priority or 'normal').observe(
+                    max((now - job.queued_at).total_seconds(), 0))
+            return db.session.get(Transcription, job.id)
+    return None
+
+def heartbeat(transcription_id: str, worker_id: str) -> None:
+    """Extend the lease on a job this worker is still processing."""
+    db.session.execute(
+        update(Transcription)
+        .where(Transcription.id == transcription_id, Transcription.worker_id == worker_id,
+               Transcription.status == 'processing')
+        .values(heartbeat_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+def discard_upload(transcription_id: str, content_hash: Optional[str], file_path: str) -> None:
+    """Drop a finished job's hold on its decoded audio and delete its upload."""
+    audio_store.release(content_hash, transcription_id)
+    try:
+        os.remove(file_path)
+    except OSError as e:
+        current_app.logger.warning(f"Error cleaning up uploaded file: {str(e)}")
+
+def requeue_stale(lease_seconds: int, max_attempts: int) -> int:
+    """Return jobs with an expired lease to the queue; fail those out of attempts."""
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    stale = (Transcription.status == 'processing') & (Transcription.heartbeat_at < cutoff)
+    exhausted = db.session.execute(
+        select(Transcription.id, Transcription.content_hash, Transcription.file_path)
+        .where(stale, Transcription.attempts >= max_attempts)
+    ).all()
+    failed = 0
+    for job_id, content_hash, file_path in exhausted:
+        # Only rows still stale when updated are failed; a late heartbeat keeps its job
+        if db.session.execute(
+            update(Transcription)
+            .where(Transcription.id == job_id, stale)
+            .values(status='failed', worker_id=None,
+                    error_message='Worker stopped responding while processing this job')
+            .execution_options(synchronize_session=False)
+        ).rowcount:
+            db.session.commit()
+            discard_upload(job_id, content_hash, file_path)
+            failed += 1
+    requeued = db.session.execute(
+        update(Transcription)
+        .where(stale, Transcription.attempts < max_attempts)
+        .values(status='pending', worker_id=None, claimed_at=None, heartbeat_at=None,
+                queued_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if failed or requeued:
+        current_app.logger.warning(f"Recovered stale jobs: {requeued} requeued, {failed} failed")
+    return requeued
+
+class _Heartbeat(threading.Thread):
+    """Refresh a job's lease from a side thread while inference blocks the worker."""
+
+    def __init__(self, app, transcription_id: str, worker_id: str, interval: float):
+        super().__init__(daemon=True)
+        self.app = app
+        self.transcription_id = transcription_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        with self.app.app_context():
+            while not self.stopped.wait(self.interval):
+                try:
+                    heartbeat(self.transcription_id, self.worker_id)
+                except Exception as e:
+                    self.app.logger.warning(f"Heartbeat failed for {self.transcription_id}: {str(e)}")
+                    db.session.rollback()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+@contextmanager
+def leased(transcription_id: str, worker_id: str):
+    """Keep the lease on a job alive while the block runs."""
+    app = current_app._get_current_object()
+    beat = _Heartbeat(app, transcription_id, worker_id, interval=max(app.config['JOB_LEASE_SECONDS'] / 3, 1))
+    beat.start()
+    try:
+        yield
+    finally:
+        beat.stop()
+
+def run_job(transcription: Transcription) -> None:
+    """Transcribe a claimed job and write the outcome back to its row."""
+    from app.api.transcription import transcribe_audio
+
+    events.emit(transcription.id, 'status', {'status': 'processing'})
+    try:
+        if transcription.audio_seconds is None:
+            # Claimed before it was probed; fair share counts the real duration
+            transcription.audio_seconds = scheduler.estimate_duration(transcription.file_path)
+            db.session.commit()
+        result = transcribe_audio(transcription.file_path, transcription.model_name,
+                                  transcription.use_gpu, transcription.content_hash, transcription.id,
+                                  transcription.precision)
+        if 'error' in result:
+            transcription.mark_error(result['error'])
+        else:
+            transcription.update_result(
+                text=result['text'],
+                device=result['device'],
+                processing_time=result['processing_time'],
+                segments=result['segments'],
+                language=result['language']
+            )
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error processing transcription {transcription.id}: {str(e)}")
+        transcription.mark_error(f"Error processing transcription: {str(e)}")
+
+    events.emit(transcription.id, **events.result_event(transcription))
+    # Failed jobs are finished too; only a requeued job still needs its audio
+    if transcription.status in ('completed', 'failed'):
+        discard_upload(transcription.id, transcription.content_hash, transcription.file_path)
+
+def run_worker(worker_id: str, poll_interval: Optional[float] = None, once: bool = False) -> None:
+    """Claim and process jobs until stopped with SIGINT/SIGTERM."""
+    app = current_app._get_current_object()
+    poll_interval = poll_interval or app.config['WORKER_POLL_INTERVAL']
+    lease = app.config['JOB_LEASE_SECONDS']
+    max_attempts = app.config['JOB_MAX_ATTEMPTS']
+    stopping = threading.Event()
+
+    def _stop(signum, frame):
+        app.logger.info(f"Worker {worker_id} stopping after the current job")
+        stopping.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+    app.logger.info(f"Worker {worker_id} started")
+    governor = get_governor()
+    pruned_at = 0.0
+    while not stopping.is_set():
+        requeue_stale(lease, max_attempts)
+        scheduler.probe_pending()
+        if time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+            events.prune_logs(app.config['EVENTS_RETENTION_SECONDS'])
+            pruned_at = time.monotonic()
+        # Leave jobs queued while every inference slot on this host is busy
+        if governor is not None and len(governor.busy()) >= governor.slots:
+            stopping.wait(min(poll_interval, 1))
+            continue
+        transcription = claim_next(worker_id)
+        if transcription is None:
+            if once:
+                break
+            stopping.wait(poll_interval)
+            continue
+
+        app.logger.info(f"Worker {worker_id} claimed transcription {transcription.id}")
+        try:
+            with leased(transcription.id, worker_id):
+                run_job(transcription)
+        finally:
+            metrics.update_process_metrics()
+        if once:
+            break
+    app.logger.info(f"Worker {worker_id} stopped")
@@ -0,0 +1,173 @@
+"""Prometheus metrics for requests, the job queue and inference.
+
+Metrics are recorded with ``prometheus_client`` wherever the work happens:
+gunicorn workers, queue workers, the model host and the downloader. With
+``PROMETHEUS_MULTIPROC_DIR`` set, every process writes its samples to files
+in that directory and ``/metrics`` on any web worker aggregates all of them,
+so the directory must be shared by (and only by) the processes of one
+deployment and emptied before it starts. Files are named by host name and pid
+(``<host>-<pid>``) rather than pid alone, so containers sharing the directory cannot collide.
+
+Queue depth is read from the database at scrape time instead of being
+tracked by the processes that change it.
+"""
+import os
+import socket
+import time
+from typing import Optional, Tuple
+from flask import current_app, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, values)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+def process_identifier(pid: Optional[int] = None) -> str:
+    # Becomes part of the sample file name and the ``pid`` label, which are split on '_'
+    return f"{socket.gethostname().replace('_', '-')}-{pid or os.getpid()}"
+
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    # Must be in place before any metric below is created
+    values.ValueClass = values.MultiProcessValue(process_identifier)
+
+REQUEST_SECONDS = Histogram(
+    'audioink_http_request_duration_seconds', 'Time to answer an HTTP request, up to its response headers.',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+UPLOAD_BYTES = Histogram(
+    'audioink_upload_size_bytes', 'Size of accepted uploads.',
+    buckets=(2**16, 2**20, 2**22, 2**24, 2**26, 2**28, 2**30, 2**32)
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    'audioink_queue_wait_seconds', 'Time a job spent pending before a worker claimed it.',
+    ['priority'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+INFERENCE_SECONDS = Histogram(
+    'audioink_inference_duration_seconds', 'Wall time to transcribe one recording, cache hits excluded.',
+    ['model', 'device'],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+REAL_TIME_FACTOR = Histogram(
+    'audioink_inference_real_time_factor', 'Transcription time divided by audio duration.',
+    ['model', 'device'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5)
+)
+AUDIO_SECONDS = Counter(
+    'audioink_audio_seconds', 'Seconds of audio transcribed.',
+    ['model', 'device']
+)
+MODEL_LOAD_SECONDS = Histogram(
+    'audioink_model_load_seconds', 'Time to load a model into memory.',
+    ['model', 'device', 'precision'],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+CACHE_REQUESTS = Counter(
+    'audioink_cache_requests', 'Cache lookups by cache and outcome.',
+    ['cache', 'result']
+)
+ADMISSION_REJECTIONS = Counter(
+    'audioink_admission_rejections', 'Requests refused with 429 because inference was saturated.',
+    ['reason']
+)
+RESIDENT_MEMORY_BYTES = Gauge(
+    'audioink_process_resident_memory_bytes', 'Resident set size of each live process.',
+    multiprocess_mode='liveall'
+)
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def observe_inference(model: str, device: str, seconds: float, audio_seconds: float) -> None:
+    INFERENCE_SECONDS.labels(model, device).observe(seconds)
+    if audio_seconds:
+        AUDIO_SECONDS.labels(model, device).inc(audio_seconds)
+        REAL_TIME_FACTOR.labels(model, device).observe(seconds / audio_seconds)
+
+def resident_memory_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        # No procfs; fall back to the peak, in kilobytes on Linux and bytes on macOS
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+def update_process_metrics() -> None:
+    RESIDENT_MEMORY_BYTES.set(resident_memory_bytes())
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live gauges of a process on this host that exited, e.g. from gunicorn's ``child_exit``."""
+    if not MULTIPROC_DIR:
+        return
+    identifier = process_identifier(pid)
+    for name in os.listdir(MULTIPROC_DIR):
+        if name.startswith('gauge_live') and name.endswith(f'_{identifier}.db'):
+            try:
+                os.remove(os.path.join(MULTIPROC_DIR, name))
+            except OSError:
+                pass
+
+class QueueCollector:
+    """Number of transcriptions in each queue state and busy inference slots, read when scraped."""
+
+    def collect(self):
+        from app.services.governor import get_governor
+        from app.services.repository import count_by_status
+
+        family = GaugeMetricFamily('audioink_queue_jobs', 'Transcriptions by status.', labels=['status'])
+        for status, count in count_by_status().items():
+            if status != 'completed':
+                family.add_metric([status], count)
+        yield family
+
+        governor = get_governor()
+        if governor is not None:
+            slots = GaugeMetricFamily('audioink_inference_slots', 'CPU inference slots of this host by state.',
+                                      labels=['state'])
+            busy = len(governor.busy())
+            slots.add_metric(['busy'], busy)
+            slots.add_metric(['free'], governor.slots - busy)
+            yield slots
+
+def render() -> Tuple[bytes, str]:
+    """Exposition of every process's metrics plus the queue gauges."""
+    update_process_metrics()
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    queue = CollectorRegistry()
+    queue.register(QueueCollector())
+    return generate_latest(registry) + generate_latest(queue), CONTENT_TYPE_LATEST
+
+def register_metrics(app) -> None:
+    """Time every request and serve ``/metrics``."""
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(
+                time.perf_counter() - started)
+        update_process_metrics()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        try:
+            body, content_type = render()
+        except Exception as e:
+            current_app.logger.error(f"Error rendering metrics: {str(e)}")
+            return f'# error: {str(e)}\n', 500, {'Content-Type': 'text/plain'}
+        return body, 200, {'Content-Type': content_type}
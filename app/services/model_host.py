@@ -0,0 +1,243 @@
+"""Dedicated process that owns the Whisper weights.
+
+Web and inference workers do not load a model themselves when
+``MODEL_HOST_ADDRESS`` is set: they connect to the model host over a local
+socket (``multiprocessing.connection``) and send it requests. The host keeps a
+single copy of the model per device, so restarting or recycling workers never
+reloads weights.
+
+Each connection carries one request/response pair of plain dicts::
+
+    {'op': 'transcribe', 'audio_path': '/app/uploads/abc.mp3'}
+    {'op': 'health'}
+
+Requests are handled on their own threads so several can be in flight; the
+model registry serializes decodes per loaded model.
+"""
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from flask import current_app
+from app.services import metrics
+
+Address = Union[str, Tuple[str, int]]
+
+# Set in the process running serve()
+_serving = False
+
+class ModelHostError(Exception):
+    """Raised when the model host cannot be reached or rejects a request."""
+
+class ModelHostBusy(ModelHostError):
+    """Raised when the model host has no free request slots."""
+
+def parse_address(address: str) -> Address:
+    """Turn ``host:port`` into a TCP address; anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and not address.startswith('/'):
+        return host or 'localhost', int(port)
+    return address
+
+def _authkey(config) -> bytes:
+    """The shared secret of the model host; never derived from SECRET_KEY, since requests are pickled."""
+    authkey = config.get('MODEL_HOST_AUTHKEY')
+    if not authkey:
+        raise ModelHostError('Set MODEL_HOST_AUTHKEY to a random secret shared by the model host and its clients')
+    return authkey.encode()
+
+class ModelHost:
+    """Socket server that answers transcription and health requests."""
+
+    def __init__(self, app, address: Address, authkey: bytes, max_inflight: int = 8):
+        self.app = app
+        self.address = address
+        self.authkey = authkey
+        self.max_inflight = max_inflight
+        self.started_at = time.time()
+        self.slots = threading.BoundedSemaphore(max_inflight)
+        self.stats_lock = threading.Lock()
+        self.inflight = 0
+        self.served = 0
+        self.failed = 0
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            'health': self.handle_health,
+            'transcribe': self.handle_transcribe,
+            'stream': self.handle_stream,
+        }
+
+    def handle_health(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from app.services.batching import scheduler_stats
+        from app.services.governor import get_governor
+        from app.services.model_registry import get_registry
+
+        with self.app.app_context():
+            models = get_registry().stats()
+            governor = get_governor()
+            slots = governor.stats() if governor is not None else None
+        with self.stats_lock:
+            return {
+                'status': 'healthy',
+                'pid': os.getpid(),
+                'uptime': time.time() - self.started_at,
+                'model_loaded': bool(models['loaded']),
+                'models': models,
+                'batching': scheduler_stats(),
+                'inference_slots': slots,
+                'inflight': self.inflight,
+                'max_inflight': self.max_inflight,
+                'served': self.served,
+                'failed': self.failed
+            }
+
+    def handle_transcribe(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from app.api.transcription import transcribe_local
+
+        return transcribe_local(request['audio_path'], request.get('model_name'),
+                                request.get('use_gpu', True), request.get('file_hash'),
+                                request.get('transcription_id'), precision=request.get('precision'))
+
+    def handle_stream(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from app.services.streaming import handle
+
+        return handle(request)
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        handler = self.handlers.get(request.get('op'))
+        if handler is None:
+            return {'ok': False, 'error': f"Unknown operation: {request.get('op')}"}
+        if request.get('op') == 'health':
+            return {'ok': True, 'result': handler(request)}
+
+        if not self.slots.acquire(blocking=False):
+            return {'ok': False, 'busy': True, 'error': 'Model host is at capacity'}
+        with self.stats_lock:
+            self.inflight += 1
+        ok = False
+        try:
+            with self.app.app_context():
+                result = handler(request)
+            ok = 'error' not in result
+            return {'ok': True, 'result': result}
+        except Exception as e:
+            self.app.logger.error(f"Model host request failed: {str(e)}")
+            return {'ok': False, 'error': str(e)}
+        finally:
+            with self.stats_lock:
+                self.inflight -= 1
+                self.served += 1
+                self.failed += 0 if ok else 1
+            self.slots.release()
+            metrics.update_process_metrics()
+
+    def handle_connection(self, conn) -> None:
+        try:
+            request = conn.recv()
+            conn.send(self.dispatch(request))
+        except (EOFError, OSError) as e:
+            self.app.logger.warning(f"Model host connection dropped: {str(e)}")
+        finally:
+            conn.close()
+
+    def preload(self) -> None:
+        from app.api.transcription import load_model
+
+        with self.app.app_context():
+            load_model()
+
+    def serve_forever(self) -> None:
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        with Listener(self.address, authkey=self.authkey) as listener:
+            if isinstance(self.address, str):
+                os.chmod(self.address, 0o660)
+            self.app.logger.info(f"Model host listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except OSError as e:
+                    self.app.logger.warning(f"Rejected model host connection: {str(e)}")
+                    continue
+                threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+
+class ModelHostClient:
+    """Client used by web and worker processes to talk to the model host."""
+
+    def __init__(self, address: Address, authkey: bytes, timeout: float = 3600,
+                 busy_retry: float = 1.0):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.busy_retry = busy_retry
+
+    @classmethod
+    def from_config(cls, config) -> 'ModelHostClient':
+        return cls(
+            parse_address(config['MODEL_HOST_ADDRESS']),
+            _authkey(config),
+            timeout=config['MODEL_HOST_TIMEOUT']
+        )
+
+    def request(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with Client(self.address, authkey=self.authkey) as conn:
+                    conn.send(payload)
+                    if not conn.poll(max(deadline - time.monotonic(), 0)):
+                        raise ModelHostError(f"Model host did not answer within {timeout:.0f} seconds")
+                    response = conn.recv()
+            except (OSError, EOFError) as e:
+                raise ModelHostError(f"Model host unavailable at {self.address}: {str(e)}")
+
+            if response.get('ok'):
+                return response['result']
+            if response.get('busy') and time.monotonic() + self.busy_retry < deadline:
+                time.sleep(self.busy_retry)
+                continue
+            if response.get('busy'):
+                raise ModelHostBusy(response['error'])
+            raise ModelHostError(response.get('error', 'Unknown model host error'))
+
+    def transcribe(self, audio_path: str, model_name: Optional[str] = None, use_gpu: bool = True,
+                   file_hash: Optional[str] = None, transcription_id: Optional[str] = None,
+                   precision: Optional[str] = None) -> Dict[str, Any]:
+        return self.request({
+            'op': 'transcribe',
+            'audio_path': os.path.abspath(audio_path),
+            'model_name': model_name,
+            'use_gpu': use_gpu,
+            'file_hash': file_hash,
+            'transcription_id': transcription_id,
+            'precision': precision
+        })
+
+    def health(self, timeout: float = 2.0) -> Dict[str, Any]:
+        return self.request({'op': 'health'}, timeout=timeout)
+
+def is_model_host() -> bool:
+    """Whether this process is the model host."""
+    return _serving
+
+def get_client() -> Optional[ModelHostClient]:
+    """Client for the configured model host, or None to run inference in-process."""
+    if not current_app.config.get('MODEL_HOST_ADDRESS'):
+        return None
+    return ModelHostClient.from_config(current_app.config)
+
+def serve(address: Optional[str] = None, preload: bool = True) -> None:
+    """Run the model host for the current app until interrupted."""
+    global _serving
+    app = current_app._get_current_object()
+    host = ModelHost(
+        app,
+        parse_address(address or app.config['MODEL_HOST_ADDRESS']),
+        _authkey(app.config),
+        max_inflight=app.config['MODEL_HOST_MAX_INFLIGHT']
+    )
+    _serving = True
+    if preload:
+        host.preload()
+    host.serve_forever()
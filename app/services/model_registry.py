@@ -0,0 +1,383 @@
+"""Process-wide registry of loaded Whisper models.
+
+Models are keyed by ``(name, device, precision)`` and kept in LRU order. Before
+a model is loaded, least recently used models on the same device are evicted
+until the estimated footprint fits in ``MODEL_MEMORY_BUDGET_MB``. Checkpoints
+are only ever read from ``MODEL_PATH``; fetching them is a deploy-time step
+(``flask models download``) so a request can never trigger a download.
+
+The CPU process pools that transcribe long recordings (see
+:mod:`app.services.chunking`) hold one model copy per process. They are
+counted against the same budget and evicted in the same LRU order, shut down
+along with their model, and shut down after ``LONG_AUDIO_POOL_IDLE_SECONDS``
+without use.
+"""
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Union
+from flask import current_app
+from app.services import metrics
+
+AVAILABLE_MODELS = ('tiny', 'base', 'small', 'medium', 'large-v3')
+
+# Parameter counts used to estimate memory before a checkpoint is loaded
+MODEL_PARAMETERS = {
+    'tiny': 39_000_000,
+    'base': 74_000_000,
+    'small': 244_000_000,
+    'medium': 769_000_000,
+    'large-v3': 1_550_000_000,
+}
+
+PRECISION_BYTES = {'fp32': 4, 'fp16': 2, 'bf16': 2, 'int8': 1}
+
+# Reduced precisions that only run on CPU (see app.services.quantization)
+CPU_ONLY_PRECISIONS = ('bf16', 'int8')
+
+class ModelNotAvailable(Exception):
+    """Raised when a model is unknown or its checkpoint is not in MODEL_PATH."""
+
+class ModelKey(NamedTuple):
+    name: str
+    device: str
+    precision: str
+
+class LoadedModel:
+    def __init__(self, key: ModelKey, model, size_bytes: int, load_time: float):
+        self.key = key
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_time = load_time
+        self.lock = threading.Lock()
+        self.last_used = time.time()
+        # Callers holding or waiting for the model; it is never evicted while any remain
+        self.inflight = 0
+        self.uses = 0
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.inflight) or self.lock.locked()
+
+class LoadedPool:
+    """A process pool holding ``copies`` CPU copies of a model."""
+
+    def __init__(self, key: ModelKey, pool, copies: int, size_bytes: int):
+        self.key = key
+        self.pool = pool
+        self.copies = copies
+        self.size_bytes = size_bytes
+        self.last_used = time.time()
+        self.inflight = 0
+        self.uses = 0
+
+def estimated_bytes(key: ModelKey) -> int:
+    return MODEL_PARAMETERS[key.name] * PRECISION_BYTES[key.precision]
+
+def resolve_device(use_gpu: bool = True) -> str:
+    import torch
+
+    return 'cuda' if use_gpu and torch.cuda.is_available() else 'cpu'
+
+def default_precision(device: str, cpu_precision: str = 'fp32') -> str:
+    return 'fp16' if device == 'cuda' else cpu_precision
+
+def checkpoint_path(model_path: str, name: str) -> str:
+    import whisper
+
+    if name not in AVAILABLE_MODELS:
+        raise ModelNotAvailable(f"Unknown model '{name}'. Choose one of: {', '.join(AVAILABLE_MODELS)}")
+    return os.path.join(model_path, os.path.basename(whisper._MODELS[name]))
+
+def model_size(model) -> int:
+    import torch
+
+    # The state dict also covers quantized layers, whose packed weights are neither parameters nor buffers
+    tensors = []
+    for value in model.state_dict().values():
+        tensors.extend(v for v in (value if isinstance(value, tuple) else (value,)) if isinstance(v, torch.Tensor))
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+class ModelRegistry:
+    """LRU cache of Whisper models bounded by a per-device memory budget."""
+
+    def __init__(self, model_path: str, memory_budget: int, logger=None, cpu_precision: str = 'fp32',
+                 pool_idle_seconds: float = 0):
+        self.model_path = model_path
+        self.memory_budget = memory_budget
+        self.cpu_precision = cpu_precision
+        self.pool_idle_seconds = pool_idle_seconds
+        self.logger = logger
+        self.models: 'OrderedDict[ModelKey, LoadedModel]' = OrderedDict()
+        self.pools: Dict[ModelKey, LoadedPool] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self.lock = threading.RLock()
+        self.loading: Dict[ModelKey, threading.Lock] = {}
+        self.evictions = 0
+
+    def _log(self, level: str, message: str) -> None:
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
+
+    def is_installed(self, name: str) -> bool:
+        return os.path.exists(checkpoint_path(self.model_path, name))
+
+    def installed(self) -> List[str]:
+        return [name for name in AVAILABLE_MODELS if self.is_installed(name)]
+
+    def key(self, name: str, device: str, precision: Optional[str] = None) -> ModelKey:
+        if name not in AVAILABLE_MODELS:
+            raise ModelNotAvailable(f"Unknown model '{name}'. Choose one of: {', '.join(AVAILABLE_MODELS)}")
+        precision = precision or default_precision(device, self.cpu_precision)
+        if precision not in PRECISION_BYTES:
+            raise ModelNotAvailable(f"Unsupported precision '{precision}'")
+        if precision == 'fp16' and device == 'cpu':
+            precision = 'fp32'
+        if precision in CPU_ONLY_PRECISIONS and device != 'cpu':
+            precision = default_precision(device)
+        return ModelKey(name, device, precision)
+
+    def used_bytes(self, device: str) -> int:
+        return sum(m.size_bytes for k, m in [*self.models.items(), *self.pools.items()] if k.device == device)
+
+    def _shutdown_pool(self, key: ModelKey) -> None:
+        entry = self.pools.pop(key)
+        # Nothing is queued on an idle pool; its processes exit once they notice the shutdown
+        entry.pool.shutdown(wait=False)
+        self._log('info', f"Shut down the {entry.copies}-process pool of {key.name} ({key.precision}), "
+                          f"freeing {entry.size_bytes / 2**20:.0f} MB")
+
+    def _evict_for(self, key: ModelKey, needed: int) -> None:
+        candidates: List[Union[LoadedModel, LoadedPool]] = [*self.models.values(), *self.pools.values()]
+        for entry in sorted(candidates, key=lambda e: e.last_used):
+            if self.used_bytes(key.device) + needed <= self.memory_budget:
+                break
+            other = entry.key
+            # Evicting a model in use would free nothing and let a second copy load
+            if other.device != key.device or (entry.busy if isinstance(entry, LoadedModel) else entry.inflight):
+                continue
+            if isinstance(entry, LoadedPool):
+                if other in self.pools:
+                    self._shutdown_pool(other)
+                continue
+            if other not in self.models:
+                continue
+            evicted = self.models.pop(other)
+            self.evictions += 1
+            self._log('info', f"Evicted model {other.name} ({other.precision}) from {other.device} "
+                              f"to free {evicted.size_bytes / 2**20:.0f} MB")
+            if other in self.pools and not self.pools[other].inflight:
+                self._shutdown_pool(other)
+        if self.used_bytes(key.device) + needed > self.memory_budget:
+            self._log('warning', f"Model {key.name} exceeds the remaining memory budget on {key.device}")
+        gc.collect()
+        if key.device == 'cuda':
+            import torch
+            torch.cuda.empty_cache()
+
+    def _load(self, key: ModelKey) -> LoadedModel:
+        from app.services.quantization import load_checkpoint
+
+        path = checkpoint_path(self.model_path, key.name)
+        if not os.path.exists(path):
+            raise ModelNotAvailable(
+                f"Model '{key.name}' is not installed in {self.model_path}; "
+                f"run 'flask models download {key.name}'"
+            )
+
+        start_time = time.time()
+        model = load_checkpoint(path, key.device, key.precision)
+        model.eval()
+        loaded = LoadedModel(key, model, model_size(model), time.time() - start_time)
+        metrics.MODEL_LOAD_SECONDS.labels(key.name, key.device, key.precision).observe(loaded.load_time)
+        self._log('info', f"Loaded model {key.name} ({key.precision}) on {key.device} "
+                          f"in {loaded.load_time:.2f} seconds")
+        return loaded
+
+    def get(self, name: str, device: str, precision: Optional[str] = None) -> LoadedModel:
+        """Return a loaded model, loading and evicting as needed."""
+        key = self.key(name, device, precision)
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                self.models[key].last_used = time.time()
+                return self.models[key]
+            load_lock = self.loading.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; others wait and reuse it
+        with load_lock:
+            with self.lock:
+                if key in self.models:
+                    self.models.move_to_end(key)
+                    self.models[key].last_used = time.time()
+                    return self.models[key]
+                self._evict_for(key, estimated_bytes(key))
+            loaded = self._load(key)
+            with self.lock:
+                self.models[key] = loaded
+                self.loading.pop(key, None)
+            return loaded
+
+    @contextmanager
+    def use(self, name: str, device: str, precision: Optional[str] = None) -> Iterator[LoadedModel]:
+        """Hold a model exclusively for one decode.
+
+        Whisper installs KV-cache hooks on the decoder for the duration of a
+        decode, so one model instance must not run two decodes at once.
+        """
+        while True:
+            loaded = self.get(name, device, precision)
+            with self.lock:
+                # Evicted between get() and here; load it again
+                if self.models.get(loaded.key) is loaded:
+                    loaded.inflight += 1
+                    break
+        try:
+            with loaded.lock:
+                loaded.last_used = time.time()
+                loaded.uses += 1
+                yield loaded
+        finally:
+            with self.lock:
+                loaded.inflight -= 1
+
+    @contextmanager
+    def use_pool(self, name: str, precision: Optional[str], copies: int,
+                 create: Callable[[], Any]) -> Iterator[LoadedPool]:
+        """Hold the CPU process pool of a model, creating it with ``create()`` within the memory budget."""
+        key = self.key(name, 'cpu', precision)
+        with self.lock:
+            entry = self.pools.get(key)
+            if entry is None or entry.copies != copies:
+                if entry is not None and not entry.inflight:
+                    self._shutdown_pool(key)
+                needed = copies * estimated_bytes(key)
+                self._evict_for(key, needed)
+                entry = self.pools[key] = LoadedPool(key, create(), copies, needed)
+                self._log('info', f"Started a {copies}-process pool of {key.name} ({key.precision}) "
+                                  f"using about {needed / 2**20:.0f} MB")
+                self._start_reaper()
+            entry.inflight += 1
+            entry.uses += 1
+            entry.last_used = time.time()
+        try:
+            yield entry
+        finally:
+            with self.lock:
+                entry.inflight -= 1
+                entry.last_used = time.time()
+
+    def release_idle_pools(self, idle_seconds: float) -> int:
+        """Shut down pools unused for ``idle_seconds``."""
+        cutoff = time.time() - idle_seconds
+        with self.lock:
+            idle = [key for key, entry in self.pools.items() if not entry.inflight and entry.last_used < cutoff]
+            for key in idle:
+                self._shutdown_pool(key)
+        return len(idle)
+
+    def _start_reaper(self) -> None:
+        if not self.pool_idle_seconds or self._reaper is not None:
+            return
+
+        def reap():
+            while True:
+                time.sleep(min(self.pool_idle_seconds, 60))
+                self.release_idle_pools(self.pool_idle_seconds)
+
+        self._reaper = threading.Thread(target=reap, name='pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def stats(self) -> Dict[str, object]:
+        with self.lock:
+            return {
+                'memory_budget_mb': self.memory_budget / 2**20,
+                'evictions': self.evictions,
+                'installed': self.installed(),
+                'loaded': [{
+                    'model': key.name,
+                    'device': key.device,
+                    'precision': key.precision,
+                    'size_mb': round(m.size_bytes / 2**20, 1),
+                    'load_time': round(m.load_time, 2),
+                    'uses': m.uses
+                } for key, m in self.models.items()],
+                'pools': [{
+                    'model': key.name,
+                    'precision': key.precision,
+                    'processes': p.copies,
+                    'size_mb': round(p.size_bytes / 2**20, 1),
+                    'inflight': p.inflight,
+                    'uses': p.uses
+                } for key, p in self.pools.items()]
+            }
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ModelRegistry:
+    """The registry for this process, created from the app config on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(
+                current_app.config['MODEL_PATH'],
+                current_app.config['MODEL_MEMORY_BUDGET_MB'] * 2**20,
+                logger=current_app.logger,
+                cpu_precision=current_app.config['CPU_PRECISION'],
+                pool_idle_seconds=current_app.config['LONG_AUDIO_POOL_IDLE_SECONDS']
+            )
+        return _registry
+
+def preload_for_fork(name: str) -> Optional[LoadedModel]:
+    """Load and warm a CPU model in a parent process before it forks its workers.
+
+    Inference never writes to the weights, so forked workers keep reading the
+    parent's pages copy-on-write instead of each loading a copy. The model's
+    parameters are marked as not requiring gradients and the garbage collector
+    is frozen so neither autograd nor the collector touches those pages.
+    Replacement workers (e.g. after ``--max-requests``) fork from the same
+    parent and share them too.
+
+    CUDA cannot be used across fork, so on a GPU host nothing is loaded and
+    workers load their own copy on first use; run the model host instead.
+    """
+    import numpy as np
+    import torch
+    import whisper
+
+    if torch.cuda.is_available():
+        current_app.logger.warning("Not preloading: CUDA models cannot be shared with forked workers")
+        return None
+
+    registry = get_registry()
+    loaded = registry.get(name, 'cpu')
+    loaded.model.requires_grad_(False)
+
+    # A dummy 30-second decode runs the lazy initialisation inside torch and whisper.
+    # One thread only: an OpenMP pool started here would not survive the fork.
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        started = time.time()
+        with loaded.lock:
+            mel = whisper.log_mel_spectrogram(np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32),
+                                              loaded.model.dims.n_mels)
+            whisper.decode(loaded.model, mel, whisper.DecodingOptions(language='en', fp16=False))
+        current_app.logger.info(f"Warmed model {name} in {time.time() - started:.2f} seconds before forking")
+    finally:
+        torch.set_num_threads(threads)
+
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+def download_models(model_path: str, names: List[str]) -> List[str]:
+    """Fetch checkpoints into MODEL_PATH; used at deploy time, never per request."""
+    import whisper
+
+    os.makedirs(model_path, exist_ok=True)
+    return [whisper._download(whisper._MODELS[name], model_path, in_memory=False) for name in names]
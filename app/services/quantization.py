@@ -0,0 +1,200 @@
+"""Reduced-precision CPU variants of Whisper checkpoints.
+
+* ``int8``: dynamic int8 quantization of every Linear layer (weights stored
+  as int8, activations quantized per batch). The quantized model is pickled to
+  ``MODEL_PATH/quantized/`` the first time and loaded from there afterwards;
+  the file name carries the torch and whisper versions it was built with.
+* ``bf16``: weights and activations in bfloat16, for CPUs with native bf16
+  support (AVX512-BF16 / AMX). The encoder's output is returned as float32,
+  which Whisper's decoding checks for when ``fp16`` is off.
+
+``compare_precisions`` transcribes a local audio set with each precision and
+reports speed against fp32 and word error rates, against reference transcripts
+(``<name>.txt`` next to ``<name>.wav``) where present and against the fp32
+output otherwise.
+"""
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+from flask import current_app
+from app.services.model_registry import ModelNotAvailable, get_registry
+
+CPU_PRECISIONS = ('fp32', 'bf16', 'int8')
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a', '.webm', '.mp4')
+
+class PrecisionNotSupported(ModelNotAvailable):
+    """Raised when a precision cannot be used on this CPU."""
+
+def bf16_supported() -> bool:
+    import torch
+
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def quantized_path(model_path: str, name: str) -> str:
+    import torch
+    import whisper
+
+    version = f"torch{torch.__version__.split('+')[0]}-whisper{getattr(whisper, '__version__', 'unknown')}"
+    return os.path.join(model_path, 'quantized', f'{name}-int8-{version}.pt')
+
+def quantize_int8(model):
+    """Dynamically quantize the Linear layers of a float32 CPU model."""
+    import torch
+    import whisper
+    from torch import nn
+
+    # Whisper's Linear subclass only casts weights to the input dtype; quantize_dynamic
+    # matches modules by exact type, so present them as plain Linear layers
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def load_int8(checkpoint: str, model_path: str, name: str):
+    """The int8 model of a checkpoint, quantizing and caching it on first use."""
+    import torch
+    import whisper
+
+    path = quantized_path(model_path, name)
+    if os.path.exists(path):
+        # A file this server wrote into MODEL_PATH itself
+        return torch.load(path, map_location='cpu', weights_only=False)
+
+    model = quantize_int8(whisper.load_model(checkpoint, device='cpu'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+def to_bf16(model):
+    """Run a CPU model in bfloat16 while keeping Whisper's float32 interfaces."""
+    import torch
+
+    if not bf16_supported():
+        raise PrecisionNotSupported('This CPU has no native bfloat16 support')
+    model = model.to(torch.bfloat16)
+    # Whisper's LayerNorm computes in float32 against float32 parameters
+    for module in model.modules():
+        if isinstance(module, torch.nn.LayerNorm):
+            module.float()
+    model.encoder.register_forward_pre_hook(lambda module, args: (args[0].to(torch.bfloat16),) + args[1:])
+    model.encoder.register_forward_hook(lambda module, args, output: output.float())
+    # Audio features reach the decoder as float32; cross-attention needs them in bf16
+    model.decoder.register_forward_pre_hook(
+        lambda module, args: (args[0], args[1].to(torch.bfloat16)) + args[2:])
+    return model
+
+def load_checkpoint(checkpoint: str, device: str, precision: str):
+    """Load a checkpoint from MODEL_PATH onto a device in the given precision."""
+    import whisper
+
+    if precision == 'int8':
+        name = os.path.splitext(os.path.basename(checkpoint))[0]
+        return load_int8(checkpoint, os.path.dirname(checkpoint), name)
+    model = whisper.load_model(checkpoint, device=device)
+    if precision == 'fp16':
+        model = model.half()
+    elif precision == 'bf16':
+        model = to_bf16(model)
+    return model
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+def normalize(text: str) -> List[str]:
+    """Words of a transcript with case and punctuation removed."""
+    try:
+        from whisper.normalizers import EnglishTextNormalizer
+        text = EnglishTextNormalizer()(text)
+    except ImportError:
+        text = _PUNCTUATION.sub(' ', text.lower())
+    return text.split()
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Word-level edit distance (substitutions, insertions and deletions)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1]
+
+def wer(references: List[str], hypotheses: List[str]) -> Optional[float]:
+    """Corpus word error rate: total edits over total reference words."""
+    errors = words = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        ref_words = normalize(reference)
+        errors += word_errors(ref_words, normalize(hypothesis))
+        words += len(ref_words)
+    return round(errors / words, 4) if words else None
+
+def audio_set(directory: str) -> List[Dict[str, Any]]:
+    """Audio files of a directory in name order, with their reference transcript if any."""
+    items = []
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        stem, extension = os.path.splitext(entry.name)
+        if not entry.is_file() or extension.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference = os.path.join(directory, f'{stem}.txt')
+        items.append({
+            'name': entry.name,
+            'path': entry.path,
+            'reference': open(reference, encoding='utf-8').read() if os.path.exists(reference) else None
+        })
+    return items
+
+def compare_precisions(name: str, directory: str, precisions: List[str], language: str = 'en') -> Dict[str, Any]:
+    """Transcribe an audio set with each CPU precision and compare speed and word error rate."""
+    import whisper
+
+    items = audio_set(directory)
+    if not items:
+        raise ValueError(f"No audio files in {directory}")
+    audio = [whisper.load_audio(item['path']) for item in items]
+    seconds = sum(len(a) for a in audio) / whisper.audio.SAMPLE_RATE
+    precisions = ['fp32'] + [p for p in precisions if p != 'fp32']
+
+    registry = get_registry()
+    runs: Dict[str, Dict[str, Any]] = {}
+    for precision in precisions:
+        try:
+            loaded = registry.get(name, 'cpu', precision)
+        except PrecisionNotSupported as e:
+            runs[precision] = {'skipped': str(e)}
+            continue
+        texts = []
+        started = time.perf_counter()
+        with loaded.lock:
+            for waveform in audio:
+                result = loaded.model.transcribe(waveform, fp16=False, language=language, task='transcribe')
+                texts.append(result['text'])
+        elapsed = time.perf_counter() - started
+        runs[precision] = {
+            'load_seconds': round(loaded.load_time, 2),
+            'size_mb': round(loaded.size_bytes / 2**20, 1),
+            'transcribe_seconds': round(elapsed, 2),
+            'rtf': round(elapsed / seconds, 4),
+            'texts': texts
+        }
+        current_app.logger.info(f"Transcribed {len(items)} files with {name} ({precision}) in {elapsed:.1f} seconds")
+
+    texts = {precision: run.pop('texts') for precision, run in runs.items() if 'texts' in run}
+    references = [item['reference'] for item in items]
+    has_references = all(reference is not None for reference in references)
+    fp32_wer = wer(references, texts['fp32']) if has_references else None
+    for precision, run in runs.items():
+        if precision not in texts:
+            continue
+        run['speedup'] = round(runs['fp32']['transcribe_seconds'] / run['transcribe_seconds'], 2)
+        run['wer_vs_fp32_output'] = wer(texts['fp32'], texts[precision])
+        if has_references:
+            run['wer'] = wer(references, texts[precision])
+            run['wer_delta'] = round(run['wer'] - fp32_wer, 4)
+    return {'model': name, 'files': len(items), 'audio_seconds': round(seconds, 1),
+            'references': has_references, 'precisions': runs}
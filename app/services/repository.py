@@ -0,0 +1,165 @@
+"""SQL-backed access to transcriptions.
+
+The ``transcriptions`` table is the only store. Listing queries filter on
+status, owner and creation time and are ordered newest first, which the
+composite indexes on ``(status, created_at)`` and ``(user_id, created_at)``
+serve without scanning the table.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import load_only
+from app import db
+from app.models.segment import Segment, segment_values
+from app.models.transcription import Transcription, make_preview
+from app.services.search import index_transcription
+
+IMPORT_BATCH_SIZE = 500
+# Whisper never emits a segment longer than its 30-second decoding window
+MAX_SEGMENT_SECONDS = 30.0
+
+def get_transcription(transcription_id: str) -> Optional[Transcription]:
+    return db.session.get(Transcription, transcription_id)
+
+def filter_transcriptions(status: Optional[str] = None, user_id: Optional[str] = None,
+                          created_after: Optional[datetime] = None,
+                          created_before: Optional[datetime] = None):
+    """Query of transcriptions matching the given filters, newest first."""
+    query = Transcription.query
+    if status is not None:
+        query = query.filter(Transcription.status == status)
+    if user_id is not None:
+        query = query.filter(Transcription.user_id == user_id)
+    if created_after is not None:
+        query = query.filter(Transcription.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(Transcription.created_at < created_before)
+    return query.order_by(Transcription.created_at.desc(), Transcription.id.desc())
+
+def list_transcriptions(status: Optional[str] = None, user_id: Optional[str] = None,
+                        created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                        limit: Optional[int] = None) -> List[Transcription]:
+    query = filter_transcriptions(status, user_id, created_after, created_before)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def encode_cursor(transcription: Transcription) -> str:
+    """Opaque cursor pointing just past a row in (created_at, id) order."""
+    raw = json.dumps([transcription.created_at.isoformat(), transcription.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, transcription_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(transcription_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def page_transcriptions(status: Optional[str] = None, user_id: Optional[str] = None,
+                        created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                        cursor: Optional[str] = None, limit: int = 50,
+                        columns: Optional[Sequence[str]] = None) -> Tuple[List[Transcription], Optional[str]]:
+    """One page of transcriptions after a cursor, and the cursor of the next page.
+
+    Pages seek on ``(created_at, id)`` instead of using OFFSET, so every page
+    costs the same however deep into the history it is. ``columns`` limits
+    which columns are loaded, e.g. to leave out the full text.
+    """
+    query = filter_transcriptions(status, user_id, created_after, created_before)
+    if columns:
+        needed = set(columns) | {'id', 'created_at'}
+        query = query.options(load_only(*[getattr(Transcription, column) for column in needed]))
+    if cursor:
+        created_at, transcription_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Transcription.created_at < created_at,
+            and_(Transcription.created_at == created_at, Transcription.id < transcription_id)
+        ))
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def segments_between(transcription_id: str, start: Optional[float] = None,
+                     end: Optional[float] = None) -> List[Segment]:
+    """Segments of a transcription that overlap ``[start, end]`` seconds, in order.
+
+    Segments are at most ``MAX_SEGMENT_SECONDS`` long, so the overlap test is
+    bounded to a range of the ``(transcription_id, start)`` index.
+    """
+    query = Segment.query.filter(Segment.transcription_id == transcription_id)
+    if start is not None:
+        query = query.filter(Segment.start >= start - MAX_SEGMENT_SECONDS, Segment.end > start)
+    if end is not None:
+        query = query.filter(Segment.start < end)
+    return query.order_by(Segment.start, Segment.seq).all()
+
+def count_by_status(user_id: Optional[str] = None) -> Dict[str, int]:
+    query = db.session.query(Transcription.status, func.count(Transcription.id))
+    if user_id is not None:
+        query = query.filter(Transcription.user_id == user_id)
+    counts = dict(query.group_by(Transcription.status).all())
+    return {status: counts.get(status, 0) for status in Transcription.STATUSES}
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+def _from_legacy(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a record of the old ``transcriptions.json`` store."""
+    return {
+        'id': data['id'],
+        'file_name': data.get('file_name') or data.get('filename') or '',
+        'file_path': data.get('file_path') or '',
+        'text': data.get('text'),
+        'preview': make_preview(data.get('text')),
+        'status': data.get('status') or 'pending',
+        'error_message': data.get('error_message'),
+        'processing_time': data.get('processing_time'),
+        'device': data.get('device'),
+        'model_name': data.get('model'),
+        'language': data.get('language'),
+        'user_id': data.get('user_id'),
+        'use_gpu': True,
+        'attempts': 0,
+        'created_at': _parse_datetime(data.get('created_at')) or datetime.utcnow(),
+        'updated_at': _parse_datetime(data.get('updated_at')) or datetime.utcnow()
+    }
+
+def _batches(items: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def import_json_store(path: str) -> Tuple[int, int]:
+    """Copy records from a legacy JSON store into the table.
+
+    Records whose id already exists are skipped, so the import can be re-run.
+    Returns the number of imported and skipped records.
+    """
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path, 'r', encoding='utf-8') as f:
+        # Keep one record per id; later entries in the file win
+        items = list({item['id']: item for item in json.load(f) if item.get('id')}.values())
+
+    imported = skipped = 0
+    for batch in _batches(items, IMPORT_BATCH_SIZE):
+        ids = [item['id'] for item in batch]
+        existing = {row.id for row in db.session.query(Transcription.id).filter(Transcription.id.in_(ids))}
+        new = [item for item in batch if item['id'] not in existing]
+        if new:
+            db.session.bulk_insert_mappings(Transcription, [_from_legacy(item) for item in new])
+            db.session.bulk_insert_mappings(Segment, [
+                segment_values(item['id'], seq, segment)
+                for item in new for seq, segment in enumerate(item.get('segments') or [])
+            ])
+            for item in new:
+                if item.get('status') == 'completed':
+                    index_transcription(item['id'], item.get('text'), item.get('segments'))
+        db.session.commit()
+        imported += len(new)
+        skipped += len(batch) - len(new)
+    return imported, skipped
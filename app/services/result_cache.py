@@ -0,0 +1,234 @@
+"""Content-addressed cache of finished transcriptions.
+
+Results are stored as JSON files under ``RESULT_CACHE_PATH`` and addressed by
+the SHA-256 of a key made from the audio identity plus the model and decoding
+options that produced them:
+
+* ``audio:<sha256 of decoded 16 kHz PCM>`` for uploads,
+* ``youtube:<video id>`` for YouTube videos, an alias the downloader writes
+  for the downloaded file.
+
+Because decoding needs ffmpeg, the web tier looks uploads up by the SHA-256 of
+the uploaded bytes instead; workers record that digest as an alias of the
+decoded-audio key once they have decoded the file. Entries are evicted least
+recently used first (by file mtime, refreshed on every hit) once the cache
+grows past ``RESULT_CACHE_MAX_MB``. Each process adds what it writes to the
+size found by its last scan of the directory and only rescans once that
+passes the budget, or after ``RESULT_CACHE_RESCAN_SECONDS`` to see what other
+processes have written.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+from flask import current_app
+from app.services import metrics
+
+CHUNK_SIZE = 1024 * 1024
+
+# youtube:<id> -> file:<sha256> -> audio:<sha256>
+MAX_ALIAS_HOPS = 2
+
+YOUTUBE_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's bytes, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def audio_digest(audio) -> str:
+    """SHA-256 of a decoded float32 waveform, hashed in place rather than copied to bytes."""
+    view = memoryview(audio)
+    if not view.c_contiguous:
+        view = memoryview(audio.copy())
+    view = view.cast('B')
+    digest = hashlib.sha256()
+    for start in range(0, len(view), CHUNK_SIZE):
+        digest.update(view[start:start + CHUNK_SIZE])
+    return digest.hexdigest()
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """Extract the canonical video id from the common YouTube URL shapes."""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.') or host.startswith('m.'):
+        host = host.split('.', 1)[1]
+
+    candidate = None
+    if host == 'youtu.be':
+        candidate = parsed.path.lstrip('/').split('/')[0]
+    elif host in ('youtube.com', 'music.youtube.com', 'youtube-nocookie.com'):
+        if parsed.path == '/watch':
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        else:
+            parts = parsed.path.strip('/').split('/')
+            if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+                candidate = parts[1]
+    if candidate and YOUTUBE_ID.match(candidate):
+        return candidate
+    return None
+
+def make_key(source: str, model_name: str, options: Dict[str, Any]) -> str:
+    """Cache key for an audio identity transcribed with a model and options."""
+    return json.dumps({'source': source, 'model': model_name, 'options': options},
+                      sort_keys=True, separators=(',', ':'))
+
+class ResultCache:
+    """Size-bounded, file-backed LRU cache of transcription results."""
+
+    def __init__(self, root: str, max_bytes: int, rescan_seconds: float = 300):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self.lock = threading.Lock()
+        # Estimated size of the cache directory; None until it has been scanned
+        self.size: Optional[int] = None
+        self.scanned_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, name[:2], f'{name}.json')
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> int:
+        """Atomically write an entry; returns its size in bytes."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        replaced = False
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+            replaced = True
+            return size
+        finally:
+            if not replaced:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a key, following up to ``MAX_ALIAS_HOPS`` aliases."""
+        entry = self._read(key)
+        for _ in range(MAX_ALIAS_HOPS):
+            if entry is None or 'alias' not in entry:
+                break
+            entry = self._read(entry['alias'])
+        if entry is not None and 'alias' in entry:
+            entry = None
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.cache_lookup('result', entry is not None)
+        return entry['result'] if entry else None
+
+    def put(self, key: str, result: Dict[str, Any], aliases: Iterable[str] = ()) -> None:
+        """Store a result and point any alias keys at it."""
+        written = self._write(key, {'result': result})
+        for alias in aliases:
+            if alias != key:
+                written += self._write(alias, {'alias': key})
+        with self.lock:
+            if self.size is not None:
+                self.size += written
+            due = (self.size is None or self.size > self.max_bytes or
+                   time.monotonic() - self.scanned_at > self.rescan_seconds)
+        if due:
+            self.evict()
+
+    def alias(self, key: str, target: str) -> None:
+        """Point a key at another key's entry, which may be written later."""
+        written = self._write(key, {'alias': target})
+        with self.lock:
+            if self.size is not None:
+                self.size += written
+
+    def _entries(self):
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits its budget."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self.lock:
+            self.evictions += removed
+            self.size = total
+            self.scanned_at = time.monotonic()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = list(self._entries())
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(entries),
+                'size_bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[ResultCache]:
+    """The result cache for this process, or None when caching is disabled."""
+    global _cache
+    if not current_app.config['RESULT_CACHE_ENABLED']:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                current_app.config.get('RESULT_CACHE_PATH') or
+                os.path.join(current_app.config['STORAGE_PATH'], 'cache'),
+                current_app.config['RESULT_CACHE_MAX_MB'] * 2**20,
+                current_app.config['RESULT_CACHE_RESCAN_SECONDS']
+            )
+        return _cache
@@ -0,0 +1,193 @@
+"""Order in which queue workers claim pending transcriptions.
+
+Every job gets a virtual start time when it is queued::
+
+    schedule_at = queued_at + class delay + audio seconds * SCHEDULER_DURATION_FACTOR
+
+so short recordings and the ``interactive`` class go ahead of long recordings
+and ``bulk`` work queued around the same time. Queueing only estimates the
+duration from the file size; queue workers probe pending jobs with ffprobe
+between claims and move them to the virtual start time of their real duration.
+
+When a worker claims a job, the ``SCHEDULER_CANDIDATES`` pending jobs with the
+earliest virtual start (read from the ``(status, schedule_at)`` index) are
+considered, and each user's best candidates among them are delayed further by
+their recent usage (audio seconds processing or finished within
+``SCHEDULER_SHARE_WINDOW_SECONDS``) divided by their weight in
+``SCHEDULER_USER_WEIGHTS``, so a user with a backlog of long recordings
+alternates with everyone else instead of blocking them.
+
+Jobs are ordered by the resulting time, which ages them: a job waiting for a
+minute has caught up one minute on everything queued after it. The combined
+delay is capped at ``SCHEDULER_MAX_DELAY_SECONDS``, so no job can be overtaken
+by work queued more than that much later.
+"""
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from flask import current_app
+from sqlalchemy import func, or_, select, update
+from app import db
+from app.models.transcription import Transcription
+
+# Delay in seconds added to jobs of each priority class
+PRIORITY_DELAYS = {'interactive': 0, 'normal': 60, 'bulk': 900}
+
+# Bitrate assumed for files ffprobe reports no duration for (bytes per second of audio)
+FALLBACK_BYTES_PER_SECOND = 16000
+
+class Candidate(NamedTuple):
+    id: str
+    user_id: Optional[str]
+    priority: Optional[str]
+    queued_at: Optional[datetime]
+    schedule_at: datetime
+
+def probe_duration(path: str, timeout: float = 30) -> Optional[float]:
+    """Duration of an audio or video file in seconds, read from its container by ffprobe."""
+    try:
+        completed = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', path],
+            capture_output=True, timeout=timeout, check=True
+        )
+        return float(json.loads(completed.stdout)['format']['duration'])
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, TypeError):
+        return None
+
+def size_estimate(path: str) -> Optional[float]:
+    """Rough duration from the file size, for scheduling before the file is probed."""
+    try:
+        return os.path.getsize(path) / FALLBACK_BYTES_PER_SECOND
+    except OSError:
+        return None
+
+def estimate_duration(path: str) -> Optional[float]:
+    duration = probe_duration(path)
+    if duration is not None:
+        return duration
+    return size_estimate(path)
+
+def schedule(transcription: Transcription, now: Optional[datetime] = None) -> None:
+    """Set the queue time, priority class and virtual start time of a job about to be queued.
+
+    Without a known duration the file size stands in for it until a worker probes the file.
+    """
+    transcription.queued_at = now or datetime.utcnow()
+    if transcription.priority not in PRIORITY_DELAYS:
+        transcription.priority = current_app.config['SCHEDULER_DEFAULT_PRIORITY']
+    seconds = transcription.audio_seconds
+    if seconds is None and transcription.file_path:
+        seconds = size_estimate(transcription.file_path)
+    transcription.schedule_at = virtual_start(transcription.queued_at, transcription.priority, seconds)
+
+def virtual_start(queued_at: datetime, priority: str, seconds: Optional[float]) -> datetime:
+    config = current_app.config
+    delay = PRIORITY_DELAYS.get(priority, 0) + (seconds or 0) * config['SCHEDULER_DURATION_FACTOR']
+    return queued_at + timedelta(seconds=min(delay, config['SCHEDULER_MAX_DELAY_SECONDS']))
+
+def schedule_many(transcriptions: List[Transcription]) -> None:
+    """``schedule`` a batch of jobs with one queue time."""
+    now = datetime.utcnow()
+    for transcription in transcriptions:
+        schedule(transcription, now)
+
+def probe_pending(limit: int = 8, workers: int = 4) -> int:
+    """Probe the durations of the next pending jobs that only have an estimate, and reschedule them."""
+    jobs = db.session.execute(
+        select(Transcription.id, Transcription.file_path, Transcription.priority,
+               func.coalesce(Transcription.queued_at, Transcription.created_at))
+        .where(Transcription.status == 'pending', Transcription.audio_seconds.is_(None))
+        .order_by(func.coalesce(Transcription.schedule_at, Transcription.created_at))
+        .limit(limit)
+    ).all()
+    if not jobs:
+        db.session.rollback()
+        return 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        durations = list(pool.map(estimate_duration, [file_path for _, file_path, _, _ in jobs]))
+    for (job_id, _, priority, queued_at), seconds in zip(jobs, durations):
+        # A missing file is not probed again; the job fails once it is claimed
+        seconds = seconds if seconds is not None else 0.0
+        # Another worker may have probed or claimed it meanwhile
+        db.session.execute(
+            update(Transcription)
+            .where(Transcription.id == job_id, Transcription.status == 'pending',
+                   Transcription.audio_seconds.is_(None))
+            .values(audio_seconds=seconds, schedule_at=virtual_start(queued_at, priority, seconds))
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return len(jobs)
+
+def parse_weights(value: Optional[str]) -> Dict[str, float]:
+    """``user-id=weight`` pairs separated by commas."""
+    weights = {}
+    for item in (value or '').split(','):
+        user_id, sep, weight = item.strip().partition('=')
+        if sep:
+            weights[user_id.strip()] = float(weight)
+    return weights
+
+def candidates(per_user: int = 3, limit: int = 200) -> List[Candidate]:
+    """The first few pending jobs of every user among the ``limit`` earliest in virtual start order."""
+    earliest = (select(Transcription.id, Transcription.user_id, Transcription.priority,
+                       func.coalesce(Transcription.queued_at, Transcription.updated_at).label('queued_at'),
+                       func.coalesce(Transcription.schedule_at, Transcription.created_at).label('schedule_at'),
+                       Transcription.created_at)
+                .where(Transcription.status == 'pending')
+                .order_by(Transcription.schedule_at)
+                .limit(limit)
+                .subquery())
+    ranked = (select(earliest.c.id, earliest.c.user_id, earliest.c.priority, earliest.c.queued_at,
+                     earliest.c.schedule_at,
+                     func.row_number().over(partition_by=earliest.c.user_id,
+                                            order_by=(earliest.c.schedule_at, earliest.c.created_at)).label('rank'))
+              .subquery())
+    rows = db.session.execute(
+        select(ranked.c.id, ranked.c.user_id, ranked.c.priority, ranked.c.queued_at, ranked.c.schedule_at)
+        .where(ranked.c.rank <= per_user)
+    ).all()
+    return [Candidate(*row) for row in rows]
+
+def recent_usage(user_ids: Iterable[Optional[str]], window: float,
+                 now: Optional[datetime] = None) -> Dict[Optional[str], float]:
+    """Audio seconds each user has processing, or finished within the window."""
+    now = now or datetime.utcnow()
+    user_ids = set(user_ids)
+    users = [Transcription.user_id.in_([user_id for user_id in user_ids if user_id is not None])]
+    if None in user_ids:
+        users.append(Transcription.user_id.is_(None))
+    query = (db.session.query(Transcription.user_id, func.sum(Transcription.audio_seconds))
+             .filter(or_(*users))
+             .filter(or_(Transcription.status == 'processing',
+                         (Transcription.status == 'completed') &
+                         (Transcription.updated_at >= now - timedelta(seconds=window))))
+             .group_by(Transcription.user_id))
+    return {user_id: seconds or 0.0 for user_id, seconds in query.all()}
+
+def order(jobs: List[Candidate], usage: Dict[Optional[str], float], weights: Dict[str, float],
+          share_factor: float, max_delay: float) -> List[Candidate]:
+    """Candidates by virtual start time including each user's fair-share delay."""
+
+    def start(job: Candidate) -> datetime:
+        weight = weights.get(job.user_id, 1.0) if job.user_id is not None else 1.0
+        share = usage.get(job.user_id, 0.0) / max(weight, 1e-6) * share_factor
+        at = job.schedule_at + timedelta(seconds=share)
+        if job.queued_at is not None:
+            at = min(at, job.queued_at + timedelta(seconds=max_delay))
+        return at
+
+    return sorted(jobs, key=start)
+
+def next_jobs(per_user: int = 3) -> List[Candidate]:
+    """Pending jobs in the order workers should try to claim them."""
+    config = current_app.config
+    jobs = candidates(per_user, config['SCHEDULER_CANDIDATES'])
+    if not jobs:
+        return []
+    usage = recent_usage({job.user_id for job in jobs}, config['SCHEDULER_SHARE_WINDOW_SECONDS'])
+    return order(jobs, usage, parse_weights(config['SCHEDULER_USER_WEIGHTS']),
+                 config['SCHEDULER_SHARE_FACTOR'], config['SCHEDULER_MAX_DELAY_SECONDS'])
@@ -0,0 +1,156 @@
+"""Full-text search over finished transcripts.
+
+Every segment of a completed transcription is one row of ``transcript_search``,
+so a hit can point at the moment in the recording where a term was said. The
+table is backed by the database's own full-text index:
+
+* SQLite: an FTS5 virtual table ranked with ``bm25()``,
+* PostgreSQL: a stored ``tsvector`` column with a GIN index, ranked with
+  ``ts_rank()``.
+
+Rows are replaced whenever a transcription's result is written, so the index is
+maintained incrementally and queries never scan the transcripts themselves.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, text
+from app import db
+
+SEARCH_TABLE = 'transcript_search'
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+SNIPPET_WORDS = 16
+MAX_MATCHES = 5
+
+class SearchUnavailable(Exception):
+    """The configured database has no supported full-text index."""
+
+def dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+def segment_rows(transcription_id: str, transcript: Optional[str],
+                 segments: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Index rows of a transcription: one per segment, or the text alone without segments."""
+    rows = [{
+        'transcription_id': transcription_id,
+        'seq': i,
+        'start': segment.get('start'),
+        'end': segment.get('end'),
+        'text': segment['text'].strip()
+    } for i, segment in enumerate(segments or []) if segment.get('text', '').strip()]
+    if not rows and transcript and transcript.strip():
+        rows.append({'transcription_id': transcription_id, 'seq': 0, 'start': None, 'end': None,
+                     'text': transcript.strip()})
+    return rows
+
+def index_transcription(transcription_id: str, transcript: Optional[str],
+                        segments: Optional[List[Dict[str, Any]]]) -> None:
+    """Replace a transcription's index rows in the current transaction."""
+    if dialect() not in ('sqlite', 'postgresql'):
+        return
+    remove_transcription(transcription_id)
+    rows = segment_rows(transcription_id, transcript, segments)
+    if rows:
+        db.session.execute(text(
+            f'INSERT INTO {SEARCH_TABLE} (transcription_id, seq, start, "end", text) '
+            'VALUES (:transcription_id, :seq, :start, :end, :text)'
+        ), rows)
+
+def remove_transcription(transcription_id: str) -> None:
+    if dialect() not in ('sqlite', 'postgresql'):
+        return
+    db.session.execute(text(f'DELETE FROM {SEARCH_TABLE} WHERE transcription_id = :id'), {'id': transcription_id})
+
+def fts5_query(query: str) -> str:
+    """Quote user input as FTS5 strings so operators and punctuation cannot break the query.
+
+    Double-quoted parts stay phrases, every other word is a term; all must match.
+    """
+    parts = [phrase or word for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query)]
+    return ' '.join('"' + part.replace('"', '""') + '"' for part in parts if part.strip())
+
+def _sqlite_queries() -> Tuple[str, str]:
+    ranking = f"""
+        WITH s AS MATERIALIZED (
+            SELECT transcription_id, bm25({SEARCH_TABLE}) AS score
+            FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query
+        )
+        SELECT t.id AS id, t.file_name AS filename, -SUM(s.score) AS score, COUNT(*) AS hits
+        FROM s
+        JOIN transcriptions AS t ON t.id = s.transcription_id
+        WHERE (:user_id IS NULL OR t.user_id = :user_id)
+        GROUP BY t.id
+        ORDER BY score DESC, t.id
+        LIMIT :limit
+    """
+    matches = f"""
+        SELECT transcription_id, seq, start, "end",
+               snippet({SEARCH_TABLE}, 4, '{SNIPPET_START}', '{SNIPPET_END}', '…', {SNIPPET_WORDS}) AS snippet,
+               -bm25({SEARCH_TABLE}) AS score
+        FROM {SEARCH_TABLE}
+        WHERE {SEARCH_TABLE} MATCH :query AND transcription_id IN :ids
+    """
+    return ranking, matches
+
+def _postgresql_queries() -> Tuple[str, str]:
+    ranking = f"""
+        SELECT t.id AS id, t.file_name AS filename, SUM(ts_rank(s.document, q.query)) AS score, COUNT(*) AS hits
+        FROM {SEARCH_TABLE} AS s
+        CROSS JOIN websearch_to_tsquery('english', :query) AS q(query)
+        JOIN transcriptions AS t ON t.id = s.transcription_id
+        WHERE s.document @@ q.query AND (CAST(:user_id AS VARCHAR) IS NULL OR t.user_id = :user_id)
+        GROUP BY t.id
+        ORDER BY score DESC, t.id
+        LIMIT :limit
+    """
+    matches = f"""
+        SELECT s.transcription_id, s.seq, s.start, s."end",
+               ts_headline('english', s.text, q.query,
+                           'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords={SNIPPET_WORDS}, MinWords=4') AS snippet,
+               ts_rank(s.document, q.query) AS score
+        FROM {SEARCH_TABLE} AS s
+        CROSS JOIN websearch_to_tsquery('english', :query) AS q(query)
+        WHERE s.document @@ q.query AND s.transcription_id IN :ids
+    """
+    return ranking, matches
+
+def search_transcriptions(query: str, user_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Transcriptions matching a query, best first, with their best-matching segments.
+
+    Each result has the summed ``score`` of its matching segments, the number of
+    ``hits`` and up to ``MAX_MATCHES`` matches with a highlighted ``snippet`` and
+    the segment's ``start`` and ``end`` in seconds, in recording order.
+    """
+    name = dialect()
+    if name == 'sqlite':
+        query = fts5_query(query)
+        ranking, matches = _sqlite_queries()
+    elif name == 'postgresql':
+        ranking, matches = _postgresql_queries()
+    else:
+        raise SearchUnavailable(f"Full-text search is not supported on {name}")
+    if not query.strip():
+        return []
+
+    ranked = db.session.execute(text(ranking), {'query': query, 'user_id': user_id, 'limit': limit}).all()
+    if not ranked:
+        return []
+
+    results = {row.id: {
+        'id': row.id,
+        'filename': row.filename,
+        'score': float(row.score),
+        'hits': row.hits,
+        'matches': []
+    } for row in ranked}
+    rows = db.session.execute(
+        text(matches).bindparams(bindparam('ids', expanding=True)),
+        {'query': query, 'ids': list(results)}
+    ).all()
+    for row in sorted(rows, key=lambda row: -row.score):
+        result = results[row.transcription_id]
+        if len(result['matches']) < MAX_MATCHES:
+            result['matches'].append({'seq': row.seq, 'start': row.start, 'end': row.end, 'snippet': row.snippet})
+    for result in results.values():
+        result['matches'].sort(key=lambda match: match['seq'])
+    return [results[row.id] for row in ranked]
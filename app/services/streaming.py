@@ -0,0 +1,377 @@
+"""Live transcription sessions fed with audio chunks.
+
+A session keeps a rolling buffer of the audio that has not been committed yet.
+Every time ``STREAM_STEP_SECONDS`` of new audio has arrived, the buffer is
+decoded again with word timestamps. Words that two consecutive decodes agree
+on are committed (the LocalAgreement policy used by whisper_streaming). The
+rest is returned as a tentative hypothesis that may still change. Once the
+buffer grows past ``STREAM_BUFFER_SECONDS``, audio up to the last committed
+word is dropped from it, so every decode covers only the uncommitted tail plus
+a short committed context that is passed as the prompt.
+
+Sessions hold decoder state and an open recording, so they live in a single
+process. That is the model host when one is configured, because it already
+holds the weights; otherwise it is the web process, which is only allowed when
+the web tier runs a single worker. The web tier reaches them through
+:func:`call`. Decodes hold an inference slot; a push that finds every slot
+busy only buffers its audio for a later decode. Each session records its audio to a WAV file in
+``UPLOAD_FOLDER``. When it is closed, the web tier saves the committed text as
+the session's ``Transcription``. If a session is abandoned, its job lease
+lapses and a queue worker transcribes the recording instead.
+"""
+import re
+import subprocess
+import threading
+import time
+import wave
+from typing import Any, Dict, List, Optional
+import numpy as np
+from flask import current_app
+from app.services.events import EventLog
+from app.services.governor import Saturated, inference_slot
+
+SAMPLE_RATE = 16000
+AUDIO_FORMATS = ('pcm_s16le', 'pcm_f32le', 'opus')
+MAX_SEGMENT_WORDS = 30
+
+class StreamError(Exception):
+    """Raised for invalid streaming requests; carries the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def normalize(word: str) -> str:
+    return re.sub(r'[^\w]', '', word.lower())
+
+class FfmpegDecoder:
+    """Decodes a containerised stream (Ogg/WebM Opus) fed in arbitrary chunks."""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ['ffmpeg', '-nostdin', '-loglevel', 'error', '-fflags', 'nobuffer', '-i', 'pipe:0',
+             '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self.output = bytearray()
+        self.lock = threading.Lock()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self) -> None:
+        for chunk in iter(lambda: self.process.stdout.read1(65536), b''):
+            with self.lock:
+                self.output.extend(chunk)
+
+    def _take(self) -> bytes:
+        with self.lock:
+            usable = len(self.output) // 2 * 2
+            data = bytes(self.output[:usable])
+            del self.output[:usable]
+        return data
+
+    def feed(self, data: bytes) -> bytes:
+        """Write a chunk and return whatever PCM ffmpeg has produced so far."""
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            raise StreamError('Audio stream could not be decoded', 415)
+        return self._take()
+
+    def close(self) -> bytes:
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait(timeout=30)
+        self.reader.join(timeout=5)
+        return self._take()
+
+class StreamingSession:
+    """Rolling-buffer decoder for one live audio stream."""
+
+    def __init__(self, session_id: str, model_name: str, device: str, language: Optional[str],
+                 audio_format: str, recording_path: str, step: float, buffer_seconds: float):
+        self.id = session_id
+        self.model_name = model_name
+        self.device = device
+        self.language = language
+        self.audio_format = audio_format
+        self.recording_path = recording_path
+        self.step = int(step * SAMPLE_RATE)
+        self.buffer_seconds = buffer_seconds
+        self.decoder = FfmpegDecoder() if audio_format == 'opus' else None
+        self.recording = wave.open(recording_path, 'wb')
+        self.recording.setnchannels(1)
+        self.recording.setsampwidth(2)
+        self.recording.setframerate(SAMPLE_RATE)
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.audio_start = 0.0  # stream time of audio[0], in seconds
+        self.received = 0
+        self.undecoded = 0
+        self.committed: List[Dict[str, Any]] = []
+        self.tentative: List[Dict[str, Any]] = []
+        self.events = EventLog.for_transcription(session_id)
+        self.lock = threading.Lock()
+        self.last_active = time.time()
+
+    def _pcm(self, data: bytes) -> np.ndarray:
+        if self.audio_format == 'pcm_f32le':
+            usable = len(data) // 4 * 4
+            return np.frombuffer(data[:usable], np.float32)
+        if self.decoder is not None:
+            data = self.decoder.feed(data)
+        usable = len(data) // 2 * 2
+        return np.frombuffer(data[:usable], np.int16).astype(np.float32) / 32768.0
+
+    def _append(self, samples: np.ndarray) -> None:
+        self.recording.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+        self.audio = np.concatenate([self.audio, samples])
+        self.received += len(samples)
+        self.undecoded += len(samples)
+
+    def _prompt(self) -> Optional[str]:
+        # Committed text just before the buffer keeps the wording consistent
+        context = [w['word'] for w in self.committed if w['end'] <= self.audio_start][-40:]
+        return ''.join(context) or None
+
+    def _decode(self, registry, wait: bool = True) -> List[Dict[str, Any]]:
+        with registry.use(self.model_name, self.device) as loaded, inference_slot(self.device, wait):
+            result = loaded.model.transcribe(
+                self.audio,
+                language=self.language,
+                task='transcribe',
+                fp16=loaded.key.precision == 'fp16',
+                word_timestamps=True,
+                condition_on_previous_text=False,
+                initial_prompt=self._prompt(),
+                verbose=None
+            )
+        words = [{
+            'word': w['word'],
+            'start': round(w['start'] + self.audio_start, 3),
+            'end': round(w['end'] + self.audio_start, 3)
+        } for segment in result['segments'] for w in segment.get('words', [])]
+
+        # Drop words before the commit point and any repeat of the committed tail
+        committed_until = self.committed[-1]['end'] if self.committed else 0.0
+        words = [w for w in words if w['start'] > committed_until - 0.1]
+        tail = [normalize(w['word']) for w in self.committed[-5:]]
+        for n in range(min(len(tail), len(words)), 0, -1):
+            if tail[-n:] == [normalize(w['word']) for w in words[:n]]:
+                words = words[n:]
+                break
+        return words
+
+    def _commit(self, words: List[Dict[str, Any]]) -> None:
+        if not words:
+            return
+        self.committed.extend(words)
+        self.events.emit('segment', {
+            'start': words[0]['start'],
+            'end': words[-1]['end'],
+            'text': ''.join(w['word'] for w in words)
+        })
+
+    def _trim(self) -> None:
+        if len(self.audio) / SAMPLE_RATE <= self.buffer_seconds:
+            return
+        if not self.committed or self.committed[-1]['end'] <= self.audio_start:
+            # Nothing committed inside the buffer; commit the hypothesis rather than grow forever
+            if len(self.audio) / SAMPLE_RATE <= 2 * self.buffer_seconds:
+                return
+            self._commit(self.tentative)
+            self.tentative = []
+        cut = int((self.committed[-1]['end'] - self.audio_start) * SAMPLE_RATE) if self.committed else len(self.audio)
+        cut = min(max(cut, 0), len(self.audio))
+        self.audio = self.audio[cut:]
+        self.audio_start += cut / SAMPLE_RATE
+
+    def _update(self, registry, wait: bool = True) -> List[Dict[str, Any]]:
+        words = self._decode(registry, wait)
+        agreed = []
+        for previous, current in zip(self.tentative, words):
+            if normalize(previous['word']) != normalize(current['word']):
+                break
+            agreed.append(current)
+        self._commit(agreed)
+        self.tentative = words[len(agreed):]
+        self.undecoded = 0
+        self._trim()
+        return agreed
+
+    def state(self, committed: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'committed': ''.join(w['word'] for w in committed),
+            'hypothesis': ''.join(w['word'] for w in self.tentative),
+            'committed_until': self.committed[-1]['end'] if self.committed else 0.0,
+            'received_seconds': round(self.received / SAMPLE_RATE, 3)
+        }
+
+    def push(self, data: bytes, registry) -> Dict[str, Any]:
+        """Add an audio chunk; re-decode the tail once enough new audio has arrived."""
+        self._append(self._pcm(data))
+        committed = []
+        if self.undecoded >= self.step:
+            try:
+                committed = self._update(registry, wait=False)
+            except Saturated:
+                # Keep buffering; the next push decodes everything that arrived meanwhile
+                pass
+            else:
+                self.events.emit('hypothesis', {'text': ''.join(w['word'] for w in self.tentative)})
+        self.last_active = time.time()
+        return self.state(committed)
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Group committed words into segments at sentence ends and pauses."""
+        segments: List[Dict[str, Any]] = []
+        current: List[Dict[str, Any]] = []
+        for word in self.committed:
+            if current and (word['start'] - current[-1]['end'] > 1.0 or len(current) >= MAX_SEGMENT_WORDS):
+                segments.append(current)
+                current = []
+            current.append(word)
+            if word['word'].strip().endswith(('.', '?', '!')):
+                segments.append(current)
+                current = []
+        if current:
+            segments.append(current)
+        return [{
+            'id': i,
+            'start': words[0]['start'],
+            'end': words[-1]['end'],
+            'text': ''.join(w['word'] for w in words),
+            'words': words
+        } for i, words in enumerate(segments)]
+
+    def finish(self, registry) -> Dict[str, Any]:
+        """Decode what is left, commit the final hypothesis and close the recording."""
+        if self.decoder is not None:
+            tail = self.decoder.close()
+            self.decoder = None
+            self._append(np.frombuffer(tail, np.int16).astype(np.float32) / 32768.0)
+        if self.undecoded and len(self.audio):
+            self._update(registry)
+        self._commit(self.tentative)
+        self.tentative = []
+        self.close()
+        return {
+            'text': ''.join(w['word'] for w in self.committed),
+            'segments': self.segments(),
+            'language': self.language or 'en',
+            'duration': self.received / SAMPLE_RATE,
+            'device': self.device,
+            'model': self.model_name
+        }
+
+    def close(self) -> None:
+        if self.decoder is not None:
+            self.decoder.close()
+            self.decoder = None
+        if self.recording is not None:
+            self.recording.close()
+            self.recording = None
+
+class SessionManager:
+    """Live sessions owned by this process, expired after a period of inactivity."""
+
+    def __init__(self, idle_timeout: float, max_sessions: int):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, StreamingSession] = {}
+        self.lock = threading.Lock()
+
+    def expire(self) -> None:
+        cutoff = time.time() - self.idle_timeout
+        with self.lock:
+            # A session decoding right now holds its lock and is not idle
+            idle = [s for s in self.sessions.values() if s.last_active < cutoff and not s.lock.locked()]
+            for session in idle:
+                del self.sessions[session.id]
+        for session in idle:
+            with session.lock:
+                session.close()
+
+    def open(self, session: StreamingSession) -> None:
+        self.expire()
+        with self.lock:
+            if len(self.sessions) >= self.max_sessions:
+                session.close()
+                raise StreamError('Too many live sessions', 503)
+            self.sessions[session.id] = session
+
+    def get(self, session_id: str) -> StreamingSession:
+        self.expire()
+        with self.lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            raise StreamError('Live session not found or expired', 404)
+        return session
+
+    def pop(self, session_id: str) -> StreamingSession:
+        session = self.get(session_id)
+        with self.lock:
+            self.sessions.pop(session_id, None)
+        return session
+
+_manager: Optional[SessionManager] = None
+_manager_lock = threading.Lock()
+
+def get_manager() -> SessionManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager(current_app.config['STREAM_IDLE_SECONDS'],
+                                      current_app.config['STREAM_MAX_SESSIONS'])
+        return _manager
+
+def handle(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one session action in the process that owns the sessions."""
+    from app.services.model_registry import get_registry, resolve_device
+
+    manager = get_manager()
+    action = request.get('action')
+    try:
+        if action == 'open':
+            if request['audio_format'] not in AUDIO_FORMATS:
+                raise StreamError(f"Unsupported audio format. Choose one of: {', '.join(AUDIO_FORMATS)}")
+            session = StreamingSession(
+                request['session_id'],
+                request['model_name'],
+                resolve_device(request.get('use_gpu', True)),
+                request.get('language'),
+                request['audio_format'],
+                request['recording_path'],
+                current_app.config['STREAM_STEP_SECONDS'],
+                current_app.config['STREAM_BUFFER_SECONDS']
+            )
+            manager.open(session)
+            return session.state([])
+        if action == 'push':
+            session = manager.get(request['session_id'])
+            with session.lock:
+                return session.push(request['data'], get_registry())
+        if action == 'close':
+            session = manager.pop(request['session_id'])
+            with session.lock:
+                return session.finish(get_registry())
+        raise StreamError(f"Unknown session action: {action}")
+    except StreamError as e:
+        return {'error': str(e), 'status_code': e.status_code}
+
+def call(action: str, **kwargs) -> Dict[str, Any]:
+    """Run a session action locally or on the model host, raising StreamError on failure."""
+    from app.services.model_host import get_client
+
+    client = get_client()
+    if client is None and action == 'open' and current_app.config['WORKERS'] > 1:
+        # Later pushes could reach another worker, which does not have the session
+        raise StreamError('Live sessions need a model host (MODEL_HOST_ADDRESS) or a single web worker', 503)
+    request = dict(kwargs, action=action)
+    result = handle(request) if client is None else client.request(dict(request, op='stream'))
+    if 'error' in result:
+        raise StreamError(result['error'], result.get('status_code', 400))
+    return result
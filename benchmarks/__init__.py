@@ -0,0 +1,10 @@
+"""Reproducible CPU benchmarks of the transcription pipeline.
+
+Synthetic recordings are generated from fixed seeds, so every run transcribes
+exactly the same samples. Each (model, recording) case runs in a fresh process
+and reports its real-time factor, time to the first segment, model load time
+and peak RSS as JSON; ``compare`` checks such a report against a baseline.
+
+    python -m benchmarks run --models tiny base --lengths 30 120 --output results.json
+    python -m benchmarks compare results.json baseline.json
+"""
@@ -0,0 +1,66 @@
+import json
+import sys
+import click
+from benchmarks.audio import DEFAULT_SEED, KINDS
+from benchmarks.compare import compare, format_changes
+
+@click.group()
+def cli():
+    """Transcription pipeline benchmarks."""
+
+@cli.command('run')
+@click.option('--models', '-m', multiple=True, default=('tiny', 'base'), show_default=True,
+              help='Models to benchmark; repeat the option or separate with spaces.')
+@click.option('--audio', '-a', 'kinds', multiple=True, type=click.Choice(sorted(KINDS)),
+              default=tuple(sorted(KINDS)), show_default=True, help='Kinds of synthetic recording.')
+@click.option('--lengths', '-l', multiple=True, type=float, default=(30.0, 120.0, 600.0), show_default=True,
+              help='Recording lengths in seconds.')
+@click.option('--seed', type=int, default=DEFAULT_SEED, show_default=True)
+@click.option('--repeat', type=int, default=1, show_default=True,
+              help='Transcriptions per case; the median is reported.')
+@click.option('--batched/--no-batched', default=None, help='Override BATCH_DECODING_ENABLED.')
+@click.option('--long-audio/--no-long-audio', default=None, help='Override LONG_AUDIO_ENABLED.')
+@click.option('--audio-dir', type=click.Path(file_okay=False), default=None,
+              help='Where generated recordings are kept between runs.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), default=None,
+              help='Write the JSON report here instead of stdout.')
+def run_command(models, kinds, lengths, seed, repeat, batched, long_audio, audio_dir, output):
+    """Transcribe synthetic recordings with each model on CPU and report the measurements."""
+    from benchmarks.runner import run
+
+    overrides = {}
+    if batched is not None:
+        overrides['BATCH_DECODING_ENABLED'] = batched
+    if long_audio is not None:
+        overrides['LONG_AUDIO_ENABLED'] = long_audio
+    models = [name for value in models for name in value.split()]
+    report = run(models, list(kinds), list(lengths), seed, repeat, audio_dir, overrides,
+                 log=lambda line: click.echo(line, err=True))
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        click.echo(f'Wrote {output}', err=True)
+    else:
+        click.echo(text)
+
+@cli.command('compare')
+@click.argument('current', type=click.File('r'))
+@click.argument('baseline', type=click.File('r'))
+@click.option('--tolerance', type=float, default=0.1, show_default=True,
+              help='Allowed relative slowdown before a change counts as a regression.')
+def compare_command(current, baseline, tolerance):
+    """Compare a report with a baseline; exits with status 1 on regressions."""
+    changes = compare(json.load(current), json.load(baseline), tolerance)
+    if not changes:
+        click.echo('No cases in common with the baseline')
+        sys.exit(2)
+    click.echo(format_changes(changes))
+    regressions = [change for change in changes if change.regression]
+    if regressions:
+        click.echo(f'{len(regressions)} regression(s) beyond {tolerance:.0%}')
+        sys.exit(1)
+    click.echo('No regressions')
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,102 @@
+"""Deterministic synthetic recordings.
+
+Real speech cannot be shipped with the repo, so recordings are synthesized:
+syllables of harmonic "vowels" shaped by formant peaks, separated by noise
+bursts standing in for consonants and by pauses. ``speech`` keeps pauses short,
+``silence`` is mostly quiet with sparse bursts of speech, which exercises the
+silence-aware window cutting. The same kind, length and seed always produce
+the same samples.
+"""
+import hashlib
+import os
+import wave
+from typing import Callable, Dict, Tuple
+import numpy as np
+
+SAMPLE_RATE = 16000
+DEFAULT_SEED = 1234
+
+# F1, F2, F3 in Hz of a few vowels
+VOWELS = (
+    (730, 1090, 2440),
+    (530, 1840, 2480),
+    (270, 2290, 3010),
+    (570, 840, 2410),
+    (300, 870, 2240),
+)
+
+def _syllable(rng: np.random.Generator, seconds: float) -> np.ndarray:
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    f0 = rng.uniform(100, 220) * (1 + 0.08 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    formants = VOWELS[rng.integers(len(VOWELS))]
+
+    voiced = np.zeros(n)
+    for harmonic in range(1, int(4000 / f0.max()) + 1):
+        frequency = harmonic * f0.mean()
+        gain = sum(np.exp(-((frequency - f) / 120) ** 2) / (i + 1) for i, f in enumerate(formants))
+        voiced += (gain + 0.02) * np.sin(harmonic * phase)
+    voiced *= np.hanning(n)
+
+    # A short fricative onset
+    onset = int(n * rng.uniform(0.1, 0.3))
+    noise = np.diff(rng.standard_normal(onset + 1)) * 0.15 * np.hanning(onset)
+    voiced[:onset] += noise
+    return voiced / (np.abs(voiced).max() or 1)
+
+def _render(seconds: float, seed: int, pause: Tuple[float, float], words: Tuple[int, int],
+            gap: Tuple[float, float]) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    audio = np.zeros(total)
+    position = int(rng.uniform(*gap) * SAMPLE_RATE)
+    while position < total:
+        # A phrase: a few words of a few syllables each
+        for _ in range(rng.integers(*words)):
+            for _ in range(rng.integers(1, 4)):
+                syllable = _syllable(rng, rng.uniform(0.12, 0.3)) * rng.uniform(0.3, 0.8)
+                end = min(position + len(syllable), total)
+                audio[position:end] += syllable[:end - position]
+                position = end
+            position += int(rng.uniform(*pause) * SAMPLE_RATE)
+            if position >= total:
+                break
+        position += int(rng.uniform(*gap) * SAMPLE_RATE)
+    audio += rng.standard_normal(total) * 1e-3
+    return np.clip(audio, -1, 1).astype(np.float32)
+
+def speech(seconds: float, seed: int = DEFAULT_SEED) -> np.ndarray:
+    """Continuous speech-like audio with short pauses between words and phrases."""
+    return _render(seconds, seed, pause=(0.05, 0.2), words=(4, 12), gap=(0.3, 0.8))
+
+def silence(seconds: float, seed: int = DEFAULT_SEED) -> np.ndarray:
+    """Mostly silent audio with sparse short phrases."""
+    return _render(seconds, seed, pause=(0.1, 0.3), words=(1, 4), gap=(3.0, 9.0))
+
+KINDS: Dict[str, Callable[[float, int], np.ndarray]] = {
+    'speech': speech,
+    'silence': silence
+}
+
+def write_wav(audio: np.ndarray, path: str) -> None:
+    """Write float samples as 16 kHz mono 16-bit PCM."""
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((audio * 32767).astype('<i2').tobytes())
+
+def recording(kind: str, seconds: float, directory: str, seed: int = DEFAULT_SEED) -> Tuple[str, str]:
+    """Path of a generated WAV file (written once per kind, length and seed) and its SHA-256."""
+    path = os.path.join(directory, f'{kind}-{seconds:g}s-{seed}.wav')
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        write_wav(KINDS[kind](seconds, seed), tmp_path)
+        os.replace(tmp_path, path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return path, digest.hexdigest()
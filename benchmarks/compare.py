@@ -0,0 +1,57 @@
+"""Compare a benchmark report against a stored baseline."""
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# Every metric is lower-is-better
+METRICS = ('rtf', 'first_segment_seconds', 'model_load_seconds', 'peak_rss_mb')
+
+# Differences below these are timer or allocator noise, whatever the ratio
+ABSOLUTE_SLACK = {
+    'rtf': 0.01,
+    'first_segment_seconds': 0.25,
+    'model_load_seconds': 0.25,
+    'peak_rss_mb': 32
+}
+
+class Change(NamedTuple):
+    case: Tuple[str, str, float]
+    metric: str
+    baseline: float
+    current: float
+    regression: bool
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+def _cases(report: Dict[str, Any]) -> Dict[Tuple[str, str, float], Dict[str, Any]]:
+    return {(r['model'], r['audio'], float(r['seconds'])): r for r in report['results']
+            if 'skipped' not in r and 'error' not in r}
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Change]:
+    """Per-metric changes of the cases present in both reports.
+
+    A change is a regression when the current value exceeds the baseline by
+    more than ``tolerance`` (a fraction) and by more than the metric's slack.
+    """
+    changes = []
+    old_cases = _cases(baseline)
+    for case, new in _cases(current).items():
+        old = old_cases.get(case)
+        if old is None:
+            continue
+        for metric in METRICS:
+            if new.get(metric) is None or old.get(metric) is None:
+                continue
+            regression = (new[metric] > old[metric] * (1 + tolerance) and
+                          new[metric] - old[metric] > ABSOLUTE_SLACK[metric])
+            changes.append(Change(case, metric, old[metric], new[metric], regression))
+    return changes
+
+def format_changes(changes: List[Change]) -> str:
+    lines = [f"{'case':<28} {'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for change in changes:
+        model, audio, seconds = change.case
+        lines.append(f"{f'{model}/{audio}/{seconds:g}s':<28} {change.metric:<22} "
+                     f"{change.baseline:>10.3f} {change.current:>10.3f} {change.ratio - 1:>+8.1%}"
+                     f"{'  REGRESSION' if change.regression else ''}")
+    return '\n'.join(lines)
@@ -0,0 +1,136 @@
+"""Run benchmark cases and collect their measurements.
+
+Every case runs in a freshly spawned process so that model load time is a
+cold load and peak RSS belongs to that case alone. Inside it the app is
+created with the result cache, the decoded-audio store and the model host
+turned off, and the recording goes through ``transcribe_local`` exactly as a
+queue worker would run it.
+"""
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+from benchmarks.audio import recording
+
+REPORT_VERSION = 1
+
+class TimingReporter:
+    """Stands in for an event log reporter and remembers when the first segment arrived."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_segment: Optional[float] = None
+
+    def progress(self, done: float, total: float) -> None:
+        pass
+
+    def segments(self, segments: List[Dict[str, Any]]) -> None:
+        if self.first_segment is None and any(s.get('text', '').strip() for s in segments):
+            self.first_segment = time.perf_counter() - self.started
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process or any of its finished children."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / 2**20 if sys.platform == 'darwin' else peak / 1024, 1)
+
+def _run_case(model: str, path: str, seconds: float, repeat: int, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    from app import create_app
+    from app.api.transcription import transcribe_local
+    from app.services.model_registry import ModelNotAvailable, get_registry
+
+    app = create_app()
+    app.config.update(overrides)
+    with app.app_context():
+        try:
+            loaded = get_registry().get(model, 'cpu')
+        except ModelNotAvailable as e:
+            return {'skipped': str(e)}
+
+        runs = []
+        for _ in range(repeat):
+            reporter = TimingReporter()
+            result = transcribe_local(path, model, use_gpu=False, reporter=reporter)
+            if 'error' in result:
+                return {'error': result['error']}
+            processing = time.perf_counter() - reporter.started
+            # Pipelines that report no partial segments deliver the first one with the result
+            runs.append((processing, reporter.first_segment or processing, len(result['segments'])))
+
+    processing = statistics.median(run[0] for run in runs)
+    return {
+        'rtf': round(processing / seconds, 4),
+        'processing_seconds': round(processing, 3),
+        'first_segment_seconds': round(statistics.median(run[1] for run in runs), 3),
+        'model_load_seconds': round(loaded.load_time, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'segments': runs[-1][2]
+    }
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import torch
+    import whisper
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'whisper': getattr(whisper, '__version__', None),
+        'numpy': numpy.__version__
+    }
+
+def run(models: List[str], kinds: List[str], lengths: List[float], seed: int, repeat: int,
+        audio_dir: Optional[str] = None, overrides: Optional[Dict[str, Any]] = None,
+        log=print) -> Dict[str, Any]:
+    """Benchmark every model on every generated recording and return the report."""
+    audio_dir = audio_dir or os.path.join(tempfile.gettempdir(), 'audioink-benchmarks')
+    storage = tempfile.mkdtemp(prefix='audioink-bench-')
+    overrides = dict({
+        'RESULT_CACHE_ENABLED': False,
+        'DECODED_AUDIO_ENABLED': False,
+        'MODEL_HOST_ADDRESS': None,
+        'STORAGE_PATH': storage
+    }, **(overrides or {}))
+
+    results = []
+    context = get_context('spawn')
+    for model in models:
+        for kind in kinds:
+            for seconds in lengths:
+                path, digest = recording(kind, seconds, audio_dir, seed)
+                log(f'{model} {kind} {seconds:g}s ...')
+                with context.Pool(1) as pool:
+                    measured = pool.apply(_run_case, (model, path, seconds, repeat, overrides))
+                results.append(dict({
+                    'model': model,
+                    'audio': kind,
+                    'seconds': seconds,
+                    'audio_sha256': digest
+                }, **measured))
+                log(f'  {measured}')
+
+    return {
+        'version': REPORT_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'environment': environment(),
+        'settings': {
+            'seed': seed,
+            'repeat': repeat,
+            'overrides': {key: value for key, value in overrides.items() if key != 'STORAGE_PATH'}
+        },
+        'results': results
+    }
@@ -0,0 +1,38 @@
+# Gunicorn reads this file from the working directory; command line options still apply.
+import os
+
+# MODEL_PRELOAD=true loads and warms WHISPER_MODEL once in the master; the forked
+# workers share its weights instead of each loading them on their first request.
+preload_app = os.environ.get('MODEL_PRELOAD', 'false').lower() == 'true'
+
+if preload_app:
+    # Check for GPUs through NVML so the master never initialises CUDA before forking
+    os.environ.setdefault('PYTORCH_NVML_BASED_CUDA_CHECK', '1')
+
+# Event streams stay open for the length of a job; threads keep them from
+# holding a whole worker process each.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from app.services.model_registry import preload_for_fork
+
+    app = server.app.wsgi()
+    with app.app_context():
+        preload_for_fork(app.config['WHISPER_MODEL'])
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from app import db
+
+    # Connections must not be shared with the master or sibling workers
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+
+def child_exit(server, worker):
+    # Per-process gauges of a recycled or crashed worker must not be reported as live
+    from app.services.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
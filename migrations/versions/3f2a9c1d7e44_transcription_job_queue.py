@@ -0,0 +1,34 @@
+"""Transcription job queue columns
+
+Revision ID: 3f2a9c1d7e44
+Revises: b5da8de4e9e7
+Create Date: 2025-04-18 09:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e44'
+down_revision = 'b5da8de4e9e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('segments', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('worker_id', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('worker_id')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('segments')
@@ -0,0 +1,28 @@
+"""Per-transcription model selection
+
+Revision ID: 8d41c6b2a913
+Revises: 3f2a9c1d7e44
+Create Date: 2025-04-22 14:03:52.118640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c6b2a913'
+down_revision = '3f2a9c1d7e44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('model_name', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('use_gpu', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('use_gpu')
+        batch_op.drop_column('model_name')
@@ -0,0 +1,29 @@
+"""Time a job was last queued
+
+Revision ID: a7d2e9c4b518
+Revises: f1c9a4e6b782
+Create Date: 2025-05-26 10:41:17.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e9c4b518'
+down_revision = 'f1c9a4e6b782'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('queued_at', sa.DateTime(), nullable=True))
+
+    # Until now the queue time was read from updated_at
+    op.execute("UPDATE transcriptions SET queued_at = updated_at WHERE status = 'pending'")
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('queued_at')
@@ -0,0 +1,79 @@
+"""Full-text search index over transcript segments
+
+Revision ID: a91d3e6f0c52
+Revises: f4c1a8e3b297
+Create Date: 2025-05-02 10:41:08.512937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d3e6f0c52'
+down_revision = 'f4c1a8e3b297'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            'CREATE VIRTUAL TABLE transcript_search USING fts5('
+            'transcription_id UNINDEXED, seq UNINDEXED, start UNINDEXED, "end" UNINDEXED, text, '
+            "tokenize = 'porter unicode61')"
+        )
+        op.execute(
+            'INSERT INTO transcript_search (transcription_id, seq, start, "end", text) '
+            "SELECT t.id, s.key, json_extract(s.value, '$.start'), json_extract(s.value, '$.end'), "
+            "trim(json_extract(s.value, '$.text')) "
+            'FROM transcriptions AS t, json_each(t.segments) AS s '
+            "WHERE t.status = 'completed' AND trim(coalesce(json_extract(s.value, '$.text'), '')) != ''"
+        )
+        op.execute(
+            'INSERT INTO transcript_search (transcription_id, seq, start, "end", text) '
+            'SELECT id, 0, NULL, NULL, trim(text) FROM transcriptions '
+            "WHERE status = 'completed' AND trim(coalesce(text, '')) != '' "
+            'AND id NOT IN (SELECT transcription_id FROM transcript_search)'
+        )
+    elif dialect == 'postgresql':
+        op.create_table(
+            'transcript_search',
+            sa.Column('transcription_id', sa.String(length=36), nullable=False),
+            sa.Column('seq', sa.Integer(), nullable=False),
+            sa.Column('start', sa.Float(), nullable=True),
+            sa.Column('end', sa.Float(), nullable=True),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('document', postgresql.TSVECTOR(),
+                      sa.Computed("to_tsvector('english', text)", persisted=True), nullable=True),
+            sa.ForeignKeyConstraint(['transcription_id'], ['transcriptions.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('transcription_id', 'seq')
+        )
+        op.create_index('ix_transcript_search_document', 'transcript_search', ['document'],
+                        unique=False, postgresql_using='gin')
+        op.execute(
+            'INSERT INTO transcript_search (transcription_id, seq, start, "end", text) '
+            "SELECT t.id, s.seq - 1, (s.value->>'start')::float, (s.value->>'end')::float, "
+            "trim(s.value->>'text') "
+            'FROM transcriptions AS t '
+            "CROSS JOIN LATERAL json_array_elements(CASE WHEN json_typeof(t.segments) = 'array' "
+            "THEN t.segments ELSE '[]'::json END) WITH ORDINALITY AS s(value, seq) "
+            "WHERE t.status = 'completed' AND trim(coalesce(s.value->>'text', '')) != ''"
+        )
+        op.execute(
+            'INSERT INTO transcript_search (transcription_id, seq, start, "end", text) '
+            'SELECT id, 0, NULL, NULL, trim(text) FROM transcriptions '
+            "WHERE status = 'completed' AND trim(coalesce(text, '')) != '' "
+            'AND id NOT IN (SELECT transcription_id FROM transcript_search)'
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE transcript_search')
+    elif dialect == 'postgresql':
+        op.drop_index('ix_transcript_search_document', table_name='transcript_search')
+        op.drop_table('transcript_search')
@@ -0,0 +1,109 @@
+"""Move transcript segments from a JSON column into their own table
+
+Revision ID: b3e8f2c17d46
+Revises: a91d3e6f0c52
+Create Date: 2025-05-05 14:03:51.228704
+
+"""
+import json
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f2c17d46'
+down_revision = 'a91d3e6f0c52'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+
+transcriptions = sa.table(
+    'transcriptions',
+    sa.column('id', sa.String),
+    sa.column('segments', sa.JSON)
+)
+
+segments = sa.table(
+    'segments',
+    sa.column('transcription_id', sa.String),
+    sa.column('seq', sa.Integer),
+    sa.column('start', sa.Float),
+    sa.column('end', sa.Float),
+    sa.column('text', sa.Text),
+    sa.column('avg_logprob', sa.Float),
+    sa.column('no_speech_prob', sa.Float),
+    sa.column('tokens', sa.LargeBinary)
+)
+
+
+def _decode(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def upgrade():
+    op.create_table(
+        'segments',
+        sa.Column('transcription_id', sa.String(length=36), nullable=False),
+        sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('start', sa.Float(), nullable=True),
+        sa.Column('end', sa.Float(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('avg_logprob', sa.Float(), nullable=True),
+        sa.Column('no_speech_prob', sa.Float(), nullable=True),
+        sa.Column('tokens', sa.LargeBinary(), nullable=True),
+        sa.ForeignKeyConstraint(['transcription_id'], ['transcriptions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('transcription_id', 'seq')
+    )
+    op.create_index('ix_segments_transcription_id_start', 'segments', ['transcription_id', 'start'], unique=False)
+
+    bind = op.get_bind()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(transcriptions.c.id, transcriptions.c.segments)
+            .where(transcriptions.c.id > last_id, transcriptions.c.segments.isnot(None))
+            .order_by(transcriptions.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        values = [{
+            'transcription_id': row.id,
+            'seq': seq,
+            'start': segment.get('start'),
+            'end': segment.get('end'),
+            'text': segment.get('text') or '',
+            'avg_logprob': segment.get('avg_logprob'),
+            'no_speech_prob': segment.get('no_speech_prob'),
+            'tokens': np.asarray(segment['tokens'], dtype='<u2').tobytes() if segment.get('tokens') else None
+        } for row in rows for seq, segment in enumerate(_decode(row.segments) or [])]
+        if values:
+            bind.execute(segments.insert(), values)
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('segments')
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('segments', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    grouped = {}
+    for row in bind.execute(sa.select(segments).order_by(segments.c.transcription_id, segments.c.seq)):
+        grouped.setdefault(row.transcription_id, []).append({
+            'id': row.seq,
+            'start': row.start,
+            'end': row.end,
+            'text': row.text,
+            'tokens': np.frombuffer(row.tokens, dtype='<u2').tolist() if row.tokens else [],
+            'avg_logprob': row.avg_logprob,
+            'no_speech_prob': row.no_speech_prob
+        })
+    for transcription_id, items in grouped.items():
+        bind.execute(transcriptions.update().where(transcriptions.c.id == transcription_id).values(segments=items))
+
+    op.drop_index('ix_segments_transcription_id_start', table_name='segments')
+    op.drop_table('segments')
@@ -0,0 +1,28 @@
+"""Content revision of transcriptions for cached exports
+
+Revision ID: c6a0d9b4e813
+Revises: b3e8f2c17d46
+Create Date: 2025-05-07 11:22:35.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6a0d9b4e813'
+down_revision = 'b3e8f2c17d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("UPDATE transcriptions SET revision = 1 WHERE status = 'completed'")
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('revision')
@@ -0,0 +1,26 @@
+"""Content hash of uploaded audio
+
+Revision ID: c7e5f0a2d6b8
+Revises: 8d41c6b2a913
+Create Date: 2025-04-25 10:41:07.583214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e5f0a2d6b8'
+down_revision = '8d41c6b2a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,28 @@
+"""Batch id for playlist and bulk URL submissions
+
+Revision ID: d2f7a1c8b350
+Revises: c6a0d9b4e813
+Create Date: 2025-05-09 16:48:12.377051
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7a1c8b350'
+down_revision = 'c6a0d9b4e813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.String(length=36), nullable=True))
+        batch_op.create_index('ix_transcriptions_batch_id', ['batch_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transcriptions_batch_id')
+        batch_op.drop_column('batch_id')
@@ -0,0 +1,28 @@
+"""Composite indexes for listing transcriptions
+
+Revision ID: e2b7c4d9a105
+Revises: c7e5f0a2d6b8
+Create Date: 2025-04-28 09:12:44.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4d9a105'
+down_revision = 'c7e5f0a2d6b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.create_index('ix_transcriptions_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_transcriptions_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transcriptions_status_created_at')
+        batch_op.drop_index('ix_transcriptions_user_id_created_at')
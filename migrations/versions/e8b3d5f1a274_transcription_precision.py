@@ -0,0 +1,26 @@
+"""Requested CPU precision of a transcription
+
+Revision ID: e8b3d5f1a274
+Revises: d2f7a1c8b350
+Create Date: 2025-05-16 10:21:37.504118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3d5f1a274'
+down_revision = 'd2f7a1c8b350'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('precision', sa.String(length=8), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_column('precision')
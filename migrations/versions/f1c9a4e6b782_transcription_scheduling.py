@@ -0,0 +1,35 @@
+"""Priority class, audio duration and virtual start time for queue scheduling
+
+Revision ID: f1c9a4e6b782
+Revises: e8b3d5f1a274
+Create Date: 2025-05-19 14:02:51.836240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c9a4e6b782'
+down_revision = 'e8b3d5f1a274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('priority', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('audio_seconds', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('schedule_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_transcriptions_status_schedule_at', ['status', 'schedule_at'], unique=False)
+
+    # Jobs already queued keep their arrival order
+    op.execute("UPDATE transcriptions SET schedule_at = created_at WHERE status = 'pending'")
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transcriptions_status_schedule_at')
+        batch_op.drop_column('schedule_at')
+        batch_op.drop_column('audio_seconds')
+        batch_op.drop_column('priority')
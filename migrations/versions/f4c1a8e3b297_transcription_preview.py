@@ -0,0 +1,30 @@
+"""Transcript preview column and keyset index
+
+Revision ID: f4c1a8e3b297
+Revises: e2b7c4d9a105
+Create Date: 2025-04-30 15:27:19.640251
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1a8e3b297'
+down_revision = 'e2b7c4d9a105'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preview', sa.String(length=200), nullable=True))
+        batch_op.create_index('ix_transcriptions_created_at_id', ['created_at', 'id'], unique=False)
+
+    op.execute('UPDATE transcriptions SET preview = substr(text, 1, 200) WHERE text IS NOT NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('transcriptions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transcriptions_created_at_id')
+        batch_op.drop_column('preview')
@@ -3,7 +3,7 @@ from app import create_app, db
 from app.models.user import User
 from app.models.transcription import Transcription
 
-app = create_app(os.getenv('FLASK_ENV', 'default'))
+app = create_app()
 
 @app.shell_context_processor
 def make_shell_context():
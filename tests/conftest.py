@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.config import Config
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SECRET_KEY = 'test'
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        STORAGE_PATH = str(tmp_path / 'storage')
+        MODEL_PATH = str(tmp_path / 'models')
+        MODEL_HOST_ADDRESS = None
+        MODEL_HOST_AUTHKEY = None
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        # The search index is a virtual table created by its migration, not by create_all()
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE transcript_search USING fts5(transcription_id UNINDEXED, seq UNINDEXED, "
+            "start UNINDEXED, \"end\" UNINDEXED, text, tokenize = 'porter unicode61')"
+        ))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,40 @@
+import numpy as np
+import whisper
+from app.services.audio_store import DecodedAudioStore
+
+def counting_decoder(monkeypatch):
+    calls = []
+
+    def load_audio(path):
+        calls.append(path)
+        return np.arange(16000, dtype=np.float32)
+
+    monkeypatch.setattr(whisper, 'load_audio', load_audio)
+    return calls
+
+def test_uploads_are_decoded_once_and_mapped_afterwards(app, tmp_path, monkeypatch):
+    calls = counting_decoder(monkeypatch)
+    store = DecodedAudioStore(str(tmp_path / 'decoded'))
+    first = store.load('/uploads/a.wav', 'ab' * 32)
+    second = store.load('/uploads/a.wav', 'ab' * 32)
+    assert calls == ['/uploads/a.wav']
+    assert isinstance(second, np.memmap)
+    assert np.array_equal(first, second)
+    # Copy-on-write: callers may modify their mapping without touching the artifact
+    second[0] = 1.0
+    assert store.load('/uploads/a.wav', 'ab' * 32)[0] == 0.0
+
+def test_the_artifact_lives_until_its_last_reference_is_released(app, tmp_path, monkeypatch):
+    counting_decoder(monkeypatch)
+    store = DecodedAudioStore(str(tmp_path / 'decoded'))
+    content_hash = 'cd' * 32
+    store.acquire(content_hash, 'job-1')
+    store.acquire(content_hash, 'job-2')
+    store.load('/uploads/b.wav', content_hash)
+    assert store.references(content_hash) == 2
+
+    assert not store.release(content_hash, 'job-1')
+    assert store.references(content_hash) == 1
+    assert store.release(content_hash, 'job-2')
+    assert store.references(content_hash) == 0
+    assert not (tmp_path / 'decoded' / 'cd' / f'{content_hash}.npy').exists()
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+import numpy as np
+from app.services.batching import (WINDOW_SAMPLES, BatchScheduler, needs_fallback, tokens_to_segments,
+                                   window_spans)
+from app.services.model_registry import ModelKey
+
+def result(compression_ratio=1.5, avg_logprob=-0.3, no_speech_prob=0.1, tokens=(), temperature=0.0):
+    return SimpleNamespace(compression_ratio=compression_ratio, avg_logprob=avg_logprob,
+                           no_speech_prob=no_speech_prob, tokens=list(tokens), temperature=temperature)
+
+def test_needs_fallback_for_degenerate_results():
+    assert not needs_fallback(result())
+    assert needs_fallback(result(compression_ratio=3.0))
+    assert needs_fallback(result(avg_logprob=-1.5))
+
+def test_silent_windows_never_fall_back():
+    assert not needs_fallback(result(avg_logprob=-1.5, no_speech_prob=0.9))
+    # Likely speech is still retried when the decode is poor
+    assert needs_fallback(result(avg_logprob=-1.5, no_speech_prob=0.3))
+    assert needs_fallback(result(compression_ratio=3.0, avg_logprob=-0.5, no_speech_prob=0.9))
+
+def test_window_spans_cover_audio_in_windows_of_at_most_30_seconds():
+    audio = np.random.default_rng(0).standard_normal(95 * 16000).astype(np.float32)
+    spans = window_spans(audio)
+    assert spans[0][0] == 0 and spans[-1][1] == len(audio)
+    assert all(end - start <= WINDOW_SAMPLES for start, end in spans)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+
+class FakeTokenizer:
+    timestamp_begin = 1000
+    eot = 999
+
+    def decode(self, tokens):
+        return ''.join(f' w{t}' for t in tokens)
+
+def test_tokens_to_segments_places_timestamps_on_the_timeline():
+    tokens = [1000, 1, 2, 1100, 1100, 3, 1200, 999]
+    segments = tokens_to_segments(FakeTokenizer(), result(tokens=tokens), offset=30.0, duration=5.0)
+    assert [(s['start'], s['end'], s['text']) for s in segments] == [
+        (30.0, 32.0, ' w1 w2'),
+        (32.0, 34.0, ' w3'),
+    ]
+
+class FakeRegistry:
+    @contextmanager
+    def use(self, *key):
+        yield SimpleNamespace(model=None)
+
+def test_scheduler_does_not_retry_silent_windows():
+    calls = []
+
+    def decode(model, mels, options, temperature):
+        calls.append(temperature)
+        return [result(avg_logprob=-2.0, no_speech_prob=0.95) for _ in mels]
+
+    scheduler = BatchScheduler(FakeRegistry(), ModelKey('tiny', 'cpu', 'fp32'), max_batch=2, max_wait=0.01)
+    scheduler._decode = decode
+    futures = [scheduler.submit(object(), 'en', 'transcribe') for _ in range(2)]
+    assert all(future.result(timeout=5).no_speech_prob == 0.95 for future in futures)
+    assert set(calls) == {0.0}
@@ -0,0 +1,26 @@
+import numpy as np
+from benchmarks.audio import recording, silence, speech
+from benchmarks.compare import compare
+
+def test_recordings_are_reproducible_per_seed(tmp_path):
+    assert np.array_equal(speech(5.0, seed=7), speech(5.0, seed=7))
+    assert not np.array_equal(speech(5.0, seed=7), speech(5.0, seed=8))
+    path, digest = recording('speech', 2.0, str(tmp_path / 'a'), seed=7)
+    assert recording('speech', 2.0, str(tmp_path / 'b'), seed=7)[1] == digest
+    assert path.endswith('speech-2s-7.wav')
+
+def test_silence_heavy_audio_is_mostly_quiet():
+    loud = lambda audio: np.mean(np.abs(audio) > 0.05)
+    assert loud(silence(30.0)) < loud(speech(30.0)) / 2
+
+def report(**metrics):
+    return {'results': [dict({'model': 'tiny', 'audio': 'speech', 'seconds': 30}, **metrics),
+                        {'model': 'base', 'audio': 'speech', 'seconds': 30, 'skipped': 'not installed'}]}
+
+def test_compare_flags_only_changes_beyond_tolerance_and_slack():
+    baseline = report(rtf=0.20, first_segment_seconds=1.0, model_load_seconds=0.1, peak_rss_mb=500)
+    current = report(rtf=0.30, first_segment_seconds=1.05, model_load_seconds=0.3, peak_rss_mb=520)
+    regressions = {change.metric for change in compare(current, baseline, tolerance=0.1) if change.regression}
+    # Load time tripled but stayed within its absolute slack; RSS grew by less than its slack
+    assert regressions == {'rtf'}
+    assert compare(current, {'results': []}, tolerance=0.1) == []
@@ -0,0 +1,92 @@
+import io
+import os
+import tarfile
+import zipfile
+import pytest
+from werkzeug.sansio.multipart import Field, File
+from app.services.bulk_ingest import BulkIngest, archive_suffix, is_hidden, iter_parts
+from app.services.ingest import UploadRejected
+
+WAV = b'RIFF\x24\x00\x00\x00WAVEfmt ' + b'\x00' * 64
+
+def multipart(boundary, parts):
+    body = b''
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename:
+            disposition += f'; filename="{filename}"'
+        body += f'--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n'.encode() + data + b'\r\n'
+    return body + f'--{boundary}--\r\n'.encode()
+
+def test_archive_suffix_by_name_then_content_type():
+    assert archive_suffix('Catalogue.TAR.GZ') == '.tar.gz'
+    assert archive_suffix('calls.tgz') == '.tgz'
+    assert archive_suffix('upload', 'application/zip') == '.zip'
+    assert archive_suffix('meeting.mp3', 'audio/mpeg') is None
+    assert archive_suffix(None) is None
+
+def test_hidden_archive_entries():
+    assert is_hidden('__MACOSX/._a.mp3')
+    assert is_hidden('calls/.DS_Store')
+    assert not is_hidden('calls/a.mp3')
+
+def test_iter_parts_yields_fields_and_files_in_order():
+    body = multipart('xyz', [('model', None, b'small'), ('file', 'a.wav', b'A' * 100000),
+                             ('file', 'b.wav', b'B')])
+    parts = [(type(event), event.name, getattr(event, 'filename', None), b''.join(chunks))
+             for event, chunks in iter_parts(io.BytesIO(body), b'xyz')]
+    assert parts == [(Field, 'model', None, b'small'), (File, 'file', 'a.wav', b'A' * 100000),
+                     (File, 'file', 'b.wav', b'B')]
+
+def test_iter_parts_skips_abandoned_part_data():
+    body = multipart('xyz', [('file', 'a.wav', b'A' * 100000), ('file', 'b.wav', b'B')])
+    names = [event.filename for event, chunks in iter_parts(io.BytesIO(body), b'xyz')]
+    assert names == ['a.wav', 'b.wav']
+
+def test_iter_parts_rejects_truncated_bodies():
+    body = multipart('xyz', [('file', 'a.wav', b'A')])[:-20]
+    with pytest.raises(UploadRejected):
+        for _, chunks in iter_parts(io.BytesIO(body), b'xyz'):
+            b''.join(chunks)
+
+def test_tar_archives_are_extracted_and_non_audio_rejected(app):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode='w:gz') as archive:
+        for name, content in (('calls/a.wav', WAV), ('calls/notes.txt', b'hello'), ('.hidden.wav', WAV)):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    data.seek(0)
+    bulk = BulkIngest(max_files=10, max_bytes=2**20)
+    bulk.add_archive(data, 'calls.tar.gz', '.tar.gz')
+    assert [f.filename for f in bulk.files] == ['a.wav']
+    assert [r['filename'] for r in bulk.rejected] == ['notes.txt']
+    bulk.discard()
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
+
+def test_archives_expanding_past_the_bulk_limit_are_refused(app):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for i in range(4):
+            archive.writestr(f'{i}.wav', WAV + b'\x00' * 2**20)
+    assert data.tell() < 2**15
+    data.seek(0)
+    bulk = BulkIngest(max_files=10, max_bytes=3 * 2**20)
+    with pytest.raises(UploadRejected) as e:
+        bulk.add_archive(data, 'bomb.zip', '.zip')
+    assert e.value.status_code == 413
+    assert len(bulk.files) == 2
+    bulk.discard()
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
+
+def test_failed_bulk_requests_leave_no_files(app, client, monkeypatch):
+    def add_then_fail(self, stream, boundary):
+        self.add_file(io.BytesIO(WAV), 'a.wav')
+        raise RuntimeError('client went away')
+
+    monkeypatch.setattr(BulkIngest, 'add_multipart', add_then_fail)
+    body = multipart('xyz', [('file', 'a.wav', WAV)])
+    with pytest.raises(RuntimeError):
+        client.post('/api/transcription/transcriptions/bulk', data=body,
+                    content_type='multipart/form-data; boundary=xyz')
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
@@ -0,0 +1,45 @@
+import numpy as np
+from app.services.chunking import SAMPLE_RATE, Window, merge_segments, plan_windows, silence_boundaries
+
+def tone_with_gaps(seconds: float, gaps):
+    audio = np.full(int(seconds * SAMPLE_RATE), 0.5, dtype=np.float32)
+    for start, end in gaps:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0
+    return audio
+
+def test_boundaries_move_to_nearby_silence():
+    audio = tone_with_gaps(100, [(31, 32), (63, 64)])
+    boundaries = silence_boundaries(audio, 30, 3)
+    assert boundaries[0] == 0 and boundaries[-1] == len(audio)
+    assert 31 * SAMPLE_RATE <= boundaries[1] <= 32 * SAMPLE_RATE
+    assert 63 * SAMPLE_RATE <= boundaries[2] <= 64 * SAMPLE_RATE
+
+def test_windows_cover_the_audio_with_overlap():
+    audio = tone_with_gaps(100, [])
+    windows = plan_windows(audio, 30, 2)
+    assert windows[0].core_start == 0 and windows[-1].core_end == len(audio)
+    for previous, window in zip(windows, windows[1:]):
+        assert previous.core_end == window.core_start
+        assert window.start == window.core_start - 2 * SAMPLE_RATE
+
+def test_merge_keeps_segments_in_their_core_and_renumbers():
+    windows = [Window(0, 0, 12 * SAMPLE_RATE, 0, 10 * SAMPLE_RATE),
+               Window(1, 8 * SAMPLE_RATE, 20 * SAMPLE_RATE, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE)]
+    results = [
+        [{'id': 0, 'start': 0.0, 'end': 4.0, 'text': ' one'},
+         {'id': 1, 'start': 9.0, 'end': 11.5, 'text': ' overlap'}],
+        [{'id': 0, 'start': 0.5, 'end': 1.5, 'text': ' one'},
+         {'id': 1, 'start': 1.0, 'end': 3.5, 'text': ' overlap'},
+         {'id': 2, 'start': 4.0, 'end': 6.0, 'text': ' two'}],
+    ]
+    merged = merge_segments(windows, results)
+    assert [s['text'] for s in merged] == [' one', ' overlap', ' two']
+    assert [s['id'] for s in merged] == [0, 1, 2]
+    assert merged[1]['start'] == 9.0 and merged[2]['start'] == 12.0
+
+def test_merge_drops_repeated_text_across_the_cut():
+    windows = [Window(0, 0, 12 * SAMPLE_RATE, 0, 10 * SAMPLE_RATE),
+               Window(1, 8 * SAMPLE_RATE, 20 * SAMPLE_RATE, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE)]
+    results = [[{'start': 8.0, 'end': 11.0, 'text': ' same'}],
+               [{'start': 1.5, 'end': 3.0, 'text': 'same '}]]
+    assert len(merge_segments(windows, results)) == 1
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.transcription import Transcription
+from app.services.downloads import (VideoEntry, _flatten, batch_progress, claim_downloads, create_batch,
+                                    release_stale_downloads)
+
+class FakeYoutubeDL:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def extract_info(self, url, download=False):
+        return self.pages[url]
+
+def video(id):
+    return {'_type': 'url', 'ie_key': 'Youtube', 'url': id, 'id': id, 'title': f'Video {id}'}
+
+def test_playlists_and_channel_tabs_flatten_into_videos():
+    ydl = FakeYoutubeDL({'https://example.com/tab': {'_type': 'playlist', 'entries': [video('c'), video('d')]}})
+    channel = {'_type': 'playlist', 'entries': [
+        video('a'), None,
+        {'_type': 'playlist', 'entries': [video('b')]},
+        {'_type': 'url', 'ie_key': 'YoutubeTab', 'url': 'https://example.com/tab'}
+    ]}
+    found = []
+    _flatten(ydl, channel, 0, 3, found)
+    assert [(e.url, e.video_id) for e in found] == [
+        ('https://www.youtube.com/watch?v=a', 'a'),
+        ('https://www.youtube.com/watch?v=b', 'b'),
+        ('https://www.youtube.com/watch?v=c', 'c'),
+    ]
+
+def entries(count):
+    return [VideoEntry(f'https://www.youtube.com/watch?v={i}', f'Video {i}', str(i)) for i in range(count)]
+
+def test_batches_report_progress_and_complete_cached_videos(app):
+    cached = {'text': 'known', 'device': 'cpu', 'segments': [], 'language': 'en'}
+    batch_id = create_batch(entries(4), 'tiny', False, cached=lambda e: cached if e.video_id == '0' else None)
+    progress = batch_progress(batch_id)
+    assert progress['total'] == 4
+    assert progress['counts']['completed'] == 1 and progress['counts']['downloading'] == 3
+    assert progress['percent'] == 25.0 and not progress['finished']
+    assert batch_progress('unknown') is None
+
+def test_batch_videos_belong_to_the_submitting_user(app, client):
+    batch_id = create_batch(entries(2), 'tiny', False, user_id='user-a')
+    assert {t.user_id for t in Transcription.query.filter_by(batch_id=batch_id)} == {'user-a'}
+    response = client.get(f'/api/transcription/batches/{batch_id}')
+    assert response.get_json()['total'] == 2
+    assert client.get(f'/api/youtube/batches/{batch_id}').status_code == 404
+
+def test_downloads_are_claimed_once_and_released_when_stale(app):
+    create_batch(entries(3), 'tiny', False)
+    first = claim_downloads('downloader-1', 2)
+    second = claim_downloads('downloader-2', 2)
+    assert len(first) == 2 and len(second) == 1 and not set(first) & set(second)
+    assert claim_downloads('downloader-3', 1) == []
+
+    db.session.query(Transcription).filter(Transcription.id.in_(first)).update(
+        {'heartbeat_at': datetime.utcnow() - timedelta(minutes=10)}, synchronize_session=False)
+    db.session.commit()
+    assert release_stale_downloads(300) == 2
+    assert sorted(claim_downloads('downloader-3', 5)) == sorted(first)
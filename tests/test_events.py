@@ -0,0 +1,87 @@
+import os
+import time
+from types import SimpleNamespace
+from app import db
+from app.models.transcription import Transcription
+from app.services import events
+from app.services.events import EventLog, _ReportingBar, prune_logs
+from tests.test_batching import FakeTokenizer, result
+
+class RecordingReporter:
+    def __init__(self):
+        self.calls = []
+
+    def progress(self, done, total):
+        self.calls.append(('progress', done, total))
+
+    def segments(self, segments):
+        self.calls.append(('segments', [(s['start'], s['text']) for s in segments]))
+
+def reporting_bar(total):
+    reporter = RecordingReporter()
+    bar = _ReportingBar(reporter, total)
+    bar._tokenizer = lambda model, result, options: FakeTokenizer()
+    return bar, reporter
+
+def test_event_log_reads_complete_lines_and_resumes_from_offset(tmp_path):
+    log = EventLog(str(tmp_path / 'events' / 'job.jsonl'))
+    log.emit('progress', {'percent': 10})
+    first, offset = log.read()
+    log.emit('progress', {'percent': 20})
+    second, _ = log.read(offset)
+    assert [e['data']['percent'] for e in first + second] == [10, 20]
+    log.remove()
+    assert not os.path.exists(log.path)
+
+def test_reporting_bar_emits_the_kept_decode_of_each_window():
+    bar, reporter = reporting_bar(total=4000)
+    mel = object()
+    # Fallback decodes of the same window: only the last one is reported
+    bar.decoded(mel, None, result(tokens=[1000, 1, 1050]), None)
+    bar.decoded(mel, None, result(tokens=[1000, 2, 1050]), None)
+    bar.update(3000)
+    bar.decoded(object(), None, result(tokens=[1000, 3, 1050]), None)
+    bar.update(1000)
+    assert reporter.calls == [
+        ('segments', [(0.0, ' w2')]),
+        ('progress', 3000, 4000),
+        ('segments', [(30.0, ' w3')]),
+        ('progress', 4000, 4000),
+    ]
+
+def test_reporting_bar_skips_past_silent_windows():
+    bar, reporter = reporting_bar(total=6000)
+    bar.decoded(object(), None, result(tokens=[1000, 1, 1050], no_speech_prob=0.9), None)
+    # No update for the silent window; the next decode is on the following window
+    bar.decoded(object(), None, result(tokens=[1000, 2, 1050]), None)
+    bar.update(3000)
+    assert reporter.calls == [('segments', [(30.0, ' w2')]), ('progress', 6000, 6000)]
+
+def add_transcription(id, status):
+    db.session.add(Transcription(id=id, file_name=f'{id}.wav', file_path=f'/tmp/{id}.wav', status=status))
+    db.session.commit()
+
+def test_prune_logs_removes_idle_logs_of_finished_or_deleted_jobs(app):
+    add_transcription('done', 'completed')
+    add_transcription('running', 'processing')
+    paths = {}
+    for id in ('done', 'running', 'deleted', 'recent'):
+        log = EventLog.for_transcription(id)
+        log.emit('status', {'status': 'pending'})
+        paths[id] = log.path
+        if id != 'recent':
+            old = time.time() - 3600
+            os.utime(log.path, (old, old))
+
+    assert prune_logs(600) == 2
+    assert {id for id, path in paths.items() if os.path.exists(path)} == {'running', 'recent'}
+
+def test_event_streams_are_capped_per_process(app, client, monkeypatch):
+    add_transcription('job', 'pending')
+    limit = events.StreamLimit(1)
+    monkeypatch.setattr(events, '_stream_limit', limit)
+    assert limit.acquire()
+    response = client.get('/api/transcription/transcriptions/job/events')
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    limit.release()
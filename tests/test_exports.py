@@ -0,0 +1,55 @@
+import json
+import os
+import pytest
+from app.models.transcription import Transcription
+from app.services.exports import ExportError, export_path, timestamp
+
+SEGMENTS = [{'start': 0.0, 'end': 2.5, 'text': ' Hello there.'},
+            {'start': 2.5, 'end': 3661.0, 'text': ' General Kenobi.'}]
+
+@pytest.fixture
+def transcription(app):
+    transcription = Transcription(id='talk', file_name='talk.wav', file_path='/tmp/talk.wav', status='pending')
+    transcription.update_result('Hello there. General Kenobi.', 'cpu', 1.0, SEGMENTS)
+    return transcription
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def test_timestamp():
+    assert timestamp(3661.5) == '01:01:01.500'
+    assert timestamp(2.0004, ',') == '00:00:02,000'
+
+def test_text_formats(transcription):
+    assert read(export_path(transcription, 'srt')).startswith(
+        '1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n2\n00:00:02,500 --> 01:01:01,000\n')
+    assert read(export_path(transcription, 'vtt')).startswith('WEBVTT\n\n00:00:00.000 --> 00:00:02.500\n')
+    document = json.loads(read(export_path(transcription, 'json')))
+    assert [s['text'] for s in document['segments']] == [' Hello there.', ' General Kenobi.']
+    assert document['id'] == 'talk'
+
+def test_exports_are_rendered_once_per_revision(transcription):
+    path = export_path(transcription, 'txt')
+    assert export_path(transcription, 'txt') == path
+    transcription.update_result('Changed.', 'cpu', 1.0, SEGMENTS)
+    new_path = export_path(transcription, 'txt')
+    assert new_path != path and read(new_path) == 'Changed.\n'
+    # Renders of the earlier revision are removed
+    assert not os.path.exists(path)
+
+def test_unfinished_or_untimed_transcriptions_are_refused(app, transcription):
+    with pytest.raises(ExportError) as e:
+        export_path(transcription, 'pdf')
+    assert e.value.status_code == 400
+    untimed = Transcription(id='plain', file_name='plain.wav', file_path='/tmp/plain.wav', status='pending')
+    untimed.update_result('Just text.', 'cpu', 1.0)
+    with pytest.raises(ExportError) as e:
+        export_path(untimed, 'srt')
+    assert e.value.status_code == 409
+
+def test_export_endpoint_serves_a_download(client, transcription):
+    response = client.get('/api/transcription/transcriptions/talk/export/txt')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename=talk.txt'
+    assert response.data == b'Hello there. General Kenobi.\n'
@@ -0,0 +1,66 @@
+import os
+import time
+import pytest
+from app import db
+from app.models.transcription import Transcription
+from app.services import governor as governor_module
+from app.services.governor import InferenceGovernor, Saturated
+
+@pytest.fixture
+def governor(tmp_path):
+    return InferenceGovernor(str(tmp_path / 'slots'), slots=2, threads_per_slot=1, stale_seconds=30)
+
+def test_busy_reads_slot_state_without_blocking_acquisitions(governor):
+    assert governor.busy() == []
+    held = governor.try_acquire()
+    assert governor.busy() == [held.index]
+    # Probing must not make a free slot look taken to a concurrent acquirer
+    governor.busy()
+    other = governor.try_acquire()
+    assert other is not None and governor.busy() == [0, 1]
+    governor.release(held)
+    governor.release(other)
+    assert governor.busy() == []
+
+def test_records_left_by_a_dead_holder_expire(governor):
+    held = governor.try_acquire()
+    held.file.close()  # the holder is gone, but its record still names it
+    old = time.time() - 60
+    os.utime(governor._slot_path(held.index), (old, old))
+    assert governor.busy() == []
+
+def test_try_acquire_many_is_all_or_nothing(governor):
+    single = governor.try_acquire()
+    assert governor.try_acquire_many(2) is None
+    assert governor.busy() == [single.index]
+    governor.release(single)
+
+    with governor.hold(5) as held:
+        assert len(held) == 2
+        with pytest.raises(Saturated):
+            with governor.slot(wait=False):
+                pass
+    assert governor.busy() == []
+
+def test_partial_acquisitions_do_not_skew_wait_estimates(governor):
+    with governor.slot():
+        time.sleep(0.05)
+    recorded = governor.average_seconds()
+    blocker = governor.try_acquire()
+    assert governor.try_acquire_many(2) is None
+    governor.release(blocker, record=False)
+    assert governor.average_seconds() == recorded
+
+def test_uploads_are_refused_once_the_default_queue_wait_is_exceeded(app, client, monkeypatch):
+    monkeypatch.setattr(governor_module, '_governor', None)
+    slots = governor_module.get_governor().slots
+    # Sixty seconds per job until slots have a history; just past the default limit
+    backlog = slots * int(app.config['INFERENCE_MAX_QUEUE_SECONDS'] / 60 + 1)
+    db.session.add_all([Transcription(id=f'job-{i}', file_name='a.wav', file_path='/tmp/a.wav', status='pending')
+                        for i in range(backlog)])
+    db.session.commit()
+
+    response = client.post('/api/transcription/transcriptions/bulk', data=b'',
+                           content_type='multipart/form-data; boundary=xyz')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > app.config['INFERENCE_MAX_QUEUE_SECONDS']
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+def test_liveness_does_not_touch_dependencies(client):
+    response = client.get('/health/live')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'alive'
+
+def test_readiness_can_wait_for_a_loaded_model(app, client):
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert response.get_json()['database'] == 'connected'
+    assert response.get_json()['models'] == {'source': 'process', 'model_loaded': False, 'loaded': []}
+
+    app.config['READY_REQUIRES_MODEL'] = True
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'unready'
+
+def test_creating_the_app_leaves_heavy_imports_for_later():
+    # A fresh interpreter, since other tests import torch and whisper
+    code = ("import sys; from app import create_app; create_app(); "
+            "print(','.join(m for m in ('torch', 'whisper', 'docx') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == ''
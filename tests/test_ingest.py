@@ -0,0 +1,42 @@
+import hashlib
+import io
+import os
+import pytest
+from app.services.ingest import HashingFileWriter, UploadRejected, ingest_stream
+
+WAV_HEAD = b'RIFF' + b'\0' * 4 + b'WAVEfmt '
+
+def wav_bytes(size):
+    return WAV_HEAD + b'\0' * (size - len(WAV_HEAD))
+
+def test_ingest_stream_hashes_and_keeps_the_upload(app):
+    data = wav_bytes(200 * 1024)
+    ingested = ingest_stream(io.BytesIO(data), '../My Talk.WAV')
+    assert ingested.sha256 == hashlib.sha256(data).hexdigest()
+    assert ingested.size == len(data)
+    assert ingested.mime_type == 'audio/x-wav'
+    assert ingested.filename == 'My_Talk.WAV'
+    assert ingested.path.startswith(app.config['UPLOAD_FOLDER']) and ingested.path.endswith('.wav')
+    with open(ingested.path, 'rb') as f:
+        assert f.read() == data
+
+def test_writer_refuses_oversized_uploads_as_they_arrive(app, tmp_path):
+    writer = HashingFileWriter(str(tmp_path / 'upload.wav'), 'upload.wav', max_bytes=4096)
+    writer.write(wav_bytes(4096))
+    with pytest.raises(UploadRejected) as e:
+        writer.write(b'\0')
+    assert e.value.status_code == 413
+    writer.close()
+    assert not os.path.exists(writer.path)
+
+def test_writer_refuses_non_audio_content(app, tmp_path):
+    writer = HashingFileWriter(str(tmp_path / 'upload.wav'), 'upload.wav', max_bytes=2**20)
+    with pytest.raises(UploadRejected) as e:
+        writer.write(b'%PDF-1.4\n' + b'x' * 4096)
+    assert e.value.status_code == 415
+    writer.close()
+
+def test_empty_uploads_are_rejected_and_removed(app):
+    with pytest.raises(UploadRejected):
+        ingest_stream(io.BytesIO(b''), 'empty.wav')
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
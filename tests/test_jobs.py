@@ -0,0 +1,86 @@
+import os
+from datetime import datetime, timedelta
+from app import db
+from app.api import transcription as transcription_api
+from app.models.transcription import Transcription
+from app.services import audio_store
+from app.services.jobs import claim_next, enqueue, requeue_stale, run_job
+
+def stale_job(id, worker_id, attempts=1, file_path=None):
+    old = datetime.utcnow() - timedelta(hours=1)
+    db.session.add(Transcription(id=id, file_name=id, file_path=file_path or f'/tmp/{id}', status='processing',
+                                 content_hash=f'{id}-hash', attempts=attempts, worker_id=worker_id,
+                                 claimed_at=old, heartbeat_at=old))
+    db.session.commit()
+
+def released_holders(monkeypatch):
+    released = []
+    monkeypatch.setattr(audio_store, 'release', lambda content_hash, holder: released.append((content_hash, holder)))
+    return released
+
+def test_requeue_stale_requeues_or_fails_expired_leases(app, monkeypatch):
+    released = released_holders(monkeypatch)
+    exhausted = upload(app, 'exhausted').file_path
+    stale_job('upload', 'host:1:0')
+    stale_job('exhausted', 'host:1:0', attempts=3, file_path=exhausted)
+
+    assert requeue_stale(lease_seconds=300, max_attempts=3) == 1
+    db.session.expire_all()
+    statuses = {t.id: (t.status, t.worker_id) for t in Transcription.query}
+    assert statuses == {
+        'upload': ('pending', None),
+        'exhausted': ('failed', None),
+    }
+    # Failed jobs give up their decoded audio and upload; requeued ones keep them
+    assert released == [('exhausted-hash', 'exhausted')]
+    assert not os.path.exists(exhausted)
+
+def upload(app, id, **columns):
+    path = f"{app.config['UPLOAD_FOLDER']}/{id}.wav"
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 1600)
+    return Transcription(id=id, file_name=f'{id}.wav', file_path=path, **columns)
+
+def test_a_job_is_claimed_by_one_worker_only(app):
+    enqueue(upload(app, 'job'))
+    claimed = claim_next('worker-1')
+    assert claimed.id == 'job' and claimed.status == 'processing' and claimed.attempts == 1
+    assert claim_next('worker-2') is None
+
+def test_run_job_stores_the_result(app, monkeypatch):
+    monkeypatch.setattr(transcription_api, 'transcribe_audio', lambda *args: {
+        'text': ' hello', 'device': 'cpu', 'processing_time': 0.5, 'language': 'en',
+        'segments': [{'id': 0, 'start': 0.0, 'end': 1.0, 'text': ' hello'}]
+    })
+    enqueue(upload(app, 'job'))
+    job = claim_next('worker-1')
+    run_job(job)
+    db.session.expire_all()
+    done = db.session.get(Transcription, 'job')
+    assert done.status == 'completed' and done.text == ' hello'
+    assert not os.path.exists(done.file_path)
+
+def test_run_job_records_failures(app, monkeypatch):
+    monkeypatch.setattr(transcription_api, 'transcribe_audio', lambda *args: {'error': 'no speech model'})
+    enqueue(upload(app, 'job', content_hash='job-hash'))
+    released = released_holders(monkeypatch)
+    run_job(claim_next('worker-1'))
+    db.session.expire_all()
+    failed = db.session.get(Transcription, 'job')
+    assert failed.status == 'failed' and failed.error_message == 'no speech model'
+    assert released == [('job-hash', 'job')]
+    assert not os.path.exists(failed.file_path)
+
+def test_run_job_releases_the_upload_when_transcription_raises(app, monkeypatch):
+    def crash(*args):
+        raise RuntimeError('out of memory')
+
+    monkeypatch.setattr(transcription_api, 'transcribe_audio', crash)
+    enqueue(upload(app, 'job', content_hash='job-hash'))
+    released = released_holders(monkeypatch)
+    run_job(claim_next('worker-1'))
+    db.session.expire_all()
+    failed = db.session.get(Transcription, 'job')
+    assert failed.status == 'failed' and 'out of memory' in failed.error_message
+    assert released == [('job-hash', 'job')]
+    assert not os.path.exists(failed.file_path)
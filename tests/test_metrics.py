@@ -0,0 +1,26 @@
+from app import db
+from app.models.transcription import Transcription
+from app.services import metrics
+
+def sample(body, name, labels=''):
+    prefix = f'{name}{{{labels}}} ' if labels else f'{name} '
+    lines = [line for line in body.splitlines() if line.startswith(prefix)]
+    return float(lines[0].split()[-1]) if lines else None
+
+def test_metrics_report_queue_depth_requests_and_cache_lookups(app, client):
+    for i, status in enumerate(('pending', 'pending', 'processing', 'completed')):
+        db.session.add(Transcription(id=f'job-{i}', file_name='a.wav', file_path='/tmp/a.wav', status=status))
+    db.session.commit()
+    before = sample(client.get('/metrics').get_data(as_text=True), 'audioink_cache_requests_total',
+                    'cache="export",result="hit"') or 0
+    metrics.cache_lookup('export', True)
+    client.get('/health/live')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert sample(body, 'audioink_queue_jobs', 'status="pending"') == 2
+    assert sample(body, 'audioink_queue_jobs', 'status="processing"') == 1
+    assert sample(body, 'audioink_queue_jobs', 'status="completed"') is None
+    assert sample(body, 'audioink_cache_requests_total', 'cache="export",result="hit"') == before + 1
+    assert sample(body, 'audioink_http_request_duration_seconds_count',
+                  'method="GET",route="/health/live",status="200"') >= 1
+    assert sample(body, 'audioink_process_resident_memory_bytes') > 0
@@ -0,0 +1,27 @@
+import pytest
+from app.services.model_host import ModelHost, ModelHostClient, ModelHostError, _authkey, parse_address
+
+def test_parse_address_tcp_and_unix():
+    assert parse_address('model-host:6000') == ('model-host', 6000)
+    assert parse_address(':6000') == ('localhost', 6000)
+    assert parse_address('/tmp/audioink-model.sock') == '/tmp/audioink-model.sock'
+
+def test_authkey_is_required():
+    with pytest.raises(ModelHostError):
+        _authkey({'MODEL_HOST_AUTHKEY': None, 'SECRET_KEY': 'dev'})
+    assert _authkey({'MODEL_HOST_AUTHKEY': 'secret', 'SECRET_KEY': 'dev'}) == b'secret'
+
+def test_client_refuses_to_connect_without_authkey():
+    with pytest.raises(ModelHostError):
+        ModelHostClient.from_config({'MODEL_HOST_ADDRESS': '/tmp/x.sock', 'MODEL_HOST_AUTHKEY': '',
+                                     'SECRET_KEY': 'dev', 'MODEL_HOST_TIMEOUT': 1})
+
+def test_dispatch_rejects_unknown_operations(app):
+    host = ModelHost(app, '/tmp/unused.sock', b'secret')
+    assert host.dispatch({'op': 'shutdown'}) == {'ok': False, 'error': 'Unknown operation: shutdown'}
+
+def test_dispatch_refuses_when_at_capacity(app):
+    host = ModelHost(app, '/tmp/unused.sock', b'secret', max_inflight=1)
+    host.slots.acquire()
+    response = host.dispatch({'op': 'transcribe', 'audio_path': '/tmp/a.wav'})
+    assert response['busy'] and not response['ok']
@@ -0,0 +1,156 @@
+import gc
+import time
+from types import SimpleNamespace
+import pytest
+import torch
+import whisper
+from app.services import model_registry
+from app.services.model_registry import (LoadedModel, ModelKey, ModelNotAvailable, ModelRegistry, estimated_bytes,
+                                         preload_for_fork)
+
+class FakePool:
+    def __init__(self):
+        self.shut_down = False
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+def registry(budget_mb: float) -> ModelRegistry:
+    return ModelRegistry('/nonexistent', int(budget_mb * 2**20))
+
+def add_model(reg: ModelRegistry, name: str) -> ModelKey:
+    key = reg.key(name, 'cpu')
+    reg.models[key] = LoadedModel(key, object(), estimated_bytes(key), 0)
+    return key
+
+def test_key_normalises_precision():
+    reg = registry(1024)
+    assert reg.key('base', 'cpu', 'fp16').precision == 'fp32'
+    assert reg.key('base', 'cuda', 'int8').precision == 'fp16'
+    with pytest.raises(ModelNotAvailable):
+        reg.key('huge', 'cpu')
+
+def test_pool_counts_every_process_against_the_budget():
+    reg = registry(1024)
+    with reg.use_pool('base', None, 3, FakePool) as entry:
+        assert entry.size_bytes == 3 * estimated_bytes(reg.key('base', 'cpu'))
+        assert reg.used_bytes('cpu') == entry.size_bytes
+    assert reg.stats()['pools'][0]['processes'] == 3
+
+def test_pool_reused_between_jobs():
+    reg = registry(1024)
+    with reg.use_pool('tiny', None, 2, FakePool) as first:
+        pass
+    with reg.use_pool('tiny', None, 2, FakePool) as second:
+        assert second is first
+        assert second.uses == 2
+
+def test_new_pool_evicts_least_recently_used_models():
+    reg = registry(1000)
+    small = add_model(reg, 'small')  # ~930 MB
+    with reg.use_pool('tiny', None, 2, FakePool):
+        assert small not in reg.models
+
+def test_evicting_a_model_shuts_down_its_idle_pool():
+    reg = registry(1500)
+    with reg.use_pool('small', None, 1, FakePool) as entry:
+        pass
+    reg.pools[entry.key].last_used = time.time() + 60
+    add_model(reg, 'small')
+    reg.models[entry.key].last_used = 0
+    reg._evict_for(reg.key('base', 'cpu'), 800 * 2**20)
+    assert entry.key not in reg.models and entry.key not in reg.pools
+    assert entry.pool.shut_down
+
+def test_busy_pool_is_never_shut_down():
+    reg = registry(100)
+    with reg.use_pool('tiny', None, 1, FakePool) as entry:
+        reg._evict_for(reg.key('base', 'cpu'), 300 * 2**20)
+        assert entry.key in reg.pools
+        assert reg.release_idle_pools(0) == 0
+    assert not entry.pool.shut_down
+
+def test_idle_pools_are_released():
+    reg = registry(1024)
+    with reg.use_pool('tiny', None, 1, FakePool) as entry:
+        pass
+    entry.last_used -= 120
+    assert reg.release_idle_pools(60) == 1
+    assert entry.pool.shut_down and not reg.pools
+
+def loading_registry(budget_mb: float, loads: list) -> ModelRegistry:
+    reg = registry(budget_mb)
+
+    def load(key):
+        loads.append(key.name)
+        return LoadedModel(key, object(), estimated_bytes(key), 0)
+
+    reg._load = load
+    return reg
+
+def test_get_reuses_loaded_models():
+    loads = []
+    reg = loading_registry(1024, loads)
+    assert reg.get('tiny', 'cpu') is reg.get('tiny', 'cpu')
+    assert loads == ['tiny']
+
+def test_get_evicts_least_recently_used_to_fit_the_budget():
+    loads = []
+    reg = loading_registry(460, loads)  # tiny (~150 MB) and base (~280 MB) just fit
+    tiny = reg.get('tiny', 'cpu').key
+    base = reg.get('base', 'cpu').key
+    reg.models[base].last_used -= 10
+    reg.models[tiny].last_used = time.time()
+    int8 = reg.get('tiny', 'cpu', 'int8').key
+    assert set(reg.models) == {tiny, int8}
+    assert reg.evictions == 1
+
+def test_models_in_use_are_never_evicted():
+    loads = []
+    reg = loading_registry(460, loads)
+    with reg.use('base', 'cpu') as base:
+        base.last_used = 0
+        reg._evict_for(reg.key('small', 'cpu'), 800 * 2**20)
+        assert base.key in reg.models and reg.evictions == 0
+    reg._evict_for(reg.key('small', 'cpu'), 800 * 2**20)
+    assert base.key not in reg.models and reg.evictions == 1
+
+def test_models_locked_for_fork_are_never_evicted():
+    loads = []
+    reg = loading_registry(460, loads)
+    tiny = reg.get('tiny', 'cpu')
+    with tiny.lock:
+        reg._evict_for(reg.key('base', 'cpu'), 400 * 2**20)
+        assert tiny.key in reg.models and reg.evictions == 0
+
+def test_uninstalled_checkpoints_are_not_downloaded():
+    with pytest.raises(ModelNotAvailable, match='flask models download'):
+        registry(1024).get('tiny', 'cpu')
+
+class FrozenWeights:
+    dims = SimpleNamespace(n_mels=80)
+
+    def __init__(self):
+        self.requires_grad = True
+
+    def requires_grad_(self, requires_grad):
+        self.requires_grad = requires_grad
+        return self
+
+def test_preloading_warms_the_model_on_one_thread_and_freezes_the_gc(app, monkeypatch):
+    reg = registry(1024)
+    key = reg.key('tiny', 'cpu')
+    reg.models[key] = LoadedModel(key, FrozenWeights(), estimated_bytes(key), 0)
+    monkeypatch.setattr(model_registry, '_registry', reg)
+    decodes = []
+    monkeypatch.setattr(whisper, 'decode', lambda model, mel, options: decodes.append(torch.get_num_threads()))
+    threads = torch.get_num_threads()
+    try:
+        loaded = preload_for_fork('tiny')
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+    assert loaded is reg.models[key]
+    assert loaded.model.requires_grad is False
+    assert decodes == [1]
+    assert torch.get_num_threads() == threads
@@ -0,0 +1,22 @@
+from app.services.quantization import normalize, wer, word_errors
+
+def test_word_errors_counts_substitutions_insertions_and_deletions():
+    assert word_errors([], []) == 0
+    assert word_errors('a b c'.split(), 'a b c'.split()) == 0
+    assert word_errors('a b c'.split(), 'a x c'.split()) == 1
+    assert word_errors('a b c'.split(), 'a b'.split()) == 1
+    assert word_errors('a b'.split(), 'a b c d'.split()) == 2
+    assert word_errors([], 'a b'.split()) == 2
+
+def test_normalize_ignores_case_and_punctuation():
+    assert normalize('Hello, World!') == normalize('hello world')
+
+def test_wer_is_pooled_over_the_corpus():
+    references = ['the cat sat', 'on the mat today']
+    hypotheses = ['the cat sat', 'on a mat']
+    # Two edits over seven reference words, not the mean of per-file rates
+    assert wer(references, hypotheses) == round(2 / 7, 4)
+
+def test_wer_without_reference_words():
+    assert wer([], []) is None
+    assert wer([''], ['anything']) is None
@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.transcription import Transcription
+from app.services.repository import (decode_cursor, encode_cursor, get_transcription, import_json_store,
+                                     page_transcriptions, segments_between)
+from app.services.search import search_transcriptions
+
+START = datetime(2025, 1, 1)
+
+@pytest.fixture
+def history(app):
+    # Pairs of rows share a timestamp, so pages must also seek on the id
+    for i in range(7):
+        db.session.add(Transcription(id=f'{i:02d}', file_name=f'{i}.wav', file_path=f'/tmp/{i}.wav',
+                                     status='completed', created_at=START + timedelta(minutes=i // 2)))
+    db.session.commit()
+
+def test_cursor_round_trip():
+    row = Transcription(id='abc', created_at=START)
+    assert decode_cursor(encode_cursor(row)) == (START, 'abc')
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+def test_pages_cover_every_row_once_newest_first(history):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = page_transcriptions(cursor=cursor, limit=3)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+    assert seen == ['06', '05', '04', '03', '02', '01', '00']
+
+def test_last_full_page_has_no_next_cursor(history):
+    rows, cursor = page_transcriptions(limit=7)
+    assert len(rows) == 7 and cursor is None
+
+def test_listing_endpoint_links_the_next_page(history, client):
+    response = client.get('/api/transcription/transcriptions?limit=4&fields=id,status')
+    assert [row['id'] for row in response.get_json()] == ['06', '05', '04', '03']
+    cursor = response.headers['X-Next-Cursor']
+    response = client.get(f'/api/transcription/transcriptions?limit=4&cursor={cursor}')
+    assert [row['id'] for row in response.get_json()] == ['02', '01', '00']
+    assert 'X-Next-Cursor' not in response.headers
+    assert client.get('/api/transcription/transcriptions?cursor=bogus').status_code == 400
+
+def finished(id, segments):
+    transcription = Transcription(id=id, file_name=f'{id}.wav', file_path=f'/tmp/{id}.wav', status='pending')
+    transcription.update_result(' '.join(s['text'] for s in segments), 'cpu', 1.0, segments)
+    return transcription
+
+def test_segments_between_returns_overlapping_segments(app):
+    finished('talk', [{'start': 10.0 * i, 'end': 10.0 * i + 10.0, 'text': f' part {i}'} for i in range(6)])
+    assert [s.seq for s in segments_between('talk', 15.0, 30.0)] == [1, 2]
+    assert [s.seq for s in segments_between('talk', 50.0)] == [5]
+    assert [s.seq for s in segments_between('talk', end=10.0)] == [0]
+    assert segments_between('talk', 60.0, 70.0) == []
+
+def test_segments_endpoint_rejects_reversed_windows(app, client):
+    finished('talk', [{'start': 0.0, 'end': 4.0, 'text': ' hello', 'tokens': [1, 2]}])
+    response = client.get('/api/transcription/transcriptions/talk/segments?from=0&to=1&tokens=true')
+    assert response.get_json()['segments'][0]['tokens'] == [1, 2]
+    assert client.get('/api/transcription/transcriptions/talk/segments?from=5&to=1').status_code == 400
+
+def test_import_json_store_copies_legacy_records_once(app, tmp_path):
+    store = tmp_path / 'transcriptions.json'
+    store.write_text(json.dumps([
+        {'id': 'old-1', 'filename': 'a.wav', 'text': 'legacy budget talk', 'status': 'completed',
+         'created_at': '2024-05-01T10:00:00', 'segments': [{'start': 0.0, 'end': 3.0, 'text': ' legacy budget talk'}]},
+        {'id': 'old-2', 'file_name': 'b.wav', 'status': 'failed', 'error_message': 'boom'},
+        {'id': 'old-2', 'file_name': 'b2.wav', 'status': 'failed', 'error_message': 'boom'},
+        {'text': 'no id'}
+    ]))
+    assert import_json_store(str(store)) == (2, 0)
+    assert import_json_store(str(store)) == (0, 2)
+    assert import_json_store(str(tmp_path / 'missing.json')) == (0, 0)
+
+    first = get_transcription('old-1')
+    assert first.file_name == 'a.wav' and first.created_at == datetime(2024, 5, 1, 10)
+    assert [s['text'] for s in first.segments] == [' legacy budget talk']
+    assert get_transcription('old-2').file_name == 'b2.wav'
+    assert [r['id'] for r in search_transcriptions('budget')] == ['old-1']
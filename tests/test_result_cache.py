@@ -0,0 +1,74 @@
+import hashlib
+import os
+import numpy as np
+import pytest
+from app.api import transcription as api
+from app.services import audio_store
+from app.services.result_cache import ResultCache, audio_digest, get_cache, make_key, youtube_video_id
+
+def test_youtube_video_id_shapes():
+    assert youtube_video_id('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10') == 'dQw4w9WgXcQ'
+    assert youtube_video_id('https://youtu.be/dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+    assert youtube_video_id('https://m.youtube.com/shorts/dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+    assert youtube_video_id('https://example.com/watch?v=dQw4w9WgXcQ') is None
+    assert youtube_video_id('https://www.youtube.com/watch?v=short') is None
+
+def test_make_key_ignores_option_order():
+    assert make_key('audio:x', 'base', {'a': 1, 'b': 2}) == make_key('audio:x', 'base', {'b': 2, 'a': 1})
+    assert make_key('audio:x', 'base', {}) != make_key('audio:x', 'small', {})
+
+def test_audio_digest_matches_bytes_without_copying(tmp_path):
+    audio = np.random.default_rng(0).standard_normal(300_000).astype(np.float32)
+    expected = hashlib.sha256(audio.tobytes()).hexdigest()
+    assert audio_digest(audio) == expected
+
+    path = tmp_path / 'audio.f32'
+    audio.tofile(path)
+    assert audio_digest(np.memmap(path, dtype=np.float32, mode='r')) == expected
+    assert audio_digest(audio[::2]) == hashlib.sha256(audio[::2].tobytes()).hexdigest()
+
+def test_put_and_get_follow_aliases(tmp_path):
+    cache = ResultCache(str(tmp_path), 2**20)
+    cache.put('key', {'text': 'hello'}, aliases=['alias'])
+    assert cache.get('key') == {'text': 'hello'}
+    assert cache.get('alias') == {'text': 'hello'}
+    assert cache.get('missing') is None
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), 600)
+    for i in range(3):
+        cache.put(f'key-{i}', {'text': 'x' * 200})
+        path = cache._path(f'key-{i}')
+        os.utime(path, (i, i))
+    cache.put('key-3', {'text': 'x' * 200})
+    assert cache.get('key-0') is None
+    assert cache.get('key-3') is not None
+    assert cache.size <= 600
+
+def test_put_only_rescans_when_over_budget(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), 2**20)
+    cache.put('first', {'text': 'a'})
+    scans = []
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(1))
+    cache.put('second', {'text': 'b'})
+    assert scans == []
+
+def test_failed_write_leaves_no_temp_file(tmp_path):
+    cache = ResultCache(str(tmp_path), 2**20)
+    with pytest.raises(TypeError):
+        cache.put('key', {'text': object()})
+    leftovers = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert leftovers == []
+
+def test_workers_serve_cached_uploads_without_decoding(app, monkeypatch):
+    def no_decoding(*args):
+        raise AssertionError('decoded a file with a cached result')
+
+    monkeypatch.setattr(audio_store, 'load_audio', no_decoding)
+    result = {'text': ' hi', 'segments': [], 'language': 'en', 'device': 'cpu', 'model': 'tiny'}
+    precision = api.get_registry().key('tiny', 'cpu', None).precision
+    get_cache().put(make_key('file:abc', 'tiny', api.result_options(precision)), result)
+
+    output = api.transcribe_local('/missing.wav', 'tiny', use_gpu=False, file_hash='abc')
+    assert output['cached'] and output['text'] == ' hi'
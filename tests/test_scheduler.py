@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.transcription import Transcription
+from app.services import scheduler
+from app.services.scheduler import Candidate, candidates, order, probe_pending, schedule
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+def job(id, user_id=None, seconds=0, queued_seconds_ago=0):
+    queued_at = NOW - timedelta(seconds=queued_seconds_ago)
+    return Candidate(id, user_id, 'normal', queued_at, queued_at + timedelta(seconds=seconds * 0.1))
+
+def test_order_puts_short_jobs_first():
+    jobs = [job('long', seconds=3600), job('short', seconds=60)]
+    assert [j.id for j in order(jobs, {}, {}, 0.5, 3600)] == ['short', 'long']
+
+def test_order_delays_users_by_recent_usage_and_weight():
+    jobs = [job('heavy', 'a'), job('light', 'b', queued_seconds_ago=-10)]
+    usage = {'a': 600.0}
+    assert [j.id for j in order(jobs, usage, {}, 0.5, 3600)] == ['light', 'heavy']
+    # A large enough weight cancels the usage
+    assert [j.id for j in order(jobs, usage, {'a': 1000}, 0.5, 3600)] == ['heavy', 'light']
+
+def test_order_caps_the_total_delay():
+    jobs = [job('old', 'a', queued_seconds_ago=120), job('new', 'b')]
+    assert [j.id for j in order(jobs, {'a': 1e6}, {}, 0.5, 60)] == ['old', 'new']
+
+def add_pending(app, id, user_id=None, size=0, priority='normal', audio_seconds=None):
+    path = f"{app.config['UPLOAD_FOLDER']}/{id}.wav"
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    transcription = Transcription(id=id, file_name=id, file_path=path, status='pending', user_id=user_id,
+                                  priority=priority, audio_seconds=audio_seconds)
+    schedule(transcription, NOW)
+    db.session.add(transcription)
+    db.session.commit()
+    return transcription
+
+def test_schedule_estimates_from_file_size_and_records_queue_time(app):
+    transcription = add_pending(app, 'sized', size=16000 * 100)
+    assert transcription.queued_at == NOW
+    assert transcription.audio_seconds is None
+    assert transcription.schedule_at == NOW + timedelta(seconds=60 + 100 * 0.1)
+
+def test_candidates_rank_per_user_within_the_earliest_jobs(app):
+    for i in range(4):
+        add_pending(app, f'a{i}', 'user-a', audio_seconds=i * 10)
+    add_pending(app, 'b0', 'user-b', audio_seconds=500)
+    ids = [c.id for c in candidates(per_user=2, limit=10)]
+    assert sorted(ids) == ['a0', 'a1', 'b0']
+    # Only the earliest jobs are ranked at all
+    assert sorted(c.id for c in candidates(per_user=5, limit=2)) == ['a0', 'a1']
+    assert all(c.queued_at == NOW for c in candidates())
+
+def test_probe_pending_reschedules_by_the_probed_duration(app, monkeypatch):
+    add_pending(app, 'probed', size=16000 * 1000)
+    monkeypatch.setattr(scheduler, 'probe_duration', lambda path: 10.0)
+    assert probe_pending() == 1
+    db.session.expire_all()
+    transcription = db.session.get(Transcription, 'probed')
+    assert transcription.audio_seconds == 10.0
+    assert transcription.schedule_at == NOW + timedelta(seconds=60 + 1)
+    assert probe_pending() == 0
+
+def test_probe_pending_orders_unscheduled_rows_by_creation_time(app, monkeypatch):
+    add_pending(app, 'scheduled', size=16000)
+    # Rows queued before scheduling existed have no schedule_at
+    db.session.add(Transcription(id='legacy', file_name='legacy', file_path='/tmp/legacy', status='pending',
+                                 created_at=NOW + timedelta(hours=1)))
+    db.session.commit()
+    monkeypatch.setattr(scheduler, 'probe_duration', lambda path: 10.0)
+    assert probe_pending(limit=1) == 1
+    db.session.expire_all()
+    assert db.session.get(Transcription, 'scheduled').audio_seconds == 10.0
+    assert db.session.get(Transcription, 'legacy').audio_seconds is None
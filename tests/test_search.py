@@ -0,0 +1,43 @@
+from app import db
+from app.models.transcription import Transcription
+from app.services.search import fts5_query, index_transcription, search_transcriptions
+
+def add_transcript(id, segments, user_id=None):
+    db.session.add(Transcription(id=id, file_name=f'{id}.wav', file_path=f'/tmp/{id}.wav',
+                                 status='completed', user_id=user_id))
+    index_transcription(id, ' '.join(s['text'] for s in segments), segments)
+    db.session.commit()
+
+def segment(start, text):
+    return {'start': start, 'end': start + 5.0, 'text': text}
+
+def test_fts5_query_quotes_operators_and_keeps_phrases():
+    assert fts5_query('budget OR "next quarter" -x') == '"budget" "OR" "next quarter" "-x"'
+    assert fts5_query('it"s') == '"it""s"'
+
+def test_search_ranks_transcriptions_and_points_at_matching_segments(app):
+    add_transcript('a', [segment(0.0, 'Welcome everyone'), segment(5.0, 'the budget is due'),
+                         segment(10.0, 'budget review next week')])
+    add_transcript('b', [segment(0.0, 'we talked about the budget once')])
+    add_transcript('c', [segment(0.0, 'nothing relevant here')])
+
+    results = search_transcriptions('budget')
+    assert [r['id'] for r in results] == ['a', 'b']
+    assert results[0]['hits'] == 2
+    assert [m['start'] for m in results[0]['matches']] == [5.0, 10.0]
+    assert '<mark>budget</mark>' in results[0]['matches'][0]['snippet']
+
+def test_reindexing_replaces_rows_and_results_filter_by_user(app):
+    add_transcript('a', [segment(0.0, 'old words')], user_id='user-a')
+    index_transcription('a', 'new words', [segment(0.0, 'new words')])
+    add_transcript('b', [segment(0.0, 'new words')], user_id='user-b')
+    db.session.commit()
+
+    assert search_transcriptions('old') == []
+    assert [r['id'] for r in search_transcriptions('new', user_id='user-a')] == ['a']
+
+def test_search_endpoint_requires_a_query(client):
+    assert client.get('/api/transcription/search').status_code == 400
+    response = client.get('/api/transcription/search?q=anything')
+    assert response.status_code == 200
+    assert response.get_json() == {'query': 'anything', 'results': []}
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.services import governor
+from app.services.governor import InferenceGovernor
+from app.services.streaming import SAMPLE_RATE, StreamError, StreamingSession, call
+
+class FakeRegistry:
+    def __init__(self):
+        self.decodes = 0
+
+    @contextmanager
+    def use(self, name, device):
+        self.decodes += 1
+        model = SimpleNamespace(transcribe=lambda audio, **options: {'segments': [
+            {'words': [{'word': ' hello', 'start': 0.0, 'end': 0.5}]}
+        ]})
+        yield SimpleNamespace(model=model, key=SimpleNamespace(precision='fp32'))
+
+def session(tmp_path):
+    return StreamingSession('live', 'tiny', 'cpu', 'en', 'pcm_f32le', str(tmp_path / 'live.wav'),
+                            step=1.0, buffer_seconds=15)
+
+def second_of_audio():
+    return np.zeros(SAMPLE_RATE, dtype=np.float32).tobytes()
+
+def test_sessions_in_the_web_tier_need_a_single_worker(app):
+    app.config['WORKERS'] = 4
+    with pytest.raises(StreamError) as e:
+        call('open', session_id='live')
+    assert e.value.status_code == 503
+
+def test_push_buffers_audio_while_every_slot_is_busy(app, tmp_path, monkeypatch):
+    busy = InferenceGovernor(str(tmp_path / 'slots'), slots=1, threads_per_slot=1)
+    monkeypatch.setattr(governor, '_governor', busy)
+    registry = FakeRegistry()
+    live = session(tmp_path)
+    held = busy.try_acquire()
+    try:
+        state = live.push(second_of_audio(), registry)
+        assert state['hypothesis'] == ''
+        assert live.undecoded == SAMPLE_RATE
+    finally:
+        busy.release(held)
+
+    state = live.push(second_of_audio(), registry)
+    assert state['hypothesis'] == ' hello'
+    assert live.undecoded == 0
+    live.close()
@@ -0,0 +1,53 @@
+import pytest
+from app import db
+from app.api.transcription import result_options
+from app.models.transcription import Transcription
+from app.services import downloads, result_cache
+from app.services.downloads import download_one
+from app.services.model_registry import ModelRegistry
+from app.services.result_cache import get_cache, make_key
+
+VIDEO = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+def submit(client, url):
+    return client.post('/api/youtube/youtube/transcribe', json={'url': url, 'model': 'tiny'})
+
+@pytest.fixture(autouse=True)
+def installed(app, monkeypatch):
+    monkeypatch.setattr(ModelRegistry, 'is_installed', lambda self, name: True)
+    # A cache in this test's storage path
+    monkeypatch.setattr(result_cache, '_cache', None)
+
+def test_a_video_is_queued_for_the_downloader(client):
+    response = submit(client, VIDEO)
+    assert response.status_code == 202
+    transcription = db.session.get(Transcription, response.get_json()['id'])
+    assert transcription.status == 'downloading'
+    assert transcription.file_path == VIDEO
+
+def test_urls_longer_than_the_column_are_rejected(client):
+    response = submit(client, VIDEO + '&t=' + '1' * 300)
+    assert response.status_code == 400
+    assert Transcription.query.count() == 0
+
+def test_downloaded_videos_are_queued_and_served_from_the_cache_afterwards(app, client, monkeypatch):
+    video_id = submit(client, VIDEO).get_json()['id']
+
+    def download_audio(url, directory):
+        path = f'{directory}/video.webm'
+        with open(path, 'wb') as f:
+            f.write(b'audio')
+        return path, 'Never Gonna Give You Up'
+
+    monkeypatch.setattr(downloads, 'download_audio', download_audio)
+    download_one(app, video_id)
+    transcription = db.session.get(Transcription, video_id)
+    assert transcription.status == 'pending'
+    assert transcription.file_name == 'Never Gonna Give You Up'
+
+    # The worker stores the result under the file's key
+    get_cache().put(make_key(f'file:{transcription.content_hash}', 'tiny', result_options()), {
+        'text': 'never gonna', 'segments': [], 'device': 'cpu', 'language': 'en'})
+    response = submit(client, VIDEO)
+    assert response.status_code == 200
+    assert response.get_json()['cached'] and response.get_json()['text'] == 'never gonna'